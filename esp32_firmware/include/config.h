@@ -11,6 +11,11 @@
 // --- COMUNICAÇÃO COM RASPBERRY PI VIA UART ---
 #define RPI_RX_PIN 16
 #define RPI_TX_PIN 17
+#define RPI_BAUD_RATE 460800                     // Deve ser igual ao BAUD_RATE do robot_client.py
+
+// --- TELEMETRIA (PROTOCOLO V2) ---
+#define TELEMETRY_RATE_HZ 200                    // Amostras por segundo (IMU, encoders e bateria), até 1000
+#define TELEMETRY_BATCH_SIZE 4                   // Amostras por quadro, isto é, por escrita na UART
 
 // --- MAPEAMENTO DE PINOS (PINOUT) ---
 // Motores
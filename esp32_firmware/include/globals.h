@@ -9,18 +9,26 @@
 #include <Adafruit_Sensor.h>
 #include <Wire.h>
 
-// --- ESTRUTURA PARA DADOS DE TELEMETRIA ---
-struct __attribute__((packed)) TelemetryData {
+// --- ESTRUTURA PARA DADOS DE TELEMETRIA (PROTOCOLO V2) ---
+// Quadro na UART: SOP (0xAA 0x55) | versão (uint8) | n (uint8) | n × TelemetrySample | CRC-16 (uint16)
+// O CRC-16/CCITT-FALSE cobre da versão até o fim da última amostra.
+#define TELEMETRY_PROTOCOL_VERSION 2
+#define TELEMETRY_MAX_BATCH 16
+
+struct __attribute__((packed)) TelemetrySample {
+  uint16_t seq;            // Contador de amostras: lacunas indicam amostras perdidas
   int64_t  timestamp_us;
   float    pitch;
   float    roll;
-  int16_t  gyro_z_raw;
-  int32_t  left_encoder;   
-  int32_t  right_encoder;  
+  float    gyro_z;         // Velocidade angular Z em rad/s
+  int16_t  left_encoder;   // Pulsos desde a amostra anterior
+  int16_t  right_encoder;  // Pulsos desde a amostra anterior
   uint16_t battery_mv;
-  uint8_t  checksum;
 };
 
+static_assert(TELEMETRY_BATCH_SIZE >= 1 && TELEMETRY_BATCH_SIZE <= TELEMETRY_MAX_BATCH,
+              "TELEMETRY_BATCH_SIZE deve estar entre 1 e TELEMETRY_MAX_BATCH");
+
 // --- OBJETOS E HANDLES GLOBAIS (EXTERN) ---
 extern Adafruit_MPU6050 mpu;
 extern TaskHandle_t communicationTaskHandle;
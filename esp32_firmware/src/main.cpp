@@ -13,7 +13,7 @@ void setup() {
   #if USE_USB_SERIAL
     DEBUG_PRINTLN("MODO DEBUG: Usando a porta USB Serial para comandos e telemetria.");
   #else
-    SerialRPi.begin(115200, SERIAL_8N1, RPI_RX_PIN, RPI_TX_PIN);
+    SerialRPi.begin(RPI_BAUD_RATE, SERIAL_8N1, RPI_RX_PIN, RPI_TX_PIN);
     DEBUG_PRINTLN("MODO PRODUÇÃO: Usando a porta UART para comunicação com a Raspberry Pi.");
   #endif
   
@@ -26,7 +26,8 @@ void setup() {
   setupADC();
   
   // --- CRIAÇÃO DOS ELEMENTOS FREERTOS --- 
-  telemetryQueue = xQueueCreate(5, sizeof(TelemetryData)); 
+  // Folga de alguns quadros: se a UART atrasar, as amostras perdidas aparecem como lacunas de `seq`
+  telemetryQueue = xQueueCreate(4 * TELEMETRY_BATCH_SIZE, sizeof(TelemetrySample));
   commandMutex = xSemaphoreCreateMutex();
 
   // --- CRIAÇÃO DAS TAREFAS ---
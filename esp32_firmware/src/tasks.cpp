@@ -6,11 +6,41 @@
 
 // Start of Packet para comunicação binária
 const uint8_t SOP[] = {0xAA, 0x55};
+const size_t FRAME_HEADER_SIZE = 4;              // SOP, versão e número de amostras
+
+
+// --- QUADRO DE TELEMETRIA ---
+// CRC-16/CCITT-FALSE (polinômio 0x1021, valor inicial 0xFFFF)
+static uint16_t crc16_ccitt(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+// Completa o cabeçalho e o CRC de um quadro com `count` amostras e o envia em uma única escrita
+static void send_telemetry_frame(uint8_t *frame, uint8_t count) {
+  frame[0] = SOP[0];
+  frame[1] = SOP[1];
+  frame[2] = TELEMETRY_PROTOCOL_VERSION;
+  frame[3] = count;
+  size_t len = FRAME_HEADER_SIZE + count * sizeof(TelemetrySample);
+  uint16_t crc = crc16_ccitt(frame + 2, len - 2);
+  frame[len] = crc & 0xFF;
+  frame[len + 1] = crc >> 8;
+  CommsSerial.write(frame, len + 2);
+}
 
 
 // --- TAREFA DE COMUNICAÇÃO ---
 void communication_task(void *pvParameters) {
-  TelemetryData receivedData;
+  TelemetrySample receivedData;
+  uint8_t frame[FRAME_HEADER_SIZE + TELEMETRY_MAX_BATCH * sizeof(TelemetrySample) + 2];
+  uint8_t batched = 0;
   for (;;) {
     // 1. LER COMANDOS DA PORTA DE COMUNICAÇÃO ATIVA
     if (CommsSerial.available()) {
@@ -46,35 +76,37 @@ void communication_task(void *pvParameters) {
       }
     }
 
-    // 2. ENVIAR TELEMETRIA PARA A PORTA DE COMUNICAÇÃO ATIVA (Lógica inalterada)
-    if (xQueueReceive(telemetryQueue, &receivedData, 0) == pdPASS) {
+    // 2. ENVIAR TELEMETRIA PARA A PORTA DE COMUNICAÇÃO ATIVA
+    // Espera a próxima amostra por pouco tempo, para voltar logo a verificar os comandos.
+    // Drena a fila a cada amostra: a taxa é a do sensor_motor_task, não a deste laço.
+    if (xQueueReceive(telemetryQueue, &receivedData, pdMS_TO_TICKS(2)) == pdPASS) {
       #if USE_USB_SERIAL
-        CommsSerial.printf("Pitch: %.2f, Roll: %.2f, EncL: %d, EncR: %d, Batt: %dmV\n",
-                           receivedData.pitch, receivedData.roll,
+        CommsSerial.printf("Seq: %u, Pitch: %.2f, Roll: %.2f, GyroZ: %.3f, EncL: %d, EncR: %d, Batt: %umV\n",
+                           receivedData.seq, receivedData.pitch, receivedData.roll, receivedData.gyro_z,
                            receivedData.left_encoder, receivedData.right_encoder,
                            receivedData.battery_mv);
       #else
-        CommsSerial.write(SOP, sizeof(SOP));
-        CommsSerial.write((uint8_t*)&receivedData, sizeof(TelemetryData));
+        // Junta TELEMETRY_BATCH_SIZE amostras por quadro: menos escritas e menos cabeçalhos na UART
+        memcpy(frame + FRAME_HEADER_SIZE + batched * sizeof(TelemetrySample), &receivedData, sizeof(TelemetrySample));
+        if (++batched == TELEMETRY_BATCH_SIZE) {
+          send_telemetry_frame(frame, batched);
+          batched = 0;
+        }
       #endif
     }
-    
-    vTaskDelay(pdMS_TO_TICKS(20));
   }
 }
 
 // --- TAREFA DE SENSORES E MOTORES ---
 void sensor_motor_task(void *pvParameters) {
-  char localRobotState;
-  TelemetryData dataToSend;
+  char localRobotState = 'S';
+  char appliedState = 0;
+  int appliedSpeed = -1;
+  TelemetrySample dataToSend;
+  uint16_t seq = 0;
   sensors_event_t a, g, temp;
   float pitch_acc, roll_acc;
 
-  // --- Variáveis para média móvel dos encoders ---
-  const int MOVING_AVG_SIZE = 5;
-  int16_t readings_A[MOVING_AVG_SIZE] = {0}; long total_A = 0; int index_A = 0;
-  int16_t readings_B[MOVING_AVG_SIZE] = {0}; long total_B = 0; int index_B = 0;
-
   // --- Variáveis para média móvel da bateria ---
   const int BATT_AVG_SIZE = 10;
   uint16_t readings_batt[BATT_AVG_SIZE] = {0};
@@ -82,6 +114,9 @@ void sensor_motor_task(void *pvParameters) {
   int index_batt = 0;
 
   last_filter_time = micros();
+  // Período fixo (vTaskDelayUntil): a taxa não depende do tempo gasto em cada iteração
+  const TickType_t period = pdMS_TO_TICKS(1000 / TELEMETRY_RATE_HZ);
+  TickType_t lastWake = xTaskGetTickCount();
 
   for (;;) {
     // --- Leitura de sensores e encoders ---
@@ -106,21 +141,15 @@ void sensor_motor_task(void *pvParameters) {
     angleRoll  = ALPHA * (angleRoll + gyro_roll * dt) + (1 - ALPHA) * roll_acc;
 
     // --- Preenchimento da struct de telemetria ---
+    dataToSend.seq = seq++;
     dataToSend.timestamp_us = esp_timer_get_time();
     dataToSend.pitch = anglePitch;
     dataToSend.roll = angleRoll;
-    dataToSend.gyro_z_raw = g.gyro.z;
-    
-    // --- Média móvel dos encoders (usando int32_t) ---
-    total_A = total_A - readings_A[index_A] + raw_counts_A;
-    readings_A[index_A] = raw_counts_A;
-    index_A = (index_A + 1) % MOVING_AVG_SIZE;
-    dataToSend.left_encoder = total_A / MOVING_AVG_SIZE;
+    dataToSend.gyro_z = g.gyro.z;
 
-    total_B = total_B - readings_B[index_B] + raw_counts_B;
-    readings_B[index_B] = raw_counts_B;
-    index_B = (index_B + 1) % MOVING_AVG_SIZE;
-    dataToSend.right_encoder = total_B / MOVING_AVG_SIZE;
+    // --- Encoders: pulsos desde a amostra anterior, sem filtro (a soma no receptor é exata) ---
+    dataToSend.left_encoder = raw_counts_A;
+    dataToSend.right_encoder = raw_counts_B;
 
     // --- Cálculo da tensão da bateria em mV ---
     float voltage_at_pin_mv = (adc_value / 4095.0) * 3300.0;
@@ -130,16 +159,8 @@ void sensor_motor_task(void *pvParameters) {
     index_batt = (index_batt + 1) % BATT_AVG_SIZE;
     dataToSend.battery_mv = total_batt / BATT_AVG_SIZE;
 
-    // --- CÁLCULO DO CHECKSUM ---
-    uint8_t* data_ptr = (uint8_t*)&dataToSend; // Ponteiro para o início da struct
-    uint8_t checksum = 0;
-    // Itera por todos os bytes da struct, exceto o último (que é o próprio checksum)
-    for (int i = 0; i < sizeof(TelemetryData) - 1; i++) {
-        checksum ^= data_ptr[i]; // Operação XOR
-    }
-    dataToSend.checksum = checksum; // Armazena o checksum calculado
-
     // Envia os dados para a fila, para serem lidos pela communication_task
+    // (o CRC é calculado por quadro; com a fila cheia a amostra é descartada e vira lacuna de `seq`)
     xQueueSend(telemetryQueue, &dataToSend, (TickType_t) 0);
 
     // --- Controle dos motores ---
@@ -148,17 +169,22 @@ void sensor_motor_task(void *pvParameters) {
       xSemaphoreGive(commandMutex);
     }
 
-    switch (localRobotState) {
-      case 'F': moveForward(); break;
-      case 'B': moveBackward(); break;
-      case 'L': turnLeft(); break;
-      case 'R': turnRight(); break;
-      case 'S': stopMotors(); break;
-      default: stopMotors(); break;
+    // Só reaplica com mudança de estado ou velocidade: a rampa de stopMotors() é bloqueante
+    // e, repetida a cada amostra, atrasaria o período da telemetria
+    if (localRobotState != appliedState || motorSpeed != appliedSpeed) {
+      switch (localRobotState) {
+        case 'F': moveForward(); break;
+        case 'B': moveBackward(); break;
+        case 'L': turnLeft(); break;
+        case 'R': turnRight(); break;
+        case 'S': stopMotors(); break;
+        default: stopMotors(); break;
+      }
+      appliedState = localRobotState;
+      appliedSpeed = motorSpeed;
     }
 
-    vTaskDelay(pdMS_TO_TICKS(10));
-    
+    vTaskDelayUntil(&lastWake, period);
   }
 
 }
\ No newline at end of file
@@ -66,7 +66,7 @@ Write-Host ""
 
 try {
     # Executa o dashboard
-    python .\dashboard\main.py
+    python .\dashboard\main.py @args
 } finally {
     # Desativa o ambiente virtual ao terminar
     Write-Host ""
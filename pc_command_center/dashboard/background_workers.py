@@ -1,22 +1,42 @@
-import cv2
 import numpy as np
+import os
+import sys
+import math
 import logging
+import threading
 import time
 
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QThread
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QThread, QTimer
+from PyQt6.QtGui import QImage
 
 import config
 from mqtt_client import MqttClientHandler
+from mjpeg_client import MjpegStreamClient
+from telemetry import TelemetryBatch, parse_telemetry_message
+from odometry import OdometryEngine, OdometryUpdate
 
 logger = logging.getLogger(__name__)
 
+def _cv2():
+    """OpenCV, importado na primeira chamada pelas threads de vídeo e visão, fora da inicialização da GUI."""
+    import cv2
+    return cv2
+
 # --- WORKER PARA O CLIENTE MQTT ---
 class MqttWorker(QObject):
-    telemetry_received = pyqtSignal(str, str)
+    telemetry_received = pyqtSignal(object)
     connection_status = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
+        # As mensagens chegam na thread de rede do paho e são acumuladas aqui;
+        # o timer desta thread entrega um lote por ciclo à GUI
+        self._batch_lock = threading.Lock()
+        self._pending_batch = TelemetryBatch()
+        self._malformed_total = 0
+        self._malformed_logged = 0
+        self._publish_failed = False
+        self.batch_timer = None
         self.mqtt_handler = MqttClientHandler(config.MQTT_BROKER, config.MQTT_PORT)
         self.mqtt_handler.add_external_on_message_callback(self._handle_incoming_message)
         self.mqtt_handler.add_external_on_connect_callback(self._handle_connection_result)
@@ -29,6 +49,10 @@ class MqttWorker(QObject):
         automatica quando usamos loop_start().
         """
         logger.info("Thread MQTT iniciada.")
+        self.batch_timer = QTimer(self)
+        self.batch_timer.timeout.connect(self._flush_batch)
+        self.batch_timer.start(int(1000 / config.TELEMETRY_BATCH_HZ))
+
         self.connection_status.emit("Conectando...")
         self.mqtt_handler.connect()
 
@@ -47,58 +71,433 @@ class MqttWorker(QObject):
         self.connection_status.emit("Reconectando...")
 
     def _handle_incoming_message(self, topic, payload):
-        self.telemetry_received.emit(topic, payload)
+        """Decodifica e converte a mensagem na thread de rede; a GUI só recebe lotes."""
+        try:
+            key, data, sample = parse_telemetry_message(topic, payload)
+        except ValueError as e:
+            with self._batch_lock:
+                self._malformed_total += 1
+            logger.debug(f"Telemetria malformada descartada: {e}")
+            return
+
+        with self._batch_lock:
+            batch = self._pending_batch
+            batch.latest_data[key] = data
+            if sample is not None:
+                batch.samples.append((key, sample))
+                batch.latest_samples[key] = sample
+
+    @pyqtSlot()
+    def _flush_batch(self):
+        with self._batch_lock:
+            batch = self._pending_batch
+            if not batch.latest_data and self._malformed_total == self._malformed_logged:
+                return
+            self._pending_batch = TelemetryBatch()
+            batch.malformed_total = self._malformed_total
+
+        if batch.malformed_total != self._malformed_logged:
+            logger.warning(f"Mensagens de telemetria malformadas: {batch.malformed_total - self._malformed_logged} "
+                           f"novas ({batch.malformed_total} no total).")
+            self._malformed_logged = batch.malformed_total
+        self.telemetry_received.emit(batch)
 
     @pyqtSlot(str, str)
     def publish_command(self, topic, payload):
-        if not self.mqtt_handler.publish(topic, payload):
+        if self.mqtt_handler.publish(topic, payload):
+            self._publish_failed = False
+        elif not self._publish_failed:
+            # Os comandos são republicados em taxa fixa: avisa uma vez por queda de conexão
+            self._publish_failed = True
             logger.warning("Falha ao enviar comando via MQTT (nao conectado).")
 
     @pyqtSlot()
     def stop(self):
         """Sinaliza ao handler para parar."""
         logger.info("Thread MQTT a encerrar...")
+        if self.batch_timer:
+            self.batch_timer.stop()
         self.mqtt_handler.disconnect()
 
+# --- WORKER DE ODOMETRIA ---
+class OdometryWorker(QObject):
+    """
+    Integra a pose do robô a partir dos lotes de telemetria, fora da thread
+    da GUI. Cada lote é convertido em arrays e integrado de uma só vez. As
+    mensagens com as amostras do robot_client (`per_sample`) entram com o
+    giroscópio de cada amostra; as de uma contagem (robot_mock.py), com a
+    última leitura do tópico do IMU.
+    """
+    pose_updated = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.engine = OdometryEngine()
+        self._epoch = 0
+        self._last_gyro_z = float('nan')
+
+    @pyqtSlot(object)
+    def process_batch(self, batch):
+        # Um bloco de arrays por mensagem, concatenados no fim
+        timestamps_us, received_at, left, right, gyro_z, interval_s = [], [], [], [], [], []
+        last_gyro_z = self._last_gyro_z
+        for key, sample in batch.samples:
+            if key == "imu":
+                last_gyro_z = sample.gyro_z
+            elif key == "encoders":
+                samples = sample.per_sample
+                if samples is not None:
+                    timestamps_us.append(samples.timestamp_us)
+                    received_at.append(np.full(len(samples.timestamp_us), sample.received_at))
+                    left.append(samples.left)
+                    right.append(samples.right)
+                    gyro_z.append(samples.gyro_z)
+                    interval_s.append(samples.interval_s)
+                    continue
+                timestamps_us.append([sample.timestamp_us if sample.timestamp_us is not None else float('nan')])
+                received_at.append([sample.received_at])
+                left.append([sample.left])
+                right.append([sample.right])
+                gyro_z.append([last_gyro_z])
+                interval_s.append([sample.interval_s])
+        self._last_gyro_z = last_gyro_z
+        if not timestamps_us:
+            return
+
+        timestamps_us, received_at, left, right, gyro_z, interval_s = (
+            np.concatenate(blocks) for blocks in (timestamps_us, received_at, left, right, gyro_z, interval_s))
+        xs, ys = self.engine.integrate(timestamps_us, received_at, left, right, gyro_z, interval_s)
+        timestamp_us = None if math.isnan(timestamps_us[-1]) else timestamps_us[-1]
+        pose = self.engine.pose(timestamp_us, received_at[-1])
+        self.pose_updated.emit(OdometryUpdate(xs, ys, pose, self._epoch))
+
+    @pyqtSlot(int, int)
+    def set_wheel_directions(self, left_sign, right_sign):
+        self.engine.set_wheel_directions(left_sign, right_sign)
+
+    @pyqtSlot(int)
+    def reset(self, epoch):
+        """Zera a pose; atualizações de épocas anteriores ainda em trânsito são ignoradas pela GUI."""
+        self.engine.reset()
+        self._epoch = epoch
+
+# --- ENTREGA DE FRAMES ENTRE THREADS ---
+class LatestFrameSlot:
+    """
+    Slot de um único frame compartilhado entre a thread de vídeo e a GUI.
+
+    `put` sobrescreve o frame anterior ainda não consumido (contado como
+    descartado) em vez de enfileirá-lo, de modo que a GUI sempre exibe o
+    frame mais recente e nunca acumula atraso. Retorna True quando o slot
+    estava vazio, indicando que a GUI precisa ser notificada.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.frames_dropped = 0
+
+    def put(self, frame):
+        with self._lock:
+            was_empty = self._frame is None
+            if not was_empty:
+                self.frames_dropped += 1
+            self._frame = frame
+        return was_empty
+
+    def take(self):
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
 # --- WORKER PARA O STREAM DE VIDEO ---
 class VideoWorker(QObject):
-    new_frame = pyqtSignal(np.ndarray)
+    frame_ready = pyqtSignal()
     video_status = pyqtSignal(str)
 
+
     def __init__(self):
         super().__init__()
         self._is_running = True
+        self._display_size = None
+        self._source_size = None
+        self._client = None
+        self.frame_slot = LatestFrameSlot()
+        # Slot opcional com o frame decodificado (BGR, resolução cheia, antes da conversão) para a VisionWorker
+        self.vision_slot = None
+
+        # Contadores acumulados, lidos pela GUI através de `stats_snapshot`
+        self.frames_decoded = 0
+        self.decode_time_s = 0.0
+        self.convert_time_s = 0.0
+
+    def set_display_size(self, width, height):
+        """
+        Informa o tamanho da área de exibição. Chamado diretamente pela GUI
+        (atribuição atômica), pois o loop de `run` não processa slots enfileirados.
+        """
+        self._display_size = (width, height)
 
     @pyqtSlot()
     def run(self):
         logger.info("Thread de video iniciada.")
+        cv2 = _cv2()
+        # Fatores de redução suportados pelo decodificador JPEG do OpenCV
+        self.reduced_decode_flags = {
+            1: cv2.IMREAD_COLOR,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }
+        if config.VIDEO_BACKEND == "ffmpeg":
+            self._run_ffmpeg()
+        else:
+            self._run_native()
+        logger.info("Thread de video encerrada.")
+
+    def _run_native(self):
+        """Lê o MJPEG por um socket persistente e decodifica só o frame mais recente."""
+        client = MjpegStreamClient(config.VIDEO_URL, timeout=config.VIDEO_CONNECT_TIMEOUT_S)
+        self._client = client
+        backoff = config.VIDEO_RECONNECT_MIN_S
+
+        while self._is_running:
+            logger.info(f"Tentando conectar ao stream de video em {config.VIDEO_URL}...")
+            self.video_status.emit("Conectando...")
+            try:
+                client.connect()
+            except OSError as e:
+                logger.debug(f"Falha ao conectar ao stream de video: {e}")
+                self.video_status.emit("Aguardando...")
+                self._sleep_backoff(backoff)
+                backoff = min(backoff * 2, config.VIDEO_RECONNECT_MAX_S)
+                continue
+
+            self.video_status.emit("Conectado")
+            backoff = config.VIDEO_RECONNECT_MIN_S
+
+            while self._is_running:
+                try:
+                    jpeg, headers = client.read_latest_frame()
+                except OSError as e:
+                    logger.warning(f"Stream de video perdido ({e}). Tentando reconectar...")
+                    self.video_status.emit("Reconectando...")
+                    break
+
+                t0 = time.perf_counter()
+                frame = self._decode(jpeg)
+                decoded_at = time.perf_counter()
+                self.decode_time_s += decoded_at - t0
+                if frame is not None and self._is_running:
+                    self.frames_decoded += 1
+                    self._publish(frame, client.capture_time_us(headers), decoded_at=decoded_at)
+
+            client.close()
+
+    def _run_ffmpeg(self):
+        """Caminho original via cv2.VideoCapture, mantido para comparação."""
+        cv2 = _cv2()
         while self._is_running:
             logger.info(f"Tentando conectar ao stream de video em {config.VIDEO_URL}...")
             self.video_status.emit("Conectando...")
             cap = cv2.VideoCapture(config.VIDEO_URL)
-            
+
             if not cap.isOpened():
                 self.video_status.emit("Aguardando...")
-                QThread.sleep(5) 
+                QThread.sleep(5)
                 continue
-            
+
             self.video_status.emit("Conectado")
-            
+
             while self._is_running:
+                t0 = time.perf_counter()
                 ret, frame = cap.read()
+                decoded_at = time.perf_counter()
+                self.decode_time_s += decoded_at - t0
                 if ret and self._is_running:
-                    self.new_frame.emit(frame)
+                    self.frames_decoded += 1
+                    self._publish(frame, decoded_at=decoded_at)
                 elif not ret:
                     logger.warning("Stream de video perdido. Tentando reconectar...")
                     self.video_status.emit("Reconectando...")
                     QThread.msleep(1000)
-                    break 
-            
+                    break
+
             cap.release()
-        
-        logger.info("Thread de video encerrada.")
+
+    def _decode(self, jpeg):
+        """Decodifica o JPEG, reduzindo a resolução quando a tela é menor que a fonte."""
+        cv2 = _cv2()
+        factor = self._reduction_factor()
+        data = np.frombuffer(jpeg, dtype=np.uint8)
+        frame = cv2.imdecode(data, self.reduced_decode_flags[factor])
+        if frame is not None:
+            h, w = frame.shape[:2]
+            self._source_size = (w * factor, h * factor)
+        return frame
+
+    def stats_snapshot(self):
+        """Valores acumulados do pipeline (leitura feita pela GUI, sem lock)."""
+        client = self._client
+        return {
+            "bytes_received": client.bytes_received if client else 0,
+            "frames_decoded": self.frames_decoded,
+            "dropped_network": client.frames_dropped if client else 0,
+            "dropped_display": self.frame_slot.frames_dropped,
+            "decode_time_s": self.decode_time_s,
+            "convert_time_s": self.convert_time_s,
+        }
+
+    def _publish(self, frame, capture_ts_us=None, decoded_at=None):
+        """Converte o frame e o deixa no slot; só notifica a GUI se ela já consumiu o anterior."""
+        if self.vision_slot is not None:
+            # A conversão abaixo gera arrays novos: o detector pode ler este sem cópia
+            self.vision_slot.put((frame, capture_ts_us))
+        t0 = time.perf_counter()
+        image = self._to_qimage(frame)
+        self.convert_time_s += time.perf_counter() - t0
+        if image is None:
+            return
+        image.capture_ts_us = capture_ts_us
+        image.decoded_at = decoded_at       # perf_counter ao fim da decodificação (os dois backends)
+        if self.frame_slot.put(image):
+            self.frame_ready.emit()
+
+    def _to_qimage(self, frame):
+        """
+        Redimensiona para a área de exibição, gira 180° e converte para RGB,
+        gerando um QImage pronto para pintar. Redimensionar antes reduz o custo
+        das demais etapas.
+        """
+        h, w = frame.shape[:2]
+        if h == 0 or w == 0:
+            return None
+        cv2 = _cv2()
+        if self._display_size:
+            disp_w, disp_h = self._display_size
+            scale = min(disp_w / w, disp_h / h)
+            new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
+            if (new_w, new_h) != (w, h):
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+                frame = cv2.resize(frame, (new_w, new_h), interpolation=interpolation)
+        frame = cv2.flip(frame, -1)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = rgb.shape
+        image = QImage(rgb.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        # O QImage não copia os pixels: mantém o array vivo junto com a imagem
+        image.ndarray = rgb
+        return image
+
+    def _reduction_factor(self):
+        # Com a visão ligada, o detector recebe o frame na resolução do stream: a precisão
+        # do SIFT não pode depender do tamanho da janela (a redução fica só para a exibição)
+        if self.vision_slot is not None or not self._display_size or not self._source_size:
+            return 1
+        disp_w, disp_h = self._display_size
+        src_w, src_h = self._source_size
+        factor = 1
+        for candidate in (2, 4, 8):
+            if src_w / candidate >= disp_w and src_h / candidate >= disp_h:
+                factor = candidate
+        return factor
+
+    def _sleep_backoff(self, seconds):
+        # Dorme em fatias curtas para responder rápido ao encerramento
+        deadline = time.monotonic() + seconds
+        while self._is_running and time.monotonic() < deadline:
+            QThread.msleep(50)
 
     @pyqtSlot()
     def stop(self):
         self._is_running = False
 
+
+# --- WORKER DE VISÃO (DETECÇÃO SOBRE OS FRAMES DO VÍDEO) ---
+class VisionDetection:
+    """Caixa de um template detectado, em coordenadas normalizadas (0..1) da imagem exibida."""
+    __slots__ = ('template_id', 'points')
+
+    def __init__(self, template_id, points):
+        self.template_id = template_id
+        self.points = points            # Lista de 4 tuplas (u, v)
+
+
+class VisionOverlay:
+    __slots__ = ('detections', 'mode', 'confidence', 'capture_ts_us', 'received_at')
+
+    def __init__(self, detections, mode, confidence, capture_ts_us):
+        self.detections = detections
+        self.mode = mode                # "detect", "track" ou "lost"
+        self.confidence = confidence
+        self.capture_ts_us = capture_ts_us
+        self.received_at = time.monotonic()
+
+
+class VisionWorker(QObject):
+    """
+    Roda o detector de templates de `vision/` sobre os frames que a
+    VideoWorker já decodificou, sem abrir uma segunda conexão ao stream.
+
+    Lê apenas o frame mais recente do slot em sua própria taxa
+    (VISION_RATE_HZ); frames que chegam enquanto o detector trabalha são
+    descartados, sem atrasar a exibição do vídeo.
+    """
+    overlay_ready = pyqtSignal(object)
+
+    def __init__(self, frame_slot):
+        super().__init__()
+        self.frame_slot = frame_slot
+        self.pipeline = None
+        self.timer = None
+        self.frames_processed = 0
+
+    @pyqtSlot()
+    def run(self):
+        logger.info("Thread de visao iniciada.")
+        cv2 = _cv2()
+        vision_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), config.VISION_DIR))
+        if vision_dir not in sys.path:
+            sys.path.append(vision_dir)
+        try:
+            from detector import TemplateLibrary, SiftTemplateDetector
+            from tracker import DetectThenTrack
+            library = TemplateLibrary(os.path.join(vision_dir, "templates"))
+            detector = SiftTemplateDetector(library, max_keypoints=config.VISION_MAX_KEYPOINTS)
+        except (ImportError, OSError, ValueError, cv2.error) as e:
+            logger.error(f"Deteccao desativada: falha ao carregar o detector de '{vision_dir}': {e}")
+            return
+        self.pipeline = DetectThenTrack(detector, detect_interval=config.VISION_DETECT_INTERVAL,
+                                        track_scale=config.VISION_TRACK_SCALE,
+                                        min_confidence=config.VISION_MIN_TRACK_CONFIDENCE)
+        logger.info(f"Detector carregado com {len(library)} templates.")
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._process_latest)
+        self.timer.start(int(1000 / config.VISION_RATE_HZ))
+
+    @pyqtSlot()
+    def _process_latest(self):
+        item = self.frame_slot.take()
+        if item is None:
+            return
+        frame, capture_ts_us = item
+        cv2 = _cv2()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        result = self.pipeline.process(gray)
+        self.frames_processed += 1
+
+        detections = []
+        if result.found:
+            # O vídeo é exibido girado 180°: inverte as coordenadas normalizadas
+            h, w = gray.shape
+            points = [(1.0 - x / w, 1.0 - y / h) for x, y in result.corners.tolist()]
+            detections.append(VisionDetection(result.template_id, points))
+        self.overlay_ready.emit(VisionOverlay(detections, result.mode, result.confidence, capture_ts_us))
+
+    @pyqtSlot()
+    def stop(self):
+        logger.info("Thread de visao a encerrar...")
+        if self.timer:
+            self.timer.stop()
+        if self.pipeline is not None:
+            logger.info(f"Deteccao: {self.frames_processed} frames processados, {self.frame_slot.frames_dropped} "
+                        f"descartados; media por deteccao (ms): {self.pipeline.detector.timing_summary()}")
@@ -1,16 +1,103 @@
+import os
+
+# Pasta pc_command_center/: arquivos gerados em execução ficam nela, qualquer que seja a pasta de onde o dashboard é iniciado
+OUTPUT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # --- CONFIGURAÇÕES MQTT ---
 MQTT_BROKER = "localhost"                                     # Endereço do broker MQTT
 MQTT_PORT = 1883                                              # Porta padrão do MQTT
 TOPIC_COMMAND_DRIVE = "robot/cmnd/drive"                      # Tópico para comandos de direção
+TOPIC_COMMAND_HEARTBEAT = "robot/cmnd/heartbeat"              # Tópico do heartbeat enviado com o robô parado
 TOPIC_TELEMETRY = "robot/tele/#"                              # Inscreve-se em todos os tópicos de telemetria
 
+# --- CONFIGURAÇÕES DOS COMANDOS DE DIREÇÃO ---
+DRIVE_COMMAND_HZ = 10                                         # Taxa de republicação do setpoint em movimento
+DRIVE_MIN_INTERVAL_S = 0.05                                   # Intervalo mínimo entre comandos (limita rajadas de teclas)
+DRIVE_STOP_REPEATS = 3                                        # Quantas vezes o comando de parada é repetido
+DRIVE_HEARTBEAT_HZ = 1                                        # Taxa do heartbeat com o robô parado
+
+# --- CONFIGURAÇÕES DE INICIALIZAÇÃO ---
+STARTUP_DEFERRED_MAX_WAIT_MS = 500                            # Inicia a segunda fase mesmo sem a primeira pintura
+STARTUP_PROFILE_REPORT_DELAY_MS = 1500                        # Espera (--profile-startup) para incluir o import do OpenCV
+
+# --- CONFIGURAÇÕES DE RENDERIZAÇÃO DA TELEMETRIA ---
+TELEMETRY_BATCH_HZ = 50                                       # Taxa máxima de lotes de telemetria entregues à GUI
+GAUGE_REFRESH_HZ = 30                                         # Taxa de atualização dos indicadores (horizonte, bússola, etc.)
+RAW_TELEMETRY_REFRESH_HZ = 4                                  # Taxa de atualização do painel de texto da telemetria
+HUD_ANGLE_EPSILON_DEG = 0.1                                   # Variação angular mínima que provoca repaint dos indicadores
+HUD_SPEED_EPSILON_RPM = 0.1                                   # Variação mínima de velocidade que provoca repaint
+HUD_VOLTAGE_EPSILON_V = 0.01                                  # Variação mínima de tensão que provoca repaint
+
+# --- CONFIGURAÇÕES DOS GRÁFICOS DE TELEMETRIA ---
+PLOT_HISTORY_S = 600                                          # Histórico mantido por canal (segundos)
+PLOT_MAX_RATE_HZ = 100                                        # Taxa máxima de amostras por canal considerada no buffer
+PLOT_WINDOW_S = 60                                            # Janela de tempo exibida nos gráficos
+PLOT_REFRESH_HZ = 20                                          # Taxa de redesenho dos gráficos
+PLOT_LABEL_REFRESH_HZ = 5                                     # Taxa de atualização dos rótulos (valor atual e escala)
+PLOT_COLUMN_PX = 3                                            # Largura (px) de cada coluna min/max desenhada
+PLOT_DEFAULT_CHANNELS = ["imu.pitch", "imu.roll", "battery.voltage_v", "encoders.speed_rpm"]
+
 # --- CONFIGURAÇÕES DE VÍDEO ---
 VIDEO_URL = "http://pizero.local:8000/stream.mjpg"            # URL do stream de vídeo MJPEG do Raspberry Pi Zero
+VIDEO_BACKEND = "native"                                      # "native" (cliente MJPEG próprio) ou "ffmpeg" (cv2.VideoCapture)
+VIDEO_CONNECT_TIMEOUT_S = 2.0                                 # Timeout do socket do stream de vídeo
+VIDEO_RECONNECT_MIN_S = 0.1                                   # Espera inicial entre tentativas de reconexão
+VIDEO_RECONNECT_MAX_S = 2.0                                   # Espera máxima (backoff exponencial)
+VIDEO_STATS_INTERVAL_S = 1.0                                  # Período de amostragem das estatísticas de vídeo
+VIDEO_STATS_CSV = os.path.join(OUTPUT_DIR, "video_stats.csv")  # CSV rotativo das estatísticas (None para desabilitar)
+VIDEO_STATS_CSV_MAX_BYTES = 1024 * 1024                       # Tamanho máximo de cada arquivo CSV
+VIDEO_STATS_MIN_FPS = 15                                      # Abaixo disso (sem descartes) o gargalo é a rede
+VIDEO_STATS_MAX_AGE_MS = 500                                  # Idade de frame considerada atrasada
 MIN_VOLTAGE = 6.0                                             # Tensão elétrica (V) mínima para o indicador de bateria
 MAX_VOLTAGE = 12.6                                            # Voltagem máxima para o indicador de bateria
 
+# --- CONFIGURAÇÕES DA VISÃO (DETECÇÃO SOBRE O VÍDEO DO DASHBOARD) ---
+VISION_ENABLED = False                                        # True: detecta os templates nos frames já decodificados (também via --vision)
+VISION_DIR = "../vision"                                      # Pasta do detector, relativa à pasta do dashboard
+VISION_RATE_HZ = 10                                           # Taxa máxima de frames processados pelo detector
+VISION_MAX_KEYPOINTS = 1000                                   # Keypoints SIFT por frame (0 = sem limite)
+VISION_DETECT_INTERVAL = 5                                    # Detecção completa a cada N frames processados; entre elas, rastreamento
+VISION_TRACK_SCALE = 0.5                                      # Escala do frame usada no rastreamento por fluxo óptico
+VISION_MIN_TRACK_CONFIDENCE = 0.5                             # Abaixo disso, força uma nova detecção
+VISION_OVERLAY_TIMEOUT_S = 1.0                                # Caixas mais velhas que isso deixam de ser desenhadas
+
+# --- CONFIGURAÇÕES DO RASTREAMENTO DO ALVO (MODO SENTINELA, F6 COM --vision) ---
+TRACKING_COMMAND_HZ = 5                                       # Taxa máxima de comandos de giro do rastreamento
+TRACKING_KP = 100.0                                           # Giro (-100..100) por fração da largura da imagem de erro
+TRACKING_DEADBAND = 0.05                                      # Erro (fração da largura) tolerado sem girar
+TRACKING_MIN_TURN = 30                                        # Giro mínimo que vence o atrito dos motores
+TRACKING_MAX_TURN = 60                                        # Giro máximo comandado pelo rastreamento
+TRACKING_MAX_AGE_S = 0.8                                      # Detecções mais velhas que isso (desde a captura) param o robô
+TRACKING_TURN_RATE_DEG_S = 180.0                              # Velocidade angular com giro 100 (medir no robô; usada na compensação)
+TRACKING_COMMAND_DELAY_S = 0.05                               # Tempo até um comando enviado fazer efeito nas rodas
+TRACKING_LOG_CSV = os.path.join(OUTPUT_DIR, "tracking_log.csv")  # CSV rotativo dos comandos do rastreamento (None para desabilitar)
+CAMERA_HFOV_DEG = 62.2                                        # Campo de visão horizontal da câmera (Camera Module v2)
+
 # --- CONFIGURAÇÕES PARA VELOCIDADE DO ROBÔ ---
 ENCODER_PPR = 20                                              # Pulsos por revolução do encoder
 ENCODER_INTERVAL_S = 0.1                                      # Intervalo de tempo entre leituras dos encoders em segundos
 ENCODER_TO_RPM_K = (60 / (ENCODER_PPR * ENCODER_INTERVAL_S))  # Fator de conversão de pulsos do encoder para RPM
-SPEEDOMETER_MAX_RPM = 150                                     # RPM máxima exibida no velocímetro
\ No newline at end of file
+SPEEDOMETER_MAX_RPM = 150                                     # RPM máxima exibida no velocímetro
+
+# --- CONFIGURAÇÕES DA ODOMETRIA ---
+WHEEL_DIAMETER_M = 0.065                                      # Diâmetro das rodas em metros
+WHEEL_BASE_M = 0.15                                           # Distância entre as rodas (bitola) em metros
+ODOMETRY_HEADING_SOURCE = "gyro_rate"                         # "gyro_rate" (firmware), "gyro_heading" (robot_mock.py) ou "encoders"
+ODOMETRY_GYRO_SCALE = 1.0                                     # Converte o gyro_z recebido para rad/s (modo "gyro_rate")
+ODOMETRY_MAX_DT_S = 0.5                                       # Intervalo máximo integrado entre amostras (perda de conexão)
+ODOMETRY_SIMULATION = False                                   # True: pose simulada pelas teclas WASD (modo offline, também via --simulate)
+
+# --- CONFIGURAÇÕES DO MAPA ---
+MAP_PIXELS_PER_METER = 100                                    # Escala do mapa (unidades da cena por metro de odometria)
+MAP_TRAIL_CHUNK_SIZE = 256                                    # Pontos por trecho do rastro (só o último é redesenhado)
+MAP_TRAIL_MIN_DISTANCE = 2.0                                  # Distância mínima entre pontos do rastro (unidades da cena)
+MAP_TRAIL_ANGLE_TOLERANCE_DEG = 2.0                           # Mudança de direção abaixo disso estende o segmento atual
+MAP_TRAIL_SIMPLIFY_TOLERANCE = 1.0                            # Tolerância do Douglas-Peucker nos trechos antigos
+MAP_TRAIL_MAX_POINTS = 50000                                  # Limite total de pontos do rastro (None para ilimitado)
+MAP_POSE_EPSILON_PX = 0.5                                     # Deslocamento mínimo na tela (px) que atualiza a câmara do mapa
+COVERAGE_CELL_SIZE_M = 0.05                                   # Resolução da camada de cobertura (metros por célula)
+COVERAGE_TILE_CELLS = 64                                      # Células por lado de cada ladrilho (potência de 2)
+COVERAGE_FOOTPRINT_RADIUS_M = 0.08                            # Raio da faixa marcada como coberta em torno do robô
+COVERAGE_LOD_LEVELS = 4                                       # Níveis de detalhe (cada nível junta 2x2 blocos do anterior)
+COVERAGE_PIXMAP_CACHE_SIZE = 512                              # Pixmaps de ladrilhos mantidos em cache
+COVERAGE_EXPORT_DIR = OUTPUT_DIR                              # Pasta dos arquivos exportados com F5 (coverage_*.npz)
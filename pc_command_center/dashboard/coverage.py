@@ -0,0 +1,242 @@
+import math
+import numpy as np
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QImage, QPixmap
+
+class CoverageGrid:
+    """
+    Grade de cobertura esparsa: células de `cell_size` metros agrupadas em
+    ladrilhos de `tile_cells` x `tile_cells`. Um ladrilho (array NumPy de
+    bool) só é criado quando o robô passa por ele, então a memória cresce
+    com a área explorada e não com a duração da missão.
+    """
+    def __init__(self, cell_size=0.05, tile_cells=64, footprint_radius=0.08):
+        self.cell_size = cell_size
+        self.tile_cells = tile_cells
+        self.footprint_radius = footprint_radius
+        self.tiles = {}              # (tx, ty) -> array bool [linha=y, coluna=x]
+        self.covered_cells = 0
+        self._last_point = None
+        self._footprint = self._footprint_offsets()
+
+    def _footprint_offsets(self):
+        """Deslocamentos (dx, dy) em células do disco ocupado pelo robô."""
+        r = max(0, int(math.ceil(self.footprint_radius / self.cell_size)))
+        dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+        inside = dx ** 2 + dy ** 2 <= (self.footprint_radius / self.cell_size) ** 2 + 0.5
+        return np.stack([dx[inside], dy[inside]], axis=1)
+
+    @property
+    def covered_area_m2(self):
+        return self.covered_cells * self.cell_size ** 2
+
+    def clear(self):
+        self.tiles = {}
+        self.covered_cells = 0
+        self._last_point = None
+
+    def add_path(self, xs, ys):
+        """
+        Marca como coberta a faixa percorrida entre os pontos (metros), continuando
+        a partir do último ponto recebido. Retorna o conjunto de ladrilhos alterados.
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if len(xs) == 0:
+            return set()
+        if self._last_point is not None:
+            xs = np.concatenate(([self._last_point[0]], xs))
+            ys = np.concatenate(([self._last_point[1]], ys))
+        self._last_point = (xs[-1], ys[-1])
+
+        px, py = self._densify(xs, ys)
+        cells = np.floor(np.stack([px, py], axis=1) / self.cell_size).astype(np.int64)
+        cells = (cells[:, None, :] + self._footprint[None, :, :]).reshape(-1, 2)
+        cells = np.unique(cells, axis=0)
+        return self._mark(cells)
+
+    def _densify(self, xs, ys):
+        """Amostra os segmentos a cada meia célula, para não deixar falhas em trechos rápidos."""
+        if len(xs) == 1:
+            return xs, ys
+        dx, dy = np.diff(xs), np.diff(ys)
+        steps = np.maximum(1, np.ceil(np.hypot(dx, dy) / (0.5 * self.cell_size)).astype(np.int64))
+        segment = np.repeat(np.arange(len(dx)), steps)
+        # Fração ao longo de cada segmento: 0, 1/n, ..., (n-1)/n
+        offsets = np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = offsets / steps[segment]
+        px = np.concatenate((xs[:-1][segment] + t * dx[segment], xs[-1:]))
+        py = np.concatenate((ys[:-1][segment] + t * dy[segment], ys[-1:]))
+        return px, py
+
+    def _mark(self, cells):
+        n = self.tile_cells
+        tile_xy = cells // n
+        local = cells - tile_xy * n
+        order = np.lexsort((tile_xy[:, 1], tile_xy[:, 0]))
+        tile_xy, local = tile_xy[order], local[order]
+        starts = np.flatnonzero(np.r_[True, np.any(tile_xy[1:] != tile_xy[:-1], axis=1)])
+        bounds = np.r_[starts, len(tile_xy)]
+
+        changed = set()
+        for i in range(len(starts)):
+            key = (int(tile_xy[starts[i], 0]), int(tile_xy[starts[i], 1]))
+            tile = self.tiles.get(key)
+            if tile is None:
+                tile = self.tiles[key] = np.zeros((n, n), dtype=bool)
+            cols = local[bounds[i]:bounds[i + 1], 0]
+            rows = local[bounds[i]:bounds[i + 1], 1]
+            new = np.count_nonzero(~tile[rows, cols])
+            if new:
+                tile[rows, cols] = True
+                self.covered_cells += new
+                changed.add(key)
+        return changed
+
+    def tile_rect(self, tx, ty, span=1):
+        """Retângulo (metros) coberto por `span` x `span` ladrilhos a partir de (tx, ty)."""
+        size = self.tile_cells * self.cell_size
+        return QRectF(tx * size, ty * size, span * size, span * size)
+
+    def downsampled(self, level, sx, sy):
+        """
+        Máscara tile_cells x tile_cells do bloco de 2^level x 2^level ladrilhos
+        (sx, sy) no nível `level`: cada pixel é o "ou" de 2^level x 2^level células.
+        """
+        n = self.tile_cells
+        factor = 1 << level
+        out = np.zeros((n, n), dtype=bool)
+        sub = n // factor
+        for i in range(factor):
+            for j in range(factor):
+                tile = self.tiles.get((sx * factor + i, sy * factor + j))
+                if tile is None:
+                    continue
+                block = tile.reshape(sub, factor, sub, factor).any(axis=(1, 3))
+                out[j * sub:(j + 1) * sub, i * sub:(i + 1) * sub] = block
+        return out
+
+    # --- EXPORTAÇÃO ---
+    def save(self, path):
+        """Grava a camada em um .npz compacto (ladrilhos empacotados em bits)."""
+        keys = np.array(sorted(self.tiles), dtype=np.int32).reshape(-1, 2)
+        # Sem ladrilhos (robô parado ou mapa recém-zerado) grava uma camada vazia
+        packed = np.zeros((len(keys), (self.tile_cells * self.tile_cells + 7) // 8), dtype=np.uint8)
+        for i, key in enumerate(keys.tolist()):
+            packed[i] = np.packbits(self.tiles[tuple(key)])
+        np.savez_compressed(path, cell_size=self.cell_size, tile_cells=self.tile_cells, keys=keys, tiles=packed)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        grid = cls(float(data["cell_size"]), int(data["tile_cells"]))
+        n = grid.tile_cells
+        for key, bits in zip(data["keys"].tolist(), data["tiles"]):
+            tile = np.unpackbits(bits)[:n * n].reshape(n, n).astype(bool)
+            grid.tiles[tuple(key)] = tile
+            grid.covered_cells += int(np.count_nonzero(tile))
+        return grid
+
+
+class CoverageLayerItem(QGraphicsItem):
+    """
+    Camada da cena que desenha a CoverageGrid. As coordenadas locais do item
+    são metros (y para cima); a escala para a cena vem de `setTransform`.
+
+    Cada bloco visível é desenhado a partir de um QPixmap em cache. O nível
+    de detalhe é escolhido pela escala atual: com o mapa afastado, um único
+    pixmap resume 2^nível x 2^nível ladrilhos, mantendo constante o número
+    de pixmaps desenhados.
+    """
+    def __init__(self, grid, color, lod_levels=4, cache_size=512):
+        super().__init__()
+        self.grid = grid
+        self.lod_levels = max(1, min(lod_levels, int(math.log2(grid.tile_cells)) + 1))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()                     # (nível, sx, sy) -> QPixmap
+        self._blocks = [set() for _ in range(self.lod_levels)]
+        self._bounds = QRectF()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+        self.set_color(color)
+
+    def set_color(self, color):
+        # Pixel ARGB32 pré-multiplicado
+        a = color.alpha()
+        self._pixel = np.uint32((a << 24) | ((color.red() * a // 255) << 16) |
+                                ((color.green() * a // 255) << 8) | (color.blue() * a // 255))
+        self._cache.clear()
+        self.update()
+
+    def boundingRect(self):
+        return self._bounds
+
+    def add_path(self, xs, ys):
+        changed = self.grid.add_path(xs, ys)
+        if changed:
+            self._tiles_changed(changed)
+
+    def clear(self):
+        self.grid.clear()
+        self._cache.clear()
+        self._blocks = [set() for _ in range(self.lod_levels)]
+        self.prepareGeometryChange()
+        self._bounds = QRectF()
+        self.update()
+
+    def _tiles_changed(self, changed):
+        bounds = self._bounds
+        for tx, ty in changed:
+            for level in range(self.lod_levels):
+                block = (tx >> level, ty >> level)
+                self._blocks[level].add(block)
+                self._cache.pop((level, *block), None)
+            rect = self.grid.tile_rect(tx, ty)
+            bounds = rect if bounds.isNull() else bounds.united(rect)
+        if bounds != self._bounds:
+            self.prepareGeometryChange()
+            self._bounds = bounds
+        for tx, ty in changed:
+            self.update(self.grid.tile_rect(tx, ty))
+
+    def _level_for(self, painter):
+        # Pixels de tela por célula; afasta o nível até cada pixel do bloco ter >= ~1 px
+        pixels_per_cell = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) * self.grid.cell_size
+        if pixels_per_cell <= 0:
+            return self.lod_levels - 1
+        level = int(math.floor(math.log2(1.0 / pixels_per_cell))) if pixels_per_cell < 1 else 0
+        return max(0, min(self.lod_levels - 1, level))
+
+    def _pixmap(self, level, sx, sy):
+        key = (level, sx, sy)
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+            return pixmap
+        mask = self.grid.downsampled(level, sx, sy)
+        # Linha 0 da imagem é o topo; no item, y cresce para cima
+        pixels = np.ascontiguousarray(np.where(mask[::-1], self._pixel, np.uint32(0)))
+        n = self.grid.tile_cells
+        image = QImage(pixels.data, n, n, n * 4, QImage.Format.Format_ARGB32_Premultiplied)
+        pixmap = QPixmap.fromImage(image)
+        self._cache[key] = pixmap
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return pixmap
+
+    def paint(self, painter, option, widget=None):
+        level = self._level_for(painter)
+        exposed = option.exposedRect
+        span = 1 << level
+        painter.save()
+        # O item tem escala negativa em y: desenha cada pixmap sob uma transformação desvirada
+        painter.scale(1, -1)
+        for sx, sy in self._blocks[level]:
+            rect = self.grid.tile_rect(sx * span, sy * span, span)
+            if not rect.intersects(exposed):
+                continue
+            target = QRectF(rect.left(), -rect.bottom(), rect.width(), rect.height())
+            painter.drawPixmap(target, self._pixmap(level, sx, sy), QRectF(0, 0, self.grid.tile_cells, self.grid.tile_cells))
+        painter.restore()
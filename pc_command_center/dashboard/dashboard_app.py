@@ -1,46 +1,76 @@
+import os
 import json
+import time
 import logging
 import math
-import cv2
-import numpy as np
 
-from PyQt6.QtWidgets import QMainWindow, QWidget, QLabel, QGridLayout
-from PyQt6.QtCore import QThread, pyqtSignal, pyqtSlot, Qt, QTimer
-from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QMainWindow, QWidget, QGridLayout
+from PyQt6.QtCore import QThread, pyqtSignal, pyqtSlot, Qt, QTimer, QEvent
 
 import config
-from ui_widgets import (ArtificialHorizonWidget, SpeedometerWidget, HorizontalCompassWidget,
+from ui_widgets import (VideoSurfaceWidget, ArtificialHorizonWidget, SpeedometerWidget, HorizontalCompassWidget,
                         MapContainerWidget, KeyIndicatorWidget, TopLeftInfoWidget,
-                        RawTelemetryWidget)
-from background_workers import MqttWorker, VideoWorker
+                        RawTelemetryWidget, VideoStatsWidget, TimeSeriesPlotWidget)
+from drive_scheduler import DriveCommandScheduler
+from startup_profile import StartupProfiler
+# background_workers (NumPy, paho-mqtt), timeseries e video_stats só são
+# importados em `finish_startup`, depois que a janela já foi pintada
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class MainWindow(QMainWindow):
-    command_signal = pyqtSignal(str, str)
     stop_workers_signal = pyqtSignal()
+    wheel_directions_signal = pyqtSignal(int, int)
+    reset_odometry_signal = pyqtSignal(int)
 
-    def __init__(self):
+    def __init__(self, simulate=config.ODOMETRY_SIMULATION, vision=config.VISION_ENABLED, profiler=None):
         super().__init__()
+        # Modo offline: a pose do mapa é simulada pelas teclas em vez da odometria
+        self.simulate = simulate
+        # Detecção de templates sobre os frames do próprio vídeo (em vez de rodar vision/main.py à parte)
+        self.vision = vision
+        self.vision_thread = None
+        self.target_tracker = None
+        self.profiler = profiler or StartupProfiler()
+        self.started = False
         self.setWindowTitle("Robot Control HUD")
         self.setGeometry(100, 100, 1600, 900)
         self.setStyleSheet("""
             QMainWindow { background-color: #000; }
-            #video_label { background-color: #0d1b2a; }
         """)
 
         self.keys_pressed = set()
         self.last_drive_payload = None
         self.robot_pose = {'x': 0.0, 'y': 0.0, 'angle': 0.0}
+        self.odometry_pose = None
+        self._odometry_epoch = 0
         self.telemetry_state = {}
+        self.latest_samples = {}
+        self.telemetry_history = None
+        self._dirty_telemetry_keys = set()
+        self._raw_telemetry_dirty = False
+
+        # Só os indicadores leves são criados antes da primeira pintura; o mapa,
+        # os gráficos e as threads de fundo ficam para `finish_startup`
+        with self.profiler.phase("HUD (indicadores)"):
+            self.setup_ui_hud()
+        self.video_surface.installEventFilter(self)
+        # Garante a segunda fase mesmo se a janela não chegar a ser pintada
+        QTimer.singleShot(config.STARTUP_DEFERRED_MAX_WAIT_MS, self.finish_startup)
 
-        self.setup_ui_hud()
-        self.setup_threads()
-        
         self.simulation_timer = QTimer(self)
         self.simulation_timer.timeout.connect(self.update_simulation)
-        self.simulation_timer.start(50)
+
+        # A telemetria é apenas acumulada ao chegar; cada widget é redesenhado
+        # a partir do estado mais recente em sua própria taxa fixa
+        self.gauge_timer = QTimer(self)
+        self.gauge_timer.timeout.connect(self.refresh_gauges)
+        self.gauge_timer.start(int(1000 / config.GAUGE_REFRESH_HZ))
+
+        self.raw_telemetry_timer = QTimer(self)
+        self.raw_telemetry_timer.timeout.connect(self.refresh_raw_telemetry)
+        self.raw_telemetry_timer.start(int(1000 / config.RAW_TELEMETRY_REFRESH_HZ))
 
     def setup_ui_hud(self):
         central_widget = QWidget()
@@ -50,11 +80,8 @@ class MainWindow(QMainWindow):
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(20)
 
-        self.video_label = QLabel("Awaiting Video Stream...")
-        self.video_label.setObjectName("video_label")
-        self.video_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.video_label.setMinimumSize(640, 480)
-        self.main_layout.addWidget(self.video_label, 0, 0, 1, 1)
+        self.video_surface = VideoSurfaceWidget()
+        self.main_layout.addWidget(self.video_surface, 0, 0, 1, 1)
 
         hud_widget = QWidget()
         hud_widget.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
@@ -64,21 +91,22 @@ class MainWindow(QMainWindow):
 
         self.info_widget = TopLeftInfoWidget()
         self.compass_widget = HorizontalCompassWidget()
-        # --- Usa o novo MapContainerWidget ---
-        self.map_container = MapContainerWidget()
-        self.map_container.setFixedSize(300, 300)
+        self.map_container = None
         
         self.speedometer_widget = SpeedometerWidget()
         self.key_indicator = KeyIndicatorWidget()
         self.horizon_widget = ArtificialHorizonWidget()
         self.telemetry_widget = RawTelemetryWidget()
-
+        # Painel de estatísticas do vídeo, alternado com a tecla F3 (divide a célula com os gráficos, F4)
+        self.video_stats_widget = VideoStatsWidget()
+        self.video_stats_widget.hide()
+        self.plot_widget = None
         
         self.hud_layout.addWidget(self.info_widget, 0, 0, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         self.hud_layout.addWidget(self.telemetry_widget, 1, 0, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
 
         self.hud_layout.addWidget(self.compass_widget, 0, 1, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
-        self.hud_layout.addWidget(self.map_container, 0, 2, 2, 1, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignRight)
+        self.hud_layout.addWidget(self.video_stats_widget, 1, 1, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
 
         self.hud_layout.addWidget(self.speedometer_widget, 2, 0, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignLeft)
         self.hud_layout.addWidget(self.key_indicator, 2, 1, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter)
@@ -86,7 +114,57 @@ class MainWindow(QMainWindow):
 
         self.main_layout.addWidget(hud_widget, 0, 0, 1, 1)
 
+    def eventFilter(self, obj, event):
+        if obj is self.video_surface and event.type() == QEvent.Type.Paint and not self.started:
+            self.video_surface.removeEventFilter(self)
+            self.profiler.mark("primeira pintura")
+            # Volta ao loop de eventos para o frame chegar à tela antes da parte pesada
+            QTimer.singleShot(0, self.finish_startup)
+        return super().eventFilter(obj, event)
+
+    @pyqtSlot()
+    def finish_startup(self):
+        """Segunda fase da inicialização: widgets pesados e threads de fundo."""
+        if self.started:
+            return
+        self.started = True
+
+        with self.profiler.phase("histórico de telemetria"):
+            from timeseries import TimeSeriesStore
+            self.telemetry_history = TimeSeriesStore(config.PLOT_HISTORY_S * config.PLOT_MAX_RATE_HZ)
+
+        with self.profiler.phase("MapContainerWidget"):
+            self.map_container = MapContainerWidget()
+            self.map_container.setFixedSize(300, 300)
+            self.hud_layout.addWidget(self.map_container, 0, 2, 2, 1, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignRight)
+
+        with self.profiler.phase("TimeSeriesPlotWidget"):
+            # Gráficos de tendência da telemetria, alternados com a tecla F4
+            self.plot_widget = TimeSeriesPlotWidget(self.telemetry_history)
+            self.plot_widget.hide()
+            self.hud_layout.addWidget(self.plot_widget, 1, 1, Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignHCenter)
+
+        with self.profiler.phase("threads de fundo"):
+            self.setup_threads()
+
+        if self.simulate:
+            logger.info("Modo de simulacao: pose do mapa gerada pelas teclas WASD.")
+            self.simulation_timer.start(50)
+
+        self.profiler.mark("dashboard pronto")
+        logger.info(f"Dashboard pronto em {self.profiler.elapsed_ms():.0f} ms.")
+        if self.profiler.enabled:
+            # O OpenCV é importado pela thread de vídeo logo após o início: reporta um pouco depois
+            QTimer.singleShot(config.STARTUP_PROFILE_REPORT_DELAY_MS, self._report_startup_profile)
+
+    def _report_startup_profile(self):
+        self.profiler.uninstall_import_hook()
+        self.profiler.report()
+
     def setup_threads(self):
+        from background_workers import MqttWorker, VideoWorker, OdometryWorker, VisionWorker, LatestFrameSlot
+        from video_stats import VideoStatsCollector
+
         # MQTT
         self.mqtt_thread = QThread()
         self.mqtt_worker = MqttWorker()
@@ -94,19 +172,54 @@ class MainWindow(QMainWindow):
         self.mqtt_thread.started.connect(self.mqtt_worker.run)
         self.mqtt_worker.telemetry_received.connect(self.update_telemetry)
         self.mqtt_worker.connection_status.connect(self.info_widget.set_mqtt_status)
-        self.command_signal.connect(self.mqtt_worker.publish_command)
+        self.drive_scheduler = DriveCommandScheduler(self)
+        self.drive_scheduler.publish.connect(self.mqtt_worker.publish_command)
         self.stop_workers_signal.connect(self.mqtt_worker.stop)
         self.mqtt_thread.start()
 
+        # Odometria: recebe os mesmos lotes de telemetria, mas integra em sua própria thread
+        self.odometry_thread = QThread()
+        self.odometry_worker = OdometryWorker()
+        self.odometry_worker.moveToThread(self.odometry_thread)
+        if not self.simulate:
+            self.mqtt_worker.telemetry_received.connect(self.odometry_worker.process_batch)
+        self.odometry_worker.pose_updated.connect(self.on_odometry_update)
+        self.wheel_directions_signal.connect(self.odometry_worker.set_wheel_directions)
+        self.reset_odometry_signal.connect(self.odometry_worker.reset)
+        self.odometry_thread.start()
+
         # Vídeo
         self.video_thread = QThread()
         self.video_worker = VideoWorker()
         self.video_worker.moveToThread(self.video_thread)
         self.video_thread.started.connect(self.video_worker.run)
-        self.video_worker.new_frame.connect(self.update_video_frame)
+        self.video_worker.frame_ready.connect(self.update_video_frame)
         self.video_worker.video_status.connect(self.info_widget.set_video_status)
-        self.stop_workers_signal.connect(self.video_worker.stop)
+        self.video_surface.resized.connect(self.on_video_surface_resized)
+        self.video_worker.set_display_size(self.video_surface.width(), self.video_surface.height())
+        # Conexão direta: o loop de `run` não processa slots enfileirados
+        self.stop_workers_signal.connect(self.video_worker.stop, Qt.ConnectionType.DirectConnection)
+
+        # Visão: consome os frames já decodificados pela VideoWorker, em sua própria taxa
+        if self.vision:
+            self.video_worker.vision_slot = LatestFrameSlot()
+            self.vision_thread = QThread()
+            self.vision_worker = VisionWorker(self.video_worker.vision_slot)
+            self.vision_worker.moveToThread(self.vision_thread)
+            self.vision_thread.started.connect(self.vision_worker.run)
+            self.vision_worker.overlay_ready.connect(self.video_surface.set_overlay)
+            # Rastreamento do alvo (F6): gira o robô para manter a detecção centralizada
+            from tracking import TargetTracker
+            self.target_tracker = TargetTracker(self)
+            self.vision_worker.overlay_ready.connect(self.target_tracker.set_overlay)
+            self.target_tracker.setpoint.connect(self.apply_drive_setpoint)
+            # Bloqueante: espera a detecção em andamento e para o timer na thread dele
+            self.stop_workers_signal.connect(self.vision_worker.stop, Qt.ConnectionType.BlockingQueuedConnection)
+            self.vision_thread.start()
         self.video_thread.start()
+
+        self.video_stats = VideoStatsCollector(self.video_worker, self.video_surface, self)
+        self.video_stats.stats_updated.connect(self.video_stats_widget.set_stats)
         
         # Conecta o sinal do botão de reset
         self.map_container.map_widget.reset_map_signal.connect(self.on_reset_map)
@@ -131,16 +244,48 @@ class MainWindow(QMainWindow):
             self.robot_pose['x'] += distance * math.cos(angle_rad)
             self.robot_pose['y'] += distance * math.sin(angle_rad)
             self.map_container.map_widget.add_path_point(self.robot_pose['x'], self.robot_pose['y'])
+            scale = config.MAP_PIXELS_PER_METER
+            self.map_container.map_widget.add_coverage([self.robot_pose['x'] / scale], [self.robot_pose['y'] / scale])
         
         self.map_container.map_widget.update_robot_pose(self.robot_pose['x'], self.robot_pose['y'], self.robot_pose['angle'])
 
+    @pyqtSlot(object)
+    def on_odometry_update(self, update):
+        """Desenha a trajetória integrada pela OdometryWorker (metros -> unidades do mapa)."""
+        if update.epoch != self._odometry_epoch:
+            return
+        scale = config.MAP_PIXELS_PER_METER
+        map_widget = self.map_container.map_widget
+        for x, y in zip((update.xs * scale).tolist(), (update.ys * scale).tolist()):
+            map_widget.add_path_point(x, y)
+        map_widget.add_coverage(update.xs, update.ys)
+
+        pose = update.pose
+        self.odometry_pose = pose
+        self.robot_pose = {'x': pose.x * scale, 'y': pose.y * scale, 'angle': pose.heading_deg}
+        map_widget.update_robot_pose(self.robot_pose['x'], self.robot_pose['y'], pose.heading_deg)
+        self._dirty_telemetry_keys.add("odometry")
+
     @pyqtSlot()
     def on_reset_map(self):
-        logger.info("Resetando o mapa e a odometria simulada.")
+        logger.info("Resetando o mapa e a odometria.")
         self.robot_pose = {'x': 0.0, 'y': 0.0, 'angle': 0.0}
+        self.odometry_pose = None
+        self._odometry_epoch += 1
+        self.reset_odometry_signal.emit(self._odometry_epoch)
         self.map_container.map_widget.reset_map()
 
 
+    def export_coverage(self):
+        path = os.path.join(config.COVERAGE_EXPORT_DIR, time.strftime('coverage_%Y%m%d_%H%M%S.npz'))
+        try:
+            self.map_container.map_widget.export_coverage(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Falha ao exportar a camada de cobertura: {e}")
+            return
+        area = self.map_container.map_widget.coverage_item.grid.covered_area_m2
+        logger.info(f"Camada de cobertura exportada para {path} ({area:.2f} m² cobertos).")
+
     def send_movement_command(self):
         base_speed, turn_speed = 80, 70
         throttle, turn = 0, 0
@@ -151,100 +296,133 @@ class MainWindow(QMainWindow):
             
         left_speed = max(-100, min(100, throttle + turn))
         right_speed = max(-100, min(100, throttle - turn))
-        
+        self.apply_drive_setpoint(left_speed, right_speed)
+
+    @pyqtSlot(int, int)
+    def apply_drive_setpoint(self, left_speed, right_speed):
+        """Setpoint das rodas, vindo das teclas ou do rastreamento do alvo."""
         drive_payload = {"left": int(left_speed), "right": int(right_speed)}
-        
+        # O agendador decide quando publicar (taxa fixa, intervalo mínimo e heartbeat)
+        self.drive_scheduler.set_setpoint(drive_payload["left"], drive_payload["right"])
+
         if drive_payload != self.last_drive_payload:
-            self.command_signal.emit(config.TOPIC_COMMAND_DRIVE, json.dumps(drive_payload))
             self.last_drive_payload = drive_payload
+            # Os encoders não medem o sentido de rotação: a odometria usa o do comando
+            self.wheel_directions_signal.emit(_sign(left_speed), _sign(right_speed))
+
+    def toggle_center_panel(self, panel):
+        """Estatísticas do vídeo (F3) e gráficos (F4) dividem a mesma célula do HUD: um de cada vez."""
+        show = not panel.isVisible()
+        for other in (self.video_stats_widget, self.plot_widget):
+            if other is not panel:
+                other.hide()
+        panel.setVisible(show)
 
     def keyPressEvent(self, event):
-        if event.isAutoRepeat(): return
+        if event.isAutoRepeat() or not self.started: return
+        if event.key() == Qt.Key.Key_F3:
+            self.toggle_center_panel(self.video_stats_widget)
+            return
+        if event.key() == Qt.Key.Key_F4:
+            self.toggle_center_panel(self.plot_widget)
+            return
+        if event.key() == Qt.Key.Key_F5:
+            self.export_coverage()
+            return
+        if event.key() == Qt.Key.Key_F6:
+            if self.target_tracker is None:
+                logger.info("Rastreamento do alvo requer a deteccao no dashboard (--vision).")
+            else:
+                self.target_tracker.toggle()
+            return
         key_map = {Qt.Key.Key_W: 'W', Qt.Key.Key_A: 'A', Qt.Key.Key_S: 'S', Qt.Key.Key_D: 'D'}
         if event.key() in key_map:
+            # O comando manual sempre tem prioridade: qualquer tecla de direção desliga o rastreamento
+            if self.target_tracker is not None:
+                self.target_tracker.set_engaged(False)
             self.keys_pressed.add(key_map[event.key()])
             self.key_indicator.update_keys(self.keys_pressed)
             self.send_movement_command()
 
     def keyReleaseEvent(self, event):
-        if event.isAutoRepeat(): return
+        if event.isAutoRepeat() or not self.started: return
         key_map = {Qt.Key.Key_W: 'W', Qt.Key.Key_A: 'A', Qt.Key.Key_S: 'S', Qt.Key.Key_D: 'D'}
         if event.key() in key_map and key_map[event.key()] in self.keys_pressed:
             self.keys_pressed.remove(key_map[event.key()])
             self.key_indicator.update_keys(self.keys_pressed)
             self.send_movement_command()
 
-    @pyqtSlot(str, str)
-    def update_telemetry(self, topic, payload):
-        try:
+    @pyqtSlot(object)
+    def update_telemetry(self, batch):
+        """Recebe um lote já decodificado pela MqttWorker e apenas mescla o estado."""
+        self.telemetry_state.update(batch.latest_data)
+        self.latest_samples.update(batch.latest_samples)
+        self.telemetry_history.append_samples(batch.samples)
+        self._dirty_telemetry_keys.update(batch.latest_samples)
+        self._raw_telemetry_dirty = True
+        self.telemetry_widget.set_malformed_count(batch.malformed_total)
 
-            key = topic.split('/')[-1]
-            if key == '#':
-                key = topic.split('/')[-2]
-
-            data = json.loads(payload)
-
-            self.telemetry_state[key] = data
-
-            full_telemetry_str = json.dumps(self.telemetry_state, indent=2)
-            self.telemetry_widget.update_telemetry(full_telemetry_str)
-
-            if key == "battery":
-                voltage_mv = data.get('voltage_mv', 0.0)
-                voltage_v = voltage_mv / 1000.0
-                min_v, max_v = config.MIN_VOLTAGE, config.MAX_VOLTAGE
-                percent = int(100 * (voltage_v - min_v) / (max_v - min_v))
-                percent = max(0, min(100, percent))
-                self.info_widget.set_battery_value(voltage_v, percent)
-
-            elif key == "imu":
-                pitch = data.get('pitch', 0.0)
-                roll = data.get('roll', 0.0)
-                yaw = data.get('gyro_z', 0.0)
-                self.horizon_widget.set_angles(pitch, roll)
-                self.compass_widget.set_heading(yaw)
-
-            elif key == "encoders":
-                enc_l = data.get('left', 0)
-                enc_r = data.get('right', 0)
-                
-                rpm_l = enc_l * config.ENCODER_TO_RPM_K
-                rpm_r = enc_r * config.ENCODER_TO_RPM_K
-
-                robot_speed_rpm = (rpm_l + rpm_r) / 2.0
-                
-                self.speedometer_widget.set_speed(abs(robot_speed_rpm))
-
-        except (json.JSONDecodeError, IndexError):
-            pass 
-        except Exception as e:
-            logger.error(f"Erro inesperado em update_telemetry: {e}")
-
-    @pyqtSlot(np.ndarray)
-    def update_video_frame(self, frame):
-        try:
-            frame = cv2.flip(frame, -1)
-            h, w, ch = frame.shape
-            if h > 0 and w > 0:
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                bytes_per_line = ch * w
-                qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
-                self.video_label.setPixmap(pixmap.scaled(
-                    self.video_label.size(), 
-                    Qt.AspectRatioMode.KeepAspectRatio, 
-                    Qt.TransformationMode.SmoothTransformation
-                ))
-        except Exception as e:
-            logger.error(f"Erro ao atualizar frame de video: {e}")
+    @pyqtSlot()
+    def refresh_gauges(self):
+        """Atualiza os indicadores cujos tópicos receberam dados desde o último ciclo."""
+        if not self._dirty_telemetry_keys:
+            return
+        dirty_keys, self._dirty_telemetry_keys = self._dirty_telemetry_keys, set()
+
+        if "battery" in dirty_keys:
+            battery = self.latest_samples["battery"]
+            self.info_widget.set_battery_value(battery.voltage_v, battery.percent)
+
+        if "imu" in dirty_keys:
+            imu = self.latest_samples["imu"]
+            self.horizon_widget.set_angles(imu.pitch, imu.roll)
+            if self.simulate:
+                self.compass_widget.set_heading(imu.gyro_z)
+
+        if "odometry" in dirty_keys and self.odometry_pose is not None:
+            # A bússola cresce no sentido horário; a odometria, no anti-horário
+            self.compass_widget.set_heading((-self.odometry_pose.heading_deg) % 360)
+
+        if "encoders" in dirty_keys:
+            self.speedometer_widget.set_speed(abs(self.latest_samples["encoders"].speed_rpm))
+
+    @pyqtSlot()
+    def refresh_raw_telemetry(self):
+        """Re-serializa o estado para o painel de texto em baixa taxa, só se algo mudou."""
+        if not self._raw_telemetry_dirty:
+            return
+        self._raw_telemetry_dirty = False
+        full_telemetry_str = json.dumps(self.telemetry_state, indent=2)
+        self.telemetry_widget.update_telemetry(full_telemetry_str)
+
+    @pyqtSlot()
+    def update_video_frame(self):
+        """Exibe o frame mais recente, já convertido e redimensionado pela thread de vídeo."""
+        image = self.video_worker.frame_slot.take()
+        if image is not None:
+            self.video_surface.set_frame(image)
+
+    @pyqtSlot(int, int)
+    def on_video_surface_resized(self, width, height):
+        # Permite ao VideoWorker decodificar e converter já no tamanho da tela
+        self.video_worker.set_display_size(width, height)
 
     def closeEvent(self, event):
         logger.info("Fechando a aplicacao...")
         self.simulation_timer.stop()
+        self.gauge_timer.stop()
+        self.raw_telemetry_timer.stop()
+        if not self.started:
+            # Fechada antes da segunda fase: não há threads nem comandos pendentes
+            self.started = True
+            event.accept()
+            return
+        self.video_stats.stop()
         
         self.last_drive_payload = None 
-        stop_payload = {"left": 0, "right": 0}
-        self.command_signal.emit(config.TOPIC_COMMAND_DRIVE, json.dumps(stop_payload))
+        if self.target_tracker is not None:
+            self.target_tracker.stop()
+        self.drive_scheduler.stop()
         QThread.msleep(100)
 
         logger.info("Sinalizando threads de fundo para encerrar...")
@@ -254,7 +432,15 @@ class MainWindow(QMainWindow):
         self.mqtt_thread.wait(1000)
         self.video_thread.quit()
         self.video_thread.wait(1000)
+        self.odometry_thread.quit()
+        self.odometry_thread.wait(1000)
+        if self.vision_thread is not None:
+            self.vision_thread.quit()
+            self.vision_thread.wait(1000)
         
         logger.info("Threads encerradas. Saindo da aplicacao.")
         event.accept()
 
+
+def _sign(value):
+    return (value > 0) - (value < 0)
@@ -0,0 +1,87 @@
+import json
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import config
+
+class DriveCommandScheduler(QObject):
+    """
+    Agenda a publicação dos comandos de direção.
+
+    - Em movimento, o setpoint atual é republicado a DRIVE_COMMAND_HZ, de modo
+      que a perda de uma mensagem não deixa o robô preso no último comando
+      (o robot_client para os motores se os comandos deixarem de chegar).
+    - Mudanças de setpoint saem imediatamente, respeitando um intervalo mínimo
+      entre publicações; mudanças mais rápidas são agrupadas e só a última é enviada.
+    - Ao parar, o comando de parada é repetido algumas vezes; depois, em
+      repouso, só um heartbeat compacto é enviado a DRIVE_HEARTBEAT_HZ.
+    """
+    publish = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._setpoint = (0, 0)
+        self._seq = 0
+        self._stop_repeats_left = 0
+        self._last_drive_at = float('-inf')
+        self._last_message_at = float('-inf')
+        self.messages_sent = 0
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._tick)
+        self.timer.start(int(1000 / config.DRIVE_COMMAND_HZ))
+
+        # Dispara o setpoint adiado pelo intervalo mínimo
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.timeout.connect(self._send_drive)
+
+    def set_setpoint(self, left, right):
+        setpoint = (int(left), int(right))
+        if setpoint == self._setpoint:
+            return
+        self._setpoint = setpoint
+        if setpoint == (0, 0):
+            self._stop_repeats_left = config.DRIVE_STOP_REPEATS
+
+        wait_s = self._last_drive_at + config.DRIVE_MIN_INTERVAL_S - time.monotonic()
+        if wait_s <= 0:
+            self._send_drive()
+        elif not self._pending_timer.isActive():
+            self._pending_timer.start(int(wait_s * 1000) + 1)
+
+    def _tick(self):
+        now = time.monotonic()
+        if self._pending_timer.isActive():
+            return
+        if self._setpoint != (0, 0) or self._stop_repeats_left > 0:
+            if now - self._last_drive_at >= config.DRIVE_MIN_INTERVAL_S:
+                self._send_drive()
+        elif now - self._last_message_at >= 1.0 / config.DRIVE_HEARTBEAT_HZ:
+            self._send(config.TOPIC_COMMAND_HEARTBEAT, str(self._next_seq()))
+
+    def _send_drive(self):
+        self._pending_timer.stop()
+        left, right = self._setpoint
+        if (left, right) == (0, 0) and self._stop_repeats_left > 0:
+            self._stop_repeats_left -= 1
+        payload = json.dumps({"left": left, "right": right, "seq": self._next_seq()}, separators=(',', ':'))
+        self._send(config.TOPIC_COMMAND_DRIVE, payload)
+        self._last_drive_at = self._last_message_at
+
+    def _send(self, topic, payload):
+        self._last_message_at = time.monotonic()
+        self.messages_sent += 1
+        self.publish.emit(topic, payload)
+
+    def _next_seq(self):
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def stop(self):
+        """Para o agendamento e envia uma parada imediata (ao fechar o dashboard)."""
+        self.timer.stop()
+        self._pending_timer.stop()
+        self._setpoint = (0, 0)
+        self._send_drive()
@@ -1,16 +1,40 @@
+import time
+_START = time.perf_counter()
+
 import sys
-from PyQt6.QtWidgets import QApplication
+import argparse
 
-from dashboard_app import MainWindow
+import config
+from startup_profile import StartupProfiler
 
 if __name__ == "__main__":
-    
+    parser = argparse.ArgumentParser(description="Dashboard de controle do robô")
+    parser.add_argument("--simulate", action="store_true", default=config.ODOMETRY_SIMULATION,
+                        help="modo offline: simula a pose do mapa pelas teclas WASD em vez da odometria")
+    parser.add_argument("--vision", action="store_true", default=config.VISION_ENABLED,
+                        help="detecta os templates de vision/templates nos frames do vídeo e desenha as caixas no HUD")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="reporta o tempo de importação de cada módulo e de construção da interface")
+    args, qt_args = parser.parse_known_args()
+
+    profiler = StartupProfiler(_START, enabled=args.profile_startup)
+    if args.profile_startup:
+        profiler.install_import_hook()
+
+    with profiler.phase("import PyQt6"):
+        from PyQt6.QtWidgets import QApplication
+
     # Cria a instância da aplicação
-    app = QApplication(sys.argv)
-    
-    # Cria e exibe a janela principal
-    window = MainWindow()
+    with profiler.phase("QApplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+
+    with profiler.phase("import dashboard_app"):
+        from dashboard_app import MainWindow
+
+    # Cria e exibe a janela principal; o restante é construído após a primeira pintura
+    with profiler.phase("MainWindow"):
+        window = MainWindow(simulate=args.simulate, vision=args.vision, profiler=profiler)
     window.show()
-    
+
     # Inicia o loop de eventos da aplicação
     sys.exit(app.exec())
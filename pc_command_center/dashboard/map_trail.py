@@ -0,0 +1,152 @@
+import math
+import numpy as np
+
+from PyQt6.QtWidgets import QGraphicsPathItem
+from PyQt6.QtGui import QPainterPath
+
+from timeseries import polyline_from_arrays
+
+def simplify_polyline(points, tolerance):
+    """
+    Douglas-Peucker iterativo. Retorna uma máscara booleana dos pontos mantidos
+    (o primeiro e o último sempre são mantidos). As distâncias de cada trecho
+    são calculadas de forma vetorizada.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        interior = points[start + 1:end]
+        dx, dy = b - a
+        length = math.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(interior[:, 0] - a[0], interior[:, 1] - a[1])
+        else:
+            distances = np.abs(dx * (a[1] - interior[:, 1]) - dy * (a[0] - interior[:, 0])) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+class TrailChunk:
+    """Trecho do rastro com capacidade fixa e seu próprio item na cena."""
+    def __init__(self, capacity, pen):
+        self.points = np.zeros((capacity, 2), dtype=np.float64)
+        self.count = 0
+        self.item = QGraphicsPathItem()
+        self.item.setPen(pen)
+
+    def is_full(self):
+        return self.count >= len(self.points)
+
+    def append(self, x, y):
+        self.points[self.count] = (x, y)
+        self.count += 1
+
+    def replace_last(self, x, y):
+        self.points[self.count - 1] = (x, y)
+
+    def simplify(self, tolerance):
+        mask = simplify_polyline(self.points[:self.count], tolerance)
+        kept = self.points[:self.count][mask]
+        self.points = kept.copy()
+        self.count = len(kept)
+
+    def refresh_item(self):
+        path = QPainterPath()
+        if self.count:
+            pts = self.points[:self.count]
+            # A cena usa y invertido em relação à odometria
+            path.addPolygon(polyline_from_arrays(pts[:, 0], -pts[:, 1]))
+        self.item.setPath(path)
+
+
+class PathTrail:
+    """
+    Rastro do robô em trechos de tamanho fixo.
+
+    Pontos novos são descartados se estiverem muito próximos do anterior e,
+    se continuarem na mesma direção, apenas deslocam o último ponto. Só o
+    trecho mais recente é reconstruído a cada ponto; ao encher, ele é
+    simplificado (Douglas-Peucker) e congelado. Com `max_points`, os trechos
+    mais antigos são removidos da cena.
+    """
+    def __init__(self, scene, pen, chunk_size=256, min_distance=2.0,
+                 angle_tolerance_deg=2.0, simplify_tolerance=1.0, max_points=None):
+        self.scene = scene
+        self.pen = pen
+        self.chunk_size = chunk_size
+        self.min_distance = min_distance
+        self.angle_tolerance = math.radians(angle_tolerance_deg)
+        self.simplify_tolerance = simplify_tolerance
+        self.max_points = max_points
+        self.chunks = []
+
+    def total_points(self):
+        return sum(chunk.count for chunk in self.chunks)
+
+    def reset(self, x=0.0, y=0.0):
+        for chunk in self.chunks:
+            self.scene.removeItem(chunk.item)
+        self.chunks = []
+        self._new_chunk(x, y)
+
+    def _new_chunk(self, x, y):
+        chunk = TrailChunk(self.chunk_size, self.pen)
+        chunk.append(x, y)
+        # Fica abaixo do robô e de outras camadas do mapa
+        chunk.item.setZValue(-1)
+        self.scene.addItem(chunk.item)
+        self.chunks.append(chunk)
+        return chunk
+
+    def add_point(self, x, y):
+        """Adiciona um ponto da odometria; retorna False se ele foi descartado."""
+        chunk = self.chunks[-1]
+        last = chunk.points[chunk.count - 1]
+        dx, dy = x - last[0], y - last[1]
+        if math.hypot(dx, dy) < self.min_distance:
+            return False
+
+        if chunk.count >= 2:
+            prev = chunk.points[chunk.count - 2]
+            heading_last = math.atan2(last[1] - prev[1], last[0] - prev[0])
+            heading_new = math.atan2(dy, dx)
+            turn = abs((heading_new - heading_last + math.pi) % (2 * math.pi) - math.pi)
+            # Distância do último ponto à nova corda: limita o erro acumulado em curvas suaves
+            chord_x, chord_y = x - prev[0], y - prev[1]
+            chord = math.hypot(chord_x, chord_y)
+            deviation = abs(chord_x * (prev[1] - last[1]) - chord_y * (prev[0] - last[0])) / chord if chord else 0.0
+            if turn < self.angle_tolerance and deviation < self.simplify_tolerance:
+                # Mesma direção: estende o segmento em vez de criar outro ponto
+                chunk.replace_last(x, y)
+                chunk.refresh_item()
+                return True
+
+        if chunk.is_full():
+            chunk.simplify(self.simplify_tolerance)
+            chunk.refresh_item()
+            chunk = self._new_chunk(last[0], last[1])
+            self._enforce_cap()
+
+        chunk.append(x, y)
+        chunk.refresh_item()
+        return True
+
+    def _enforce_cap(self):
+        if not self.max_points:
+            return
+        while len(self.chunks) > 1 and self.total_points() > self.max_points:
+            oldest = self.chunks.pop(0)
+            self.scene.removeItem(oldest.item)
@@ -0,0 +1,200 @@
+import time
+import select
+import socket
+import logging
+from collections import deque
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class MjpegStreamClient:
+    """
+    Cliente HTTP mínimo para streams MJPEG (multipart/x-mixed-replace).
+
+    Mantém um único socket persistente e interpreta o multipart diretamente,
+    sem o buffer interno do demuxer do FFmpeg. A cada leitura, todos os bytes
+    já disponíveis no socket são consumidos e apenas o JPEG completo mais
+    recente é devolvido; os anteriores são contabilizados como descartados.
+
+    O header X-Timestamp-Us vem no relógio da Pi, que não precisa estar
+    sincronizado com o do PC: `capture_time_us` o converte para o relógio do
+    PC somando o menor (chegada - header) visto em CLOCK_OFFSET_WINDOW_S.
+    Esse mínimo é a diferença entre os relógios mais a latência do frame
+    mais rápido, então as idades medidas a partir dele começam perto de zero
+    e crescem com os atrasos da rede e do servidor. A janela acompanha a
+    deriva entre os relógios e um ajuste de hora em qualquer um dos lados.
+    """
+    RECV_SIZE = 256 * 1024
+    CLOCK_OFFSET_WINDOW_S = 30.0
+
+    def __init__(self, url, timeout=2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = parsed.path or '/'
+        if parsed.query:
+            self.path += '?' + parsed.query
+        self.timeout = timeout
+
+        self.sock = None
+        self.boundary = None
+        self._buffer = bytearray()
+        self._recv_wall_us = 0
+        self._offsets = deque()         # (chegada em s, chegada - header em us), com offsets crescentes
+
+        # Contadores acumulados (lidos pela thread de vídeo para estatísticas)
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+
+    def connect(self):
+        """Abre o socket, envia o GET e valida o cabeçalho da resposta."""
+        self.close()
+        self._offsets.clear()           # O servidor pode ter sido reiniciado com outro relógio
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        request = (f"GET {self.path} HTTP/1.1\r\n"
+                   f"Host: {self.host}:{self.port}\r\n"
+                   "Connection: keep-alive\r\n"
+                   "Cache-Control: no-cache\r\n\r\n")
+        self.sock.sendall(request.encode('ascii'))
+
+        header_end = self._buffer.find(b'\r\n\r\n')
+        while header_end < 0:
+            self._recv()
+            header_end = self._buffer.find(b'\r\n\r\n')
+
+        status_line, *header_lines = self._buffer[:header_end].decode('latin-1').split('\r\n')
+        del self._buffer[:header_end + 4]
+
+        parts = status_line.split(' ', 2)
+        if len(parts) < 2 or parts[1] != '200':
+            raise ConnectionError(f"Resposta inesperada do servidor de vídeo: {status_line}")
+
+        headers = self._parse_headers(header_lines)
+        content_type = headers.get('content-type', '')
+        if 'boundary=' not in content_type:
+            raise ConnectionError(f"Stream sem boundary multipart: {content_type}")
+        boundary = content_type.split('boundary=', 1)[1].split(';')[0].strip().strip('"')
+        if boundary.startswith('--'):
+            boundary = boundary[2:]
+        self.boundary = b'--' + boundary.encode('latin-1')
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self._buffer.clear()
+
+    def read_latest_frame(self):
+        """
+        Bloqueia até existir ao menos um JPEG completo e devolve
+        (jpeg_bytes, headers) do mais recente, descartando os mais antigos.
+        """
+        frame = self._extract_latest()
+        while frame is None:
+            self._recv()
+            frame = self._extract_latest()
+
+        # Drena o que já chegou ao socket para não ficar atrás do stream
+        while self._readable():
+            self._recv()
+            newer = self._extract_latest()
+            if newer is not None:
+                self.frames_dropped += 1
+                frame = newer
+        return frame
+
+    def capture_time_us(self, headers):
+        """X-Timestamp-Us convertido para o relógio de parede do PC (us), ou None sem o header."""
+        value = headers.get('x-timestamp-us')
+        if not value or not value.isdigit() or not self._offsets:
+            return None
+        return int(value) + self._offsets[0][1]
+
+    # --- Lógica interna ---
+
+    def _recv(self):
+        data = self.sock.recv(self.RECV_SIZE)
+        if not data:
+            raise ConnectionError("Servidor de vídeo encerrou a conexão.")
+        self._recv_wall_us = time.time_ns() // 1000
+        self.bytes_received += len(data)
+        self._buffer += data
+
+    def _track_clock_offset(self, headers):
+        """Mínimo deslizante de (chegada - header): partes vindas de leituras anteriores só superestimam."""
+        value = headers.get('x-timestamp-us')
+        if not value or not value.isdigit():
+            return
+        arrival_s = self._recv_wall_us / 1e6
+        offset = self._recv_wall_us - int(value)
+        offsets = self._offsets
+        while offsets and offsets[-1][1] >= offset:
+            offsets.pop()
+        offsets.append((arrival_s, offset))
+        while offsets[0][0] < arrival_s - self.CLOCK_OFFSET_WINDOW_S:
+            offsets.popleft()
+
+    def _readable(self):
+        readable, _, _ = select.select([self.sock], [], [], 0)
+        return bool(readable)
+
+    def _extract_latest(self):
+        """Percorre as partes completas do buffer e mantém só a última."""
+        buf = self._buffer
+        pos = 0
+        latest = None
+        while True:
+            start = buf.find(self.boundary, pos)
+            if start < 0:
+                break
+            header_end = buf.find(b'\r\n\r\n', start)
+            if header_end < 0:
+                break
+            header_lines = buf[start + len(self.boundary):header_end].decode('latin-1').split('\r\n')
+            headers = self._parse_headers(header_lines)
+            body_start = header_end + 4
+
+            length = headers.get('content-length')
+            if length is not None and length.isdigit():
+                body_end = body_start + int(length)
+                if body_end > len(buf):
+                    break
+                next_pos = body_end
+            else:
+                body_end = buf.find(self.boundary, body_start)
+                if body_end < 0:
+                    break
+                next_pos = body_end
+                while body_end > body_start and buf[body_end - 1] in b'\r\n':
+                    body_end -= 1
+
+            if latest is not None:
+                self.frames_dropped += 1
+            self._track_clock_offset(headers)
+            latest = (body_start, body_end, headers)
+            self.frames_received += 1
+            pos = next_pos
+
+        if latest is None:
+            if pos:
+                del buf[:pos]
+            return None
+
+        body_start, body_end, headers = latest
+        jpeg = bytes(buf[body_start:body_end])
+        del buf[:pos]
+        return jpeg, headers
+
+    @staticmethod
+    def _parse_headers(lines):
+        headers = {}
+        for line in lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return headers
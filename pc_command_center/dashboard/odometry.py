@@ -0,0 +1,143 @@
+import math
+import numpy as np
+
+import config
+
+# --- ODOMETRIA (ENCODERS + GIROSCÓPIO) ---
+# Convenção: x/y em metros, ângulo em graus no sentido anti-horário
+# (mesma convenção de MapWidget.update_robot_pose, com y para cima).
+
+class OdometryPose:
+    __slots__ = ('x', 'y', 'heading_deg', 'timestamp_us', 'received_at')
+
+    def __init__(self, x, y, heading_deg, timestamp_us, received_at):
+        self.x = x
+        self.y = y
+        self.heading_deg = heading_deg
+        self.timestamp_us = timestamp_us   # Relógio do robô (amostra de encoder mais recente)
+        self.received_at = received_at     # time.monotonic() da chegada no PC
+
+class OdometryUpdate:
+    """Resultado de um lote: trajetória integrada (arrays, em metros) e a pose final."""
+    __slots__ = ('xs', 'ys', 'pose', 'epoch')
+
+    def __init__(self, xs, ys, pose, epoch):
+        self.xs = xs
+        self.ys = ys
+        self.pose = pose
+        self.epoch = epoch
+
+
+class OdometryEngine:
+    """
+    Integra amostras de encoder e giroscópio em uma pose 2D.
+
+    Os encoders do ESP32 contam pulsos sem sentido de rotação, então o sinal
+    de cada roda vem do último comando de direção enviado (`set_wheel_directions`).
+    A velocidade de cada roda é a contagem dividida pelo intervalo que ela
+    cobre (~5 ms nas amostras do lote do robot_client, ENCODER_INTERVAL_S no
+    formato de uma contagem por mensagem) e a distância usa o intervalo
+    entre os timestamps do robô, o que tolera amostras perdidas. A direção vem de `heading_source`:
+
+    - "gyro_rate": gyro_z é velocidade angular (firmware, em rad/s × ODOMETRY_GYRO_SCALE)
+    - "gyro_heading": gyro_z já é o ângulo absoluto em graus (robot_mock.py)
+    - "encoders": diferença entre as rodas dividida pela bitola
+    """
+    def __init__(self, heading_source=None):
+        self.heading_source = heading_source or config.ODOMETRY_HEADING_SOURCE
+        self.meters_per_pulse = math.pi * config.WHEEL_DIAMETER_M / config.ENCODER_PPR
+        self.left_sign = 0
+        self.right_sign = 0
+        self.reset()
+
+    def reset(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = 0.0          # radianos
+        self._heading_offset = None # Para "gyro_heading": o ângulo inicial vira zero
+        self._last_ts_us = None
+        self._last_received_at = None
+
+    def set_wheel_directions(self, left_sign, right_sign):
+        self.left_sign = left_sign
+        self.right_sign = right_sign
+
+    def integrate(self, timestamps_us, received_at, left, right, gyro_z, interval_s):
+        """
+        Integra um lote de N amostras de encoder (arrays de mesmo tamanho).
+        `gyro_z` traz a leitura do giroscópio de cada amostra (NaN se não houver)
+        e `interval_s` o tempo em que os pulsos de cada uma foram contados.
+        Retorna (xs, ys) com a posição após cada amostra.
+        """
+        timestamps_us = np.asarray(timestamps_us, dtype=np.float64)
+        received_at = np.asarray(received_at, dtype=np.float64)
+        n = len(timestamps_us)
+        if n == 0:
+            empty = np.empty(0)
+            return empty, empty
+
+        dt = self._intervals(timestamps_us, received_at)
+        meters_per_s = self.meters_per_pulse / np.asarray(interval_s, dtype=np.float64)
+        v_left = self.left_sign * np.asarray(left, dtype=np.float64) * meters_per_s
+        v_right = self.right_sign * np.asarray(right, dtype=np.float64) * meters_per_s
+        distance = 0.5 * (v_left + v_right) * dt
+
+        headings = self._headings(np.asarray(gyro_z, dtype=np.float64), v_left, v_right, dt)
+        # Integração pelo ponto médio: usa a direção média de cada intervalo
+        previous = np.concatenate(([self.heading], headings[:-1]))
+        mid = previous + 0.5 * _wrap(headings - previous)
+
+        xs = self.x + np.cumsum(distance * np.cos(mid))
+        ys = self.y + np.cumsum(distance * np.sin(mid))
+        self.x, self.y, self.heading = float(xs[-1]), float(ys[-1]), float(headings[-1])
+        return xs, ys
+
+    def _intervals(self, timestamps_us, received_at):
+        """
+        Intervalo de cada amostra em segundos. Usa o relógio do robô; onde ele
+        falta ou anda para trás (reinício do ESP32), usa o horário de chegada.
+        Intervalos longos (perda de conexão) são limitados.
+        """
+        prev_ts = np.concatenate(([np.nan if self._last_ts_us is None else self._last_ts_us], timestamps_us[:-1]))
+        prev_rx = np.concatenate(([np.nan if self._last_received_at is None else self._last_received_at], received_at[:-1]))
+        dt = (timestamps_us - prev_ts) * 1e-6
+        fallback = received_at - prev_rx
+        dt = np.where(np.isfinite(dt) & (dt > 0), dt, fallback)
+        dt = np.nan_to_num(dt, nan=0.0)
+        np.clip(dt, 0.0, config.ODOMETRY_MAX_DT_S, out=dt)
+
+        valid = np.isfinite(timestamps_us)
+        if valid.any():
+            self._last_ts_us = timestamps_us[valid][-1]
+        self._last_received_at = received_at[-1]
+        return dt
+
+    def _headings(self, gyro_z, v_left, v_right, dt):
+        """Direção (rad) após cada amostra."""
+        source = self.heading_source
+        has_gyro = np.isfinite(gyro_z)
+
+        if source == "gyro_heading" and has_gyro.any():
+            absolute = np.radians(gyro_z)
+            if self._heading_offset is None:
+                self._heading_offset = absolute[has_gyro][0] - self.heading
+            # Amostras sem leitura do IMU repetem a última direção conhecida
+            headings = np.where(has_gyro, absolute - self._heading_offset, np.nan)
+            if not has_gyro[0]:
+                headings[0] = self.heading
+            index = np.where(np.isfinite(headings), np.arange(len(headings)), 0)
+            np.maximum.accumulate(index, out=index)
+            return headings[index]
+
+        rate = (v_right - v_left) / config.WHEEL_BASE_M
+        if source == "gyro_rate":
+            rate = np.where(has_gyro, gyro_z * config.ODOMETRY_GYRO_SCALE, rate)
+        return self.heading + np.cumsum(rate * dt)
+
+    def pose(self, timestamp_us, received_at):
+        return OdometryPose(self.x, self.y, math.degrees(self.heading), timestamp_us, received_at)
+
+
+def _wrap(angles):
+    """Normaliza ângulos (rad) para [-pi, pi)."""
+    return (angles + np.pi) % (2 * np.pi) - np.pi
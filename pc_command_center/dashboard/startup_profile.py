@@ -0,0 +1,86 @@
+import sys
+import time
+import builtins
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupProfiler:
+    """
+    Mede a inicialização do dashboard.
+
+    Sempre registra os marcos (primeira pintura, dashboard pronto) e as fases
+    de construção. Com `install_import_hook`, também mede o tempo de cada
+    módulo importado pela primeira vez (total e próprio, sem os imports
+    aninhados), no estilo de `python -X importtime`.
+    """
+    def __init__(self, t0=None, enabled=False):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.enabled = enabled
+        self.marks = []      # (nome, segundos desde t0)
+        self.phases = []     # (nome, segundos)
+        self.imports = {}    # módulo -> [total_s, próprio_s]
+        self._local = threading.local()   # Pilha de imports aninhados, por thread
+        self._original_import = None
+
+    def elapsed_ms(self):
+        return 1000.0 * (time.perf_counter() - self.t0)
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.t0))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    # --- TEMPO DE IMPORTAÇÃO POR MÓDULO ---
+    def install_import_hook(self):
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Só mede a primeira importação absoluta; as demais são consultas a sys.modules
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            entry = self.imports.setdefault(name, [0.0, 0.0])
+            entry[0] += total
+            entry[1] += total - nested
+
+    def report(self, top=15):
+        lines = ["Perfil de inicialização do dashboard:"]
+        for name, seconds in self.marks:
+            lines.append(f"  {name:<40} {1000 * seconds:8.1f} ms desde o início")
+        if self.phases:
+            lines.append("  Construção:")
+            for name, seconds in self.phases:
+                lines.append(f"    {name:<38} {1000 * seconds:8.1f} ms")
+        if self.imports:
+            lines.append(f"  Importações (top {top} por tempo total; próprio entre parênteses):")
+            ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+            for name, (total, own) in ranked:
+                lines.append(f"    {name:<38} {1000 * total:8.1f} ms ({1000 * own:.1f} ms)")
+        logger.info("\n".join(lines))
@@ -0,0 +1,142 @@
+import json
+import time
+
+import numpy as np
+
+import config
+
+# --- AMOSTRAS TIPADAS DE TELEMETRIA ---
+# Criadas na thread MQTT, já com as unidades convertidas, para que a GUI
+# apenas leia os valores prontos.
+
+class ImuSample:
+    __slots__ = ('pitch', 'roll', 'gyro_z', 'received_at')
+
+    def __init__(self, pitch, roll, gyro_z, received_at):
+        self.pitch = pitch
+        self.roll = roll
+        self.gyro_z = gyro_z
+        self.received_at = received_at
+
+class BatterySample:
+    __slots__ = ('voltage_v', 'percent', 'received_at')
+
+    def __init__(self, voltage_v, percent, received_at):
+        self.voltage_v = voltage_v
+        self.percent = percent
+        self.received_at = received_at
+
+class EncoderSample:
+    """
+    Pulsos contados em `interval_s`. Com o lote por amostra do robot_client,
+    `left`/`right` são as somas da janela (RPM do velocímetro e dos gráficos)
+    e `per_sample` guarda os arrays de cada amostra para a odometria.
+    """
+    __slots__ = ('left', 'right', 'interval_s', 'rpm_left', 'rpm_right', 'speed_rpm', 'timestamp_us',
+                 'received_at', 'per_sample')
+
+    def __init__(self, left, right, timestamp_us, received_at, interval_s=config.ENCODER_INTERVAL_S, per_sample=None):
+        self.left = left
+        self.right = right
+        self.interval_s = interval_s
+        to_rpm = 60.0 / (config.ENCODER_PPR * interval_s)
+        self.rpm_left = left * to_rpm
+        self.rpm_right = right * to_rpm
+        self.speed_rpm = (self.rpm_left + self.rpm_right) / 2.0
+        self.timestamp_us = timestamp_us
+        self.received_at = received_at
+        self.per_sample = per_sample
+
+class EncoderBatch:
+    """Arrays NumPy das amostras de uma janela, na ordem do ESP32 (intervalos em segundos)."""
+    __slots__ = ('seq', 'timestamp_us', 'interval_s', 'left', 'right', 'gyro_z')
+
+    def __init__(self, seq, timestamp_us, interval_s, left, right, gyro_z):
+        self.seq = seq
+        self.timestamp_us = timestamp_us
+        self.interval_s = interval_s
+        self.left = left
+        self.right = right
+        self.gyro_z = gyro_z
+
+
+def topic_key(topic):
+    """Último nível do tópico (ex: 'robot/tele/imu' -> 'imu')."""
+    key = topic.split('/')[-1]
+    if key == '#':
+        key = topic.split('/')[-2]
+    return key
+
+def battery_percent(voltage_v):
+    min_v, max_v = config.MIN_VOLTAGE, config.MAX_VOLTAGE
+    percent = int(100 * (voltage_v - min_v) / (max_v - min_v))
+    return max(0, min(100, percent))
+
+def parse_encoder_batch(data, received_at):
+    """
+    Converte o lote por amostra do robot_client ({"seq": [...], "timestamp_us": [...],
+    "left": [...], "right": [...], "gyro_z": [...], "window_us": N}) em um EncoderSample
+    com as somas da janela e os arrays de cada amostra em `per_sample`.
+    """
+    fields = ('seq', 'timestamp_us', 'left', 'right', 'gyro_z')
+    arrays = [np.asarray(data.get(field, ()), dtype=np.float64) for field in fields]
+    seq, timestamp_us, left, right, gyro_z = arrays
+    n = len(timestamp_us)
+    if n == 0 or any(a.shape != (n,) for a in arrays):
+        raise ValueError("arrays do lote vazios ou de tamanhos diferentes")
+    window_s = float(data.get('window_us', 0)) * 1e-6
+    if window_s <= 0:
+        raise ValueError("window_us deve ser positivo")
+
+    # Cada amostra cobre o tempo desde a anterior; a primeira, desde o fim da janela anterior
+    window_start_us = timestamp_us[-1] - window_s * 1e6
+    interval_s = np.diff(timestamp_us, prepend=window_start_us) * 1e-6
+    if not (interval_s > 0).all():
+        raise ValueError("timestamp_us fora de ordem no lote")
+    batch = EncoderBatch(seq, timestamp_us, interval_s, left, right, gyro_z)
+    return EncoderSample(int(left.sum()), int(right.sum()), int(timestamp_us[-1]), received_at,
+                         interval_s=window_s, per_sample=batch)
+
+def parse_telemetry_message(topic, payload):
+    """
+    Decodifica uma mensagem de telemetria.
+
+    Retorna (key, data, sample), onde `data` é o dicionário bruto e `sample`
+    a amostra tipada (None para tópicos sem conversão conhecida).
+    Lança ValueError se o payload estiver malformado.
+    """
+    key = topic_key(topic)
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError(f"Payload de '{topic}' nao e um objeto JSON")
+
+    now = time.monotonic()
+    try:
+        if key == "imu":
+            sample = ImuSample(float(data.get('pitch', 0.0)), float(data.get('roll', 0.0)),
+                               float(data.get('gyro_z', 0.0)), now)
+        elif key == "battery":
+            voltage_v = float(data.get('voltage_mv', 0.0)) / 1000.0
+            sample = BatterySample(voltage_v, battery_percent(voltage_v), now)
+        elif key == "encoders" and isinstance(data.get('left'), list):
+            sample = parse_encoder_batch(data, now)
+        elif key == "encoders":
+            # Formato de uma contagem por mensagem (robot_mock.py)
+            sample = EncoderSample(int(data.get('left', 0)), int(data.get('right', 0)),
+                                   data.get('timestamp_us'), now)
+        else:
+            sample = None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Campo invalido em '{topic}': {e}") from e
+    return key, data, sample
+
+
+class TelemetryBatch:
+    """Lote entregue à GUI: todas as amostras do período e o último valor de cada tópico."""
+    __slots__ = ('samples', 'latest_data', 'latest_samples', 'malformed_total')
+
+    def __init__(self):
+        self.samples = []          # Lista ordenada de (key, sample)
+        self.latest_data = {}      # key -> dicionário bruto mais recente
+        self.latest_samples = {}   # key -> amostra tipada mais recente
+        self.malformed_total = 0
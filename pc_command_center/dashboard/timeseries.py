@@ -0,0 +1,324 @@
+import numpy as np
+
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QPainter, QPixmap, QPolygonF
+
+# Campos de cada amostra tipada que podem ser plotados (canal = "topico.campo")
+PLOT_FIELDS = {
+    "imu": ("pitch", "roll", "gyro_z"),
+    "battery": ("voltage_v", "percent"),
+    "encoders": ("rpm_left", "rpm_right", "speed_rpm"),
+}
+
+class TimeSeriesBuffer:
+    """
+    Buffer circular pré-alocado (NumPy) de pares (tempo, valor).
+
+    Cada amostra é escrita duas vezes (posições i e i + capacidade), de modo
+    que a janela com as `count` amostras mais recentes é sempre uma fatia
+    contígua do array, obtida sem cópia.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._t = np.zeros(2 * capacity, dtype=np.float64)
+        self._v = np.zeros(2 * capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, t, v):
+        t = np.asarray(t, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        if len(t) > self.capacity:
+            t, v = t[-self.capacity:], v[-self.capacity:]
+        n = len(t)
+        if n == 0:
+            return
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._t[idx] = t
+        self._t[idx + self.capacity] = t
+        self._v[idx] = v
+        self._v[idx + self.capacity] = v
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def view(self):
+        """Retorna (t, v) em ordem cronológica, como views sem cópia."""
+        start = (self._head - self._count) % self.capacity
+        end = start + self._count
+        return self._t[start:end], self._v[start:end]
+
+    def last(self):
+        if not self._count:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self._t[i], self._v[i]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+class TimeSeriesStore:
+    """Conjunto de buffers por canal, alimentado pelos lotes de telemetria."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffers = {}
+
+    def channels(self):
+        return sorted(self.buffers)
+
+    def append_samples(self, samples):
+        """Agrupa as amostras (key, sample) por canal e grava cada canal de uma vez."""
+        grouped = {}
+        for key, sample in samples:
+            fields = PLOT_FIELDS.get(key)
+            if not fields:
+                continue
+            for field in fields:
+                times, values = grouped.setdefault(f"{key}.{field}", ([], []))
+                times.append(sample.received_at)
+                values.append(getattr(sample, field))
+
+        for channel, (times, values) in grouped.items():
+            buffer = self.buffers.get(channel)
+            if buffer is None:
+                buffer = self.buffers[channel] = TimeSeriesBuffer(self.capacity)
+            buffer.extend(times, values)
+
+    def clear(self):
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+
+def minmax_decimate(t, v, t0, t1, width):
+    """
+    Reduz as amostras da janela [t0, t1] a no máximo `width` colunas,
+    guardando o mínimo e o máximo de cada coluna (preserva picos).
+    Retorna (x_coluna, v_min, v_max), todos vetorizados.
+    """
+    lo = np.searchsorted(t, t0)
+    t, v = t[lo:], v[lo:]
+    if len(t) == 0 or t1 <= t0 or width <= 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    columns = ((t - t0) * (width / (t1 - t0))).astype(np.int64)
+    np.clip(columns, 0, width - 1, out=columns)
+    starts = np.concatenate(([0], np.flatnonzero(columns[1:] != columns[:-1]) + 1))
+    return columns[starts], np.minimum.reduceat(v, starts), np.maximum.reduceat(v, starts)
+
+
+def polyline_from_arrays(x, y):
+    """Cria um QPolygonF preenchendo sua memória diretamente a partir de arrays NumPy."""
+    polygon = QPolygonF()
+    n = len(x)
+    if n == 0:
+        return polygon
+    polygon.resize(n)
+    ptr = polygon.data()
+    ptr.setsize(n * 2 * 8)
+    points = np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
+
+
+
+class PlotLane:
+    """
+    Uma faixa do TimeSeriesPlotWidget com a curva guardada em um pixmap.
+
+    O tempo é dividido em colunas fixas de `column_px` pixels e só as
+    colunas já encerradas vão para o pixmap: quando entra uma coluna nova,
+    o pixmap rola para a esquerda e recebe apenas o trecho novo. As
+    TAIL_COLUMNS mais recentes, que ainda podem receber amostras atrasadas,
+    são desenhadas por cima a cada pintura. O min/max de cada coluna
+    encerrada fica em um anel, de onde sai a escala vertical; ela só muda
+    (e o pixmap é redesenhado por inteiro) quando a curva sai da faixa ou
+    passa a ocupar menos da metade dela. `phase` (fração de coluna) desloca
+    as bordas das colunas, para que faixas vizinhas não encerrem colunas na
+    mesma pintura.
+    """
+    TAIL_COLUMNS = 2
+    PAD_RATIO = 0.1         # Folga acima e abaixo da curva ao reescalar
+    SCALAR_COLUMNS = 8      # Até quantas colunas novas calcular sem a redução vetorizada
+
+    def __init__(self, pen, phase=0.0):
+        self.pen = pen
+        self.phase = phase
+        self.pixmap = None
+        self.range = None           # (mínimo, máximo) dos dados visíveis, para o rótulo
+        self.tail = QPolygonF()     # Colunas ainda abertas, em coordenadas do widget
+        self._key = None
+        self._stamp = None
+        self._end = None            # Última coluna encerrada (índice absoluto) já no pixmap
+        self._count = 0
+        self._low = self._high = None
+        self._ring_min = self._ring_max = None
+        self._ring_range = None     # (mínimo, máximo) das colunas encerradas
+        self._last_closed = None    # (coluna absoluta, máximo) da última coluna encerrada com amostras
+
+    def update(self, buffer, t1, window_s, rect, ratio, column_px):
+        """Atualiza o pixmap e a cauda até o instante `t1` para a faixa `rect` (coordenadas do widget)."""
+        width, height = int(rect.width() * ratio), int(rect.height() * ratio)
+        column = max(1, round(column_px * ratio))
+        closed = width // column - self.TAIL_COLUMNS
+        if closed <= 0 or height <= 0:
+            self.range, self.tail = None, QPolygonF()
+            return
+        column_s = window_s / (closed + self.TAIL_COLUMNS)
+        now_col = int(t1 / column_s - self.phase)
+        end = now_col - self.TAIL_COLUMNS
+        first = end - closed + 1
+
+        # Sem coluna nova nem amostra nova (canais lentos, como a bateria), nada muda
+        key = (width, height, column, window_s, ratio, rect.height())
+        stamp = (key, end, len(buffer), buffer.last())
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+
+        t, v = buffer.view()
+        if key != self._key or self._end is None or not first - 1 <= self._end <= end or len(buffer) < self._count:
+            self._key, self._ratio, self._lane_height, self._column = key, ratio, rect.height(), column
+            self._ring_min = np.full(closed, np.nan)
+            self._ring_max = np.full(closed, np.nan)
+            self._ring_range = self._last_closed = None
+            self.pixmap = QPixmap(width, height)
+            self._low = None
+            new_first = first
+        else:
+            new_first = self._end + 1
+        self._count = len(buffer)
+        previous = self._last_closed
+        new_columns = self._fill_ring(t, v, new_first, end, column_s) if new_first <= end else []
+        tail = self._columns(t, v, end + 1, now_col, column_s)
+        self._end = end
+
+        lows = [low for _, low, _ in tail]
+        highs = [high for _, _, high in tail]
+        if self._ring_range is not None:
+            lows.append(self._ring_range[0])
+            highs.append(self._ring_range[1])
+        if not lows:
+            self.range, self.tail, self._low = None, QPolygonF(), None
+            return
+        self.range = (min(lows), max(highs))
+
+        if self._rescale():
+            self._redraw(first, end)
+        elif new_first <= end:
+            # Rola o que já estava desenhado e acrescenta só as colunas novas (mesmo vazias, o tempo andou)
+            self.pixmap.scroll(-(end - new_first + 1) * column, 0, self.pixmap.rect())
+            painter = QPainter(self.pixmap)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            painter.fillRect(QRectF((new_first - first) * column, 0, width, height), Qt.GlobalColor.transparent)
+            if new_columns:
+                painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+                painter.setPen(self.pen)
+                painter.drawPolyline(self._polyline(new_columns, previous, first))
+            painter.end()
+
+        # Cauda: do último ponto encerrado até as colunas abertas
+        tail = [(end + 1 + i, low, high) for i, low, high in tail]
+        self.tail = self._polyline(tail, self._last_closed, first, rect)
+
+    def paint(self, painter, rect):
+        """Desenha a faixa atualizada por `update` no retângulo `rect` do widget."""
+        if self.range is None:
+            return
+        source = QRectF(self.pixmap.rect())
+        painter.drawPixmap(QRectF(rect.left(), rect.top(), source.width() / self._ratio, source.height() / self._ratio),
+                           self.pixmap, source)
+        painter.setPen(self.pen)
+        painter.drawPolyline(self.tail)
+
+    # --- Lógica interna ---
+
+    def _columns(self, t, v, first_col, last_col, column_s):
+        """(coluna, mínimo, máximo) das colunas com amostras entre first_col e last_col (poucas colunas)."""
+        edges = np.searchsorted(t, (np.arange(first_col, last_col + 2) + self.phase) * column_s).tolist()
+        columns = []
+        for i, (lo, hi) in enumerate(zip(edges, edges[1:])):
+            if hi > lo:
+                chunk = v[lo:hi]
+                columns.append((i, float(chunk.min()), float(chunk.max())))
+        return columns
+
+    def _fill_ring(self, t, v, first_col, last_col, column_s):
+        """Guarda o min/max das colunas encerradas [first_col, last_col] e retorna as que têm amostras."""
+        size = len(self._ring_min)
+        first_col = max(first_col, last_col - size + 1)
+        idx = np.arange(first_col, last_col + 1) % size
+        self._ring_min[idx] = np.nan
+        self._ring_max[idx] = np.nan
+        if last_col - first_col < self.SCALAR_COLUMNS:
+            # Caso comum (uma coluna por vez): reduções escalares custam menos que a versão vetorizada
+            columns = [(first_col + i, low, high) for i, low, high in self._columns(t, v, first_col, last_col, column_s)]
+        else:
+            t0, t1 = (first_col + self.phase) * column_s, (last_col + 1 + self.phase) * column_s
+            lo, hi = np.searchsorted(t, t0), np.searchsorted(t, t1)
+            cols, v_min, v_max = minmax_decimate(t[lo:hi], v[lo:hi], t0, t1, last_col - first_col + 1)
+            columns = list(zip((first_col + cols.astype(np.int64)).tolist(), v_min.tolist(), v_max.tolist()))
+        for col, low, high in columns:
+            self._ring_min[col % size] = low
+            self._ring_max[col % size] = high
+
+        valid = ~np.isnan(self._ring_min)
+        self._ring_range = (float(self._ring_min[valid].min()), float(self._ring_max[valid].max())) if valid.any() else None
+        if columns:
+            self._last_closed = (columns[-1][0], columns[-1][2])
+        return columns
+
+    def _rescale(self):
+        """Ajusta a escala com histerese; retorna True quando ela mudou."""
+        low, high = self.range
+        pad = self.PAD_RATIO * (high - low) or 0.5
+        if (self._low is not None and low >= self._low and high <= self._high
+                and high - low + 2 * pad >= 0.5 * (self._high - self._low)):
+            return False
+        self._low, self._high = low - pad, high + pad
+        return True
+
+    def _redraw(self, first, end):
+        """Redesenha todas as colunas encerradas no pixmap (após reescalar)."""
+        self.pixmap.fill(Qt.GlobalColor.transparent)
+        idx = np.arange(first, end + 1) % len(self._ring_min)
+        v_min, v_max = self._ring_min[idx], self._ring_max[idx]
+        present = np.flatnonzero(~np.isnan(v_min))
+        if not len(present):
+            return
+        # Dois pontos por coluna (min e max) formam uma única polilinha
+        xs = np.repeat(present * self._column, 2).astype(np.float64)
+        ys = np.empty(len(xs))
+        ys[0::2] = self._y(v_min[present])
+        ys[1::2] = self._y(v_max[present])
+        painter = QPainter(self.pixmap)
+        painter.setPen(self.pen)
+        painter.drawPolyline(polyline_from_arrays(xs, ys))
+        painter.end()
+
+    def _polyline(self, columns, start, first, rect=None):
+        """
+        Polilinha de poucas colunas (coluna, mínimo, máximo), ligada ao ponto
+        `start` (coluna, valor) se ele ainda estiver na janela. Em pixels do
+        pixmap ou, com `rect`, em coordenadas do widget.
+        """
+        left, top, ratio = (0.0, 0.0, 1.0) if rect is None else (rect.left(), rect.top(), self._ratio)
+        step = self._column / ratio
+        points = []
+        if start is not None and start[0] >= first:
+            points.append(QPointF(left + (start[0] - first) * step, top + self._y(start[1]) / ratio))
+        for col, low, high in columns:
+            x = left + (col - first) * step
+            points.append(QPointF(x, top + self._y(low) / ratio))
+            points.append(QPointF(x, top + self._y(high) / ratio))
+        return QPolygonF(points)
+
+    def _y(self, values):
+        """Valor -> y em pixels do dispositivo (base 2 px acima do fundo da faixa, topo 16 px abaixo do dela)."""
+        scale = (self._lane_height - 18) / (self._high - self._low)
+        return (self._lane_height - 2 - (values - self._low) * scale) * self._ratio
@@ -0,0 +1,206 @@
+import time
+import logging
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# --- CONTROLADOR DE RASTREAMENTO (MODO SENTINELA) ---
+# Convenção: erro horizontal em fração da largura da imagem exibida, positivo
+# com o alvo à direita do centro; giro positivo vira o robô para a direita,
+# como a tecla D em send_movement_command (setpoint: esquerda = +giro,
+# direita = -giro).
+
+class TrackingCommand:
+    __slots__ = ('turn', 'error', 'predicted_error', 'capture_age_s', 'detection_age_s')
+
+    def __init__(self, turn, error=None, predicted_error=None, capture_age_s=None, detection_age_s=None):
+        self.turn = turn
+        self.error = error                      # Erro medido na detecção
+        self.predicted_error = predicted_error  # Erro descontado o giro feito desde a captura
+        self.capture_age_s = capture_age_s      # Captura do frame -> comando
+        self.detection_age_s = detection_age_s  # Resultado da detecção -> comando
+
+
+class TrackingController:
+    """
+    Controlador proporcional que gira o robô para manter o alvo no centro.
+
+    A detecção descreve a cena no instante da captura, que chega com a idade
+    do vídeo mais a da detecção. Nesse meio-tempo o robô continuou girando
+    pelos comandos já enviados; sem descontar isso, o controlador corrige
+    de novo um erro que já foi corrigido e oscila. Por isso ele guarda o
+    histórico dos comandos de giro e subtrai do erro medido o giro estimado
+    entre a captura e agora (TRACKING_TURN_RATE_DEG_S por comando máximo,
+    convertido para a imagem pelo campo de visão da câmera), considerando
+    que cada comando só faz efeito TRACKING_COMMAND_DELAY_S depois.
+
+    Todos os tempos são do relógio de parede do PC (`time.time()`). O
+    timestamp de captura já chega convertido para ele pelo MjpegStreamClient,
+    que estima a diferença entre os relógios pela chegada dos frames, sem
+    depender de NTP; a idade da captura fica subestimada pela latência do
+    frame mais rápido da janela de estimativa (alguns ms no Wi-Fi local).
+    """
+    def __init__(self):
+        self.history = deque(maxlen=256)    # (instante em que o comando passa a valer, giro)
+
+    def reset(self):
+        self.history.clear()
+
+    def update(self, overlay, now):
+        """Calcula o giro para a detecção mais recente (`VisionOverlay` ou None)."""
+        target = overlay.detections[0] if overlay is not None and overlay.detections else None
+        if target is None or not overlay.capture_ts_us:
+            return self._command(TrackingCommand(0), now)
+
+        capture_s = overlay.capture_ts_us / 1e6
+        capture_age_s = now - capture_s
+        detection_age_s = time.monotonic() - overlay.received_at
+        if capture_age_s > config.TRACKING_MAX_AGE_S:
+            # Velha demais para agir: parar é mais seguro do que perseguir uma posição antiga
+            return self._command(TrackingCommand(0, capture_age_s=capture_age_s, detection_age_s=detection_age_s), now)
+
+        error = sum(u for u, _ in target.points) / len(target.points) - 0.5
+        rotated_deg = self._rotation_since(capture_s, now)
+        predicted = error - rotated_deg / config.CAMERA_HFOV_DEG
+
+        turn = 0
+        if abs(predicted) > config.TRACKING_DEADBAND:
+            turn = config.TRACKING_KP * predicted
+            # Abaixo de um mínimo os motores não vencem o atrito e o robô não gira
+            magnitude = min(max(abs(turn), config.TRACKING_MIN_TURN), config.TRACKING_MAX_TURN)
+            turn = int(round(magnitude if turn > 0 else -magnitude))
+        return self._command(TrackingCommand(turn, error, predicted, capture_age_s, detection_age_s), now)
+
+    def _command(self, command, now):
+        self.history.append((now + config.TRACKING_COMMAND_DELAY_S, command.turn))
+        return command
+
+    def _rotation_since(self, start, now):
+        """Giro estimado (graus, positivo para a direita) dos comandos em vigor entre `start` e `now`."""
+        rotated = 0.0
+        items = list(self.history)
+        for (begin, turn), (end, _) in zip(items, items[1:] + [(now, 0)]):
+            overlap = min(end, now) - max(begin, start)
+            if overlap > 0 and turn:
+                rotated += turn / 100.0 * config.TRACKING_TURN_RATE_DEG_S * overlap
+        return rotated
+
+
+class TargetTracker(QObject):
+    """
+    Roda o TrackingController em taxa fixa (TRACKING_COMMAND_HZ) sobre a
+    detecção mais recente da VisionWorker e emite o setpoint das rodas.
+
+    Cada comando vai para um CSV rotativo (TRACKING_LOG_CSV) com o tempo da
+    captura e da detecção até o comando e o erro de controle, para ajustar o
+    laço sobre o Wi-Fi real; ao desligar, um resumo vai para o log.
+    """
+    setpoint = pyqtSignal(int, int)
+    engaged_changed = pyqtSignal(bool)
+
+    CSV_FIELDS = ["time", "capture_age_ms", "detection_age_ms", "error", "predicted_error", "turn"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.controller = TrackingController()
+        self.engaged = False
+        self._overlay = None
+        self._csv = None
+        self._timestamp_warned = False
+        self._reset_stats()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._tick)
+
+    @pyqtSlot(object)
+    def set_overlay(self, overlay):
+        self._overlay = overlay
+
+    def set_engaged(self, engaged):
+        if engaged == self.engaged:
+            return
+        self.engaged = engaged
+        if engaged:
+            self.controller.reset()
+            self._timestamp_warned = False
+            self._reset_stats()
+            self._open_csv()
+            self.timer.start(int(1000 / config.TRACKING_COMMAND_HZ))
+            logger.info("Rastreamento do alvo ligado.")
+        else:
+            self.timer.stop()
+            self.setpoint.emit(0, 0)
+            self._log_summary()
+            if self._csv:
+                self._csv.close()
+                self._csv = None
+        self.engaged_changed.emit(engaged)
+
+    def toggle(self):
+        self.set_engaged(not self.engaged)
+
+    @pyqtSlot()
+    def _tick(self):
+        now = time.time()
+        command = self.controller.update(self._overlay, now)
+        self.setpoint.emit(command.turn, -command.turn)
+        self._check_timestamps(self._overlay)
+        if command.error is None:
+            return
+
+        self._commands += 1
+        self._capture_age_total_s += command.capture_age_s
+        self._detection_age_total_s += command.detection_age_s
+        self._squared_error_total += command.predicted_error ** 2
+        if self._csv:
+            try:
+                self._csv.write({
+                    "time": f"{time.time():.3f}",
+                    "capture_age_ms": f"{1000 * command.capture_age_s:.1f}",
+                    "detection_age_ms": f"{1000 * command.detection_age_s:.1f}",
+                    "error": f"{command.error:.4f}",
+                    "predicted_error": f"{command.predicted_error:.4f}",
+                    "turn": command.turn,
+                })
+            except OSError as e:
+                logger.error(f"Falha ao gravar o log de rastreamento: {e}")
+                self._csv = None
+
+    def _check_timestamps(self, overlay):
+        """Avisa uma vez por acionamento quando há alvo, mas falta o timestamp de captura para o controle."""
+        if self._timestamp_warned or overlay is None or not overlay.detections or overlay.capture_ts_us:
+            return
+        self._timestamp_warned = True
+        logger.warning("Rastreamento ligado, mas o robô fica parado: os frames chegam sem o header "
+                       "X-Timestamp-Us (video_server antigo ou backend \"ffmpeg\").")
+
+    def _open_csv(self):
+        if not config.TRACKING_LOG_CSV or self._csv:
+            return
+        from video_stats import RollingCsvWriter
+        try:
+            self._csv = RollingCsvWriter(config.TRACKING_LOG_CSV, self.CSV_FIELDS, config.VIDEO_STATS_CSV_MAX_BYTES)
+        except OSError as e:
+            logger.error(f"Nao foi possivel abrir o CSV de rastreamento: {e}")
+
+    def _reset_stats(self):
+        self._commands = 0
+        self._capture_age_total_s = 0.0
+        self._detection_age_total_s = 0.0
+        self._squared_error_total = 0.0
+
+    def _log_summary(self):
+        n = self._commands
+        if n == 0:
+            logger.info("Rastreamento do alvo desligado (nenhum comando com alvo visível).")
+            return
+        logger.info(f"Rastreamento do alvo desligado: {n} comandos com alvo; captura->comando "
+                    f"{1000 * self._capture_age_total_s / n:.0f} ms, deteccao->comando "
+                    f"{1000 * self._detection_age_total_s / n:.0f} ms, erro RMS {(self._squared_error_total / n) ** 0.5:.3f}.")
+
+    def stop(self):
+        self.set_engaged(False)
@@ -1,11 +1,429 @@
 import math
+import time
 import config
 from PyQt6.QtWidgets import (QWidget, QGraphicsView, QGraphicsScene,
-                             QGraphicsPathItem, QGraphicsPolygonItem, QLabel,
-                             QGridLayout, QPushButton, QTextEdit)
-from PyQt6.QtCore import pyqtSlot, Qt, QPointF, QRectF, QLineF, pyqtSignal
+                             QGraphicsPolygonItem, QLabel,
+                             QGridLayout, QPushButton, QTextEdit, QMenu)
+from PyQt6.QtCore import pyqtSlot, Qt, QPointF, QRectF, pyqtSignal, QRect, QTimer
 from PyQt6.QtGui import (QPen, QBrush, QColor, QPainterPath, QPolygonF,
-                         QPainter, QFont, QLinearGradient, QTransform)
+                         QPainter, QFont, QLinearGradient, QTransform, QPixmap)
+
+class VideoSurfaceWidget(QWidget):
+    """
+    Superfície de vídeo que pinta o QImage atual diretamente no paintEvent.
+
+    Substitui o QLabel.setPixmap: não cria um QPixmap por frame, reaproveita
+    o retângulo de destino enquanto o tamanho não muda e limita os repaints
+    à taxa de atualização do monitor. A escala suave só é usada enquanto há
+    folga entre o tempo de pintura e o intervalo entre frames.
+    """
+    SMOOTH_OFF_RATIO = 0.5     # Pintura acima de 50% do intervalo entre frames -> escala rápida
+    SMOOTH_ON_RATIO = 0.25     # Pintura abaixo de 25% do intervalo -> volta à escala suave
+
+    resized = pyqtSignal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(640, 480)
+        # A superfície pinta todos os seus pixels: o Qt não precisa limpar o fundo
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+        self.background = QColor("#0d1b2a")
+        self.placeholder_text = "Awaiting Video Stream..."
+        self.font_placeholder = QFont('Segoe UI', 12)
+
+        self._image = None
+        self._target_rect = None
+        self._smooth = True
+        self._paint_avg_s = 0.0
+        self._frame_interval_avg_s = 1.0 / 30
+        self._last_frame_time = None
+        self._last_paint_time = 0.0
+        self._min_repaint_interval_s = 1.0 / 60
+
+        # Contadores acumulados para as estatísticas do pipeline de vídeo
+        self.frames_painted = 0
+        self.paint_time_s = 0.0
+        self.frame_age_total_ms = 0.0
+        self.frame_age_samples = 0
+        self.local_latency_total_ms = 0.0
+        self.local_latency_samples = 0
+        self._painted_image = None
+
+        # Caixas da detecção de templates (VisionWorker), desenhadas sobre o frame
+        self._overlay = None
+        self.overlay_pen = QPen(QColor("#00ff00"), 3)
+        self.overlay_font = QFont('Segoe UI', 11, QFont.Weight.Bold)
+        self.alert_color = QColor("#ff3030")
+
+        self._pacing_timer = QTimer(self)
+        self._pacing_timer.setSingleShot(True)
+        self._pacing_timer.timeout.connect(self.update)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        screen = self.screen()
+        if screen and screen.refreshRate() > 0:
+            self._min_repaint_interval_s = 1.0 / screen.refreshRate()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._target_rect = None
+        self.resized.emit(self.width(), self.height())
+
+    def set_frame(self, image):
+        """Recebe o frame mais recente e agenda um repaint respeitando a taxa do monitor."""
+        now = time.perf_counter()
+        if self._last_frame_time is not None:
+            self._frame_interval_avg_s += 0.1 * ((now - self._last_frame_time) - self._frame_interval_avg_s)
+        self._last_frame_time = now
+
+        if self._image is None or self._image.size() != image.size():
+            self._target_rect = None
+        self._image = image
+
+        if self._pacing_timer.isActive():
+            return
+        wait_s = self._min_repaint_interval_s - (now - self._last_paint_time)
+        if wait_s <= 0:
+            self.update()
+        else:
+            self._pacing_timer.start(max(1, int(wait_s * 1000)))
+
+    def clear_frame(self):
+        self._image = None
+        self._target_rect = None
+        self.update()
+
+    def set_overlay(self, overlay):
+        """Recebe o resultado mais recente do detector; desenhado no próximo frame."""
+        had_boxes = self._overlay is not None and self._overlay.detections
+        self._overlay = overlay
+        # Sem vídeo chegando, só repinta se as caixas mudaram de fato
+        if overlay.detections or had_boxes:
+            self.update()
+
+    def _compute_target_rect(self):
+        """Retângulo centralizado que preserva a proporção do frame."""
+        image_size = self._image.size()
+        scaled = image_size.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        x = (self.width() - scaled.width()) // 2
+        y = (self.height() - scaled.height()) // 2
+        return QRect(x, y, scaled.width(), scaled.height())
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        self._last_paint_time = start
+        painter = QPainter(self)
+
+        if self._image is None:
+            painter.fillRect(self.rect(), self.background)
+            painter.setPen(QColor("#778da9"))
+            painter.setFont(self.font_placeholder)
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.placeholder_text)
+            return
+
+        if self._target_rect is None:
+            self._target_rect = self._compute_target_rect()
+        target = self._target_rect
+
+        # Só as faixas fora do frame precisam do fundo
+        if target != self.rect():
+            painter.fillRect(self.rect(), self.background)
+
+        if target.size() == self._image.size():
+            painter.drawImage(target.topLeft(), self._image)
+        else:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self._smooth)
+            painter.drawImage(target, self._image)
+        if self._overlay is not None and self._overlay.detections:
+            self._paint_overlay(painter, target)
+        painter.end()
+
+        paint_s = time.perf_counter() - start
+        self._update_scaling_mode(paint_s)
+        if self._image is not self._painted_image:
+            self._count_painted_frame(paint_s)
+
+    def _paint_overlay(self, painter, target):
+        if time.monotonic() - self._overlay.received_at > config.VISION_OVERLAY_TIMEOUT_S:
+            return
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.overlay_font)
+        names = []
+        for detection in self._overlay.detections:
+            polygon = QPolygonF([QPointF(target.x() + u * target.width(), target.y() + v * target.height())
+                                 for u, v in detection.points])
+            painter.setPen(self.overlay_pen)
+            painter.drawPolygon(polygon)
+            bounds = polygon.boundingRect()
+            painter.drawText(QPointF(bounds.left(), bounds.top() - 6), detection.template_id)
+            names.append(detection.template_id.upper())
+
+        painter.setPen(self.alert_color)
+        # Abaixo do centro, longe da bússola (topo) e do indicador de teclas (base)
+        alert_y = target.y() + int(target.height() * 0.7)
+        painter.drawText(QRect(target.x(), alert_y, target.width(), 30), Qt.AlignmentFlag.AlignHCenter,
+                         "ALERTA: " + ", ".join(names) + " DETECTADO!")
+
+    def _count_painted_frame(self, paint_s):
+        self._painted_image = self._image
+        self.frames_painted += 1
+        self.paint_time_s += paint_s
+        capture_ts_us = getattr(self._image, 'capture_ts_us', None)
+        if capture_ts_us:
+            self.frame_age_total_ms += time.time() * 1000.0 - capture_ts_us / 1000.0
+            self.frame_age_samples += 1
+        decoded_at = getattr(self._image, 'decoded_at', None)
+        if decoded_at is not None:
+            self.local_latency_total_ms += 1000.0 * (time.perf_counter() - decoded_at)
+            self.local_latency_samples += 1
+
+    def _update_scaling_mode(self, paint_s):
+        self._paint_avg_s += 0.1 * (paint_s - self._paint_avg_s)
+        ratio = self._paint_avg_s / max(self._frame_interval_avg_s, 1e-3)
+        if self._smooth and ratio > self.SMOOTH_OFF_RATIO:
+            self._smooth = False
+        elif not self._smooth and ratio < self.SMOOTH_ON_RATIO:
+            self._smooth = True
+
+
+class VideoStatsWidget(QWidget):
+    """Painel (alternável) com os contadores de cada etapa do pipeline de vídeo."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(280, 218)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+
+        self.lines = [("Aguardando estatísticas...", "")]
+        self.bottleneck = ""
+
+        self.font_main = QFont('Segoe UI', 10, QFont.Weight.Bold)
+        self.font_small = QFont('Consolas', 9)
+
+    def set_stats(self, stats):
+        age = stats.get("frame_age_ms")
+        self.lines = [
+            ("Recebido", f"{stats['kbytes_per_s']:.0f} kB/s"),
+            ("Decodificado", f"{stats['decoded_fps']:.1f} fps"),
+            ("Exibido", f"{stats['displayed_fps']:.1f} fps"),
+            ("Descartados rede/tela", f"{stats['dropped_network_per_s']:.0f} / {stats['dropped_display_per_s']:.0f} /s"),
+            ("Decodificação", f"{stats['decode_ms']:.1f} ms"),
+            ("Conversão", f"{stats['convert_ms']:.1f} ms"),
+            ("Pintura", f"{stats['paint_ms']:.2f} ms"),
+            ("Idade do frame", f"{age:.0f} ms" if age is not None else "n/d"),
+            ("Decodificado -> tela", f"{stats['local_latency_ms']:.1f} ms ({stats['backend']})"
+             if stats.get("local_latency_ms") is not None else "n/d"),
+        ]
+        self.bottleneck = stats.get("bottleneck", "")
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
+        painter.setPen(QPen(QColor(119, 141, 169, 150)))
+        painter.drawRoundedRect(self.rect(), 10, 10)
+
+        painter.setFont(self.font_main)
+        painter.setPen(QColor("#e0e1dd"))
+        painter.drawText(QRectF(15, 8, self.width() - 30, 20), Qt.AlignmentFlag.AlignVCenter, "Pipeline de Vídeo")
+
+        painter.setFont(self.font_small)
+        y = 32
+        for label, value in self.lines:
+            painter.setPen(QColor("#778da9"))
+            painter.drawText(QRectF(15, y, 160, 16), Qt.AlignmentFlag.AlignVCenter, label)
+            painter.setPen(QColor("#e0e1dd"))
+            painter.drawText(QRectF(150, y, self.width() - 165, 16),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, value)
+            y += 17
+
+        if self.bottleneck:
+            painter.setFont(self.font_main)
+            painter.setPen(QColor("#f39c12"))
+            painter.drawText(QRectF(15, self.height() - 26, self.width() - 30, 20),
+                             Qt.AlignmentFlag.AlignVCenter, f"Gargalo: {self.bottleneck}")
+
+
+class TimeSeriesPlotWidget(QWidget):
+    """
+    Painel de gráficos rolantes, um canal por faixa.
+
+    Os dados vêm de um TimeSeriesStore, reduzidos a min/max por coluna de
+    pixels. Cada faixa é um PlotLane, que guarda a curva em um pixmap e só
+    desenha as colunas novas; o fundo e as linhas de base ficam em uma
+    camada estática e os rótulos em outra, refeita a no máximo
+    PLOT_LABEL_REFRESH_HZ (mais rápido que isso os números nem são
+    legíveis). Assim a pintura custa basicamente o blit dos pixmaps e as
+    poucas colunas ainda abertas, e não depende do histórico.
+    Os canais são escolhidos pelo menu de contexto (botão direito).
+    """
+    LANE_COLORS = ["#1abc9c", "#f1c40f", "#e67e22", "#9b59b6", "#3498db", "#e74c3c"]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.setFixedSize(420, 240)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+
+        self.store = store
+        self.selected_channels = list(config.PLOT_DEFAULT_CHANNELS)
+        self.window_s = config.PLOT_WINDOW_S
+        self.last_paint_ms = 0.0
+
+        self.font_label = QFont('Segoe UI', 8, QFont.Weight.Bold)
+        self.font_small = QFont('Consolas', 8)
+        # Canetas criadas uma vez: a pintura roda a PLOT_REFRESH_HZ
+        self.lane_colors = [QColor(c) for c in self.LANE_COLORS]
+        self.lane_pens = [QPen(color, 0) for color in self.lane_colors]
+        self.grid_pen = QPen(QColor(119, 141, 169, 60), 1)
+        self.muted_color = QColor("#778da9")
+        self._static_layer = StaticLayerCache(self._render_static)
+
+        # Criado só na segunda fase da inicialização (NumPy)
+        from timeseries import PlotLane
+        self._lane_factory = PlotLane
+        self._lanes = []
+        self._lane_channels = []
+        self._labels = []               # (faixa, cor, rótulo, escala) desenhados na camada de rótulos
+        self._labels_at = 0.0
+        self._labels_layer = StaticLayerCache(self._render_labels)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self._refresh)
+        self.refresh_timer.start(int(1000 / config.PLOT_REFRESH_HZ))
+
+    def _refresh(self):
+        if self.isVisible():
+            self.update()
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        for channel in self.store.channels():
+            action = menu.addAction(channel)
+            action.setCheckable(True)
+            action.setChecked(channel in self.selected_channels)
+            action.toggled.connect(lambda checked, c=channel: self.set_channel_enabled(c, checked))
+        if menu.isEmpty():
+            menu.addAction("Sem canais de telemetria").setEnabled(False)
+        menu.exec(event.globalPos())
+
+    def set_channel_enabled(self, channel, enabled):
+        if enabled and channel not in self.selected_channels:
+            self.selected_channels.append(channel)
+        elif not enabled and channel in self.selected_channels:
+            self.selected_channels.remove(channel)
+        self.update()
+
+    def _lane_rects(self, count):
+        margin = 8
+        lane_height = (self.height() - 2 * margin) / count
+        return [QRectF(margin, margin + i * lane_height, self.width() - 2 * margin, lane_height) for i in range(count)]
+
+    def _render_static(self, painter, width, height):
+        painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
+        painter.setPen(QPen(QColor(119, 141, 169, 150)))
+        painter.drawRoundedRect(QRectF(0, 0, width, height), 10, 10)
+        painter.setPen(self.grid_pen)
+        for rect in self._lane_rects(len(self._lane_channels)) if self._lane_channels else []:
+            painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+
+    def _render_labels(self, painter, width, height):
+        for rect, color, label, scale in self._labels:
+            if scale:
+                painter.setFont(self.font_small)
+                painter.setPen(self.muted_color)
+                painter.drawText(QRectF(rect.left(), rect.top() + 2, rect.width() - 4, 14), Qt.AlignmentFlag.AlignRight, scale)
+            painter.setFont(self.font_label)
+            painter.setPen(color)
+            painter.drawText(QRectF(rect.left() + 4, rect.top() + 2, rect.width(), 14), Qt.AlignmentFlag.AlignLeft, label)
+
+    def _update_labels(self, channels, rects, now):
+        """Refaz a camada de rótulos se o intervalo passou (ou as faixas mudaram) e algum texto mudou."""
+        if now - self._labels_at < 1.0 / config.PLOT_LABEL_REFRESH_HZ and len(self._labels) == len(channels):
+            return
+        self._labels_at = now
+        labels = []
+        for i, (channel, lane, rect) in enumerate(zip(channels, self._lanes, rects)):
+            last = self.store.buffers[channel].last()
+            label = f"{channel}: {last[1]:.2f}" if last else channel
+            scale = f"{lane.range[0]:.1f} .. {lane.range[1]:.1f}" if lane.range is not None else ""
+            labels.append((rect, self.lane_colors[i % len(self.lane_colors)], label, scale))
+        if labels != self._labels:
+            self._labels = labels
+            self._labels_layer.invalidate()
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        channels = [c for c in self.selected_channels if c in self.store.buffers]
+        if channels != self._lane_channels:
+            # Faixas novas: cada uma refaz seu pixmap e a camada estática redesenha as linhas de base
+            self._lane_channels = channels
+            self._lanes = [self._lane_factory(self.lane_pens[i % len(self.lane_pens)], phase=i / len(channels))
+                           for i in range(len(channels))]
+            self._labels = []
+            self._static_layer.invalidate()
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer.pixmap(self))
+        # Sem antialiasing nas linhas: caneta cosmética (1 px) evita o stroker do Qt,
+        # que domina o custo de desenho com traços mais largos; o texto continua suavizado
+        if not channels:
+            painter.setPen(self.muted_color)
+            painter.setFont(self.font_label)
+            painter.drawText(QRectF(self.rect()), Qt.AlignmentFlag.AlignCenter, "Aguardando telemetria...")
+            return
+
+        t1 = time.monotonic()
+        ratio = self.devicePixelRatioF()
+        rects = self._lane_rects(len(channels))
+        for channel, lane, rect in zip(channels, self._lanes, rects):
+            lane.update(self.store.buffers[channel], t1, self.window_s, rect, ratio, config.PLOT_COLUMN_PX)
+            lane.paint(painter, rect)
+        self._update_labels(channels, rects, t1)
+        painter.drawPixmap(0, 0, self._labels_layer.pixmap(self))
+
+        self.last_paint_ms = 1000.0 * (time.perf_counter() - start)
+        painter.setFont(self.font_small)
+        painter.setPen(QColor(119, 141, 169, 150))
+        painter.drawText(QRectF(0, self.height() - 16, self.width() - 10, 14),
+                         Qt.AlignmentFlag.AlignRight, f"{self.last_paint_ms:.2f} ms")
+
+
+class StaticLayerCache:
+    """
+    Pixmap com a parte estática de um widget (fundo, escalas, rótulos).
+
+    É renderizada uma única vez por `render(painter, width, height)` e só é
+    reconstruída quando o tamanho ou a razão de pixels (DPI) do widget muda,
+    ou quando `invalidate` é chamado.
+    """
+    def __init__(self, render):
+        self._render = render
+        self._pixmap = None
+        self._key = None
+
+    def invalidate(self):
+        self._pixmap = None
+
+    def pixmap(self, widget, width=None, height=None):
+        width = widget.width() if width is None else width
+        height = widget.height() if height is None else height
+        ratio = widget.devicePixelRatioF()
+        key = (width, height, ratio)
+        if self._pixmap is None or key != self._key:
+            self._key = key
+            self._pixmap = QPixmap(max(1, int(width * ratio)), max(1, int(height * ratio)))
+            self._pixmap.setDevicePixelRatio(ratio)
+            self._pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(self._pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+            self._render(painter, width, height)
+            painter.end()
+        return self._pixmap
+
 
 class TopLeftInfoWidget(QWidget):
     """Um painel moderno que combina indicadores de status e bateria."""
@@ -22,18 +440,31 @@ class TopLeftInfoWidget(QWidget):
         self.font_main = QFont('Segoe UI', 10, QFont.Weight.Bold)
         self.font_small = QFont('Segoe UI', 8)
 
+        self.battery_rect = QRectF(15, 70, self.width() - 30, 15)
+        self._static_layer = StaticLayerCache(self._render_static)
+        self._battery_gradient = QLinearGradient(self.battery_rect.topLeft(), self.battery_rect.topRight())
+        self._battery_gradient.setColorAt(0.0, QColor("#e74c3c"))
+        self._battery_gradient.setColorAt(0.4, QColor("#f39c12"))
+        self._battery_gradient.setColorAt(0.7, QColor("#2ecc71"))
+
     @pyqtSlot(str)
     def set_mqtt_status(self, status):
+        if status == self.mqtt_status:
+            return
         self.mqtt_status = status
         self.update()
 
     @pyqtSlot(str)
     def set_video_status(self, status):
+        if status == self.video_status:
+            return
         self.video_status = status
         self.update()
 
     @pyqtSlot(float, int)
     def set_battery_value(self, voltage, percent):
+        if abs(voltage - self.battery_voltage) < config.HUD_VOLTAGE_EPSILON_V and percent == self.battery_percent:
+            return
         self.battery_voltage = voltage
         self.battery_percent = percent
         self.update()
@@ -43,13 +474,19 @@ class TopLeftInfoWidget(QWidget):
         if "Conectando" in status: return QColor("#f39c12")
         return QColor("#e74c3c")
 
+    def _render_static(self, painter, width, height):
+        painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
+        painter.setPen(QPen(QColor(119, 141, 169, 150)))
+        painter.drawRoundedRect(QRectF(0, 0, width, height), 10, 10)
+
+        painter.setPen(QPen(QColor("#778da9"), 2))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRoundedRect(self.battery_rect, 4, 4)
+
     def paintEvent(self, event):
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer.pixmap(self))
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
-        painter.setPen(QPen(QColor(119, 141, 169, 150)))
-        painter.drawRoundedRect(self.rect(), 10, 10)
         
         painter.setFont(self.font_main)
         
@@ -65,23 +502,13 @@ class TopLeftInfoWidget(QWidget):
         painter.setPen(QColor("#e0e1dd"))
         painter.drawText(QRectF(35, 40, 200, 20), Qt.AlignmentFlag.AlignVCenter, f"Vídeo: {self.video_status}")
 
-        battery_rect = QRectF(15, 70, self.width() - 30, 15)
-        
-        painter.setPen(QPen(QColor("#778da9"), 2))
-        painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.drawRoundedRect(battery_rect, 4, 4)
-        
+        battery_rect = self.battery_rect
         bar_margin = 2
         bar_width = (battery_rect.width() - 2 * bar_margin) * (self.battery_percent / 100.0)
         bar_rect = QRectF(battery_rect.x() + bar_margin, battery_rect.y() + bar_margin,
                           bar_width, battery_rect.height() - 2 * bar_margin)
         
-        gradient = QLinearGradient(battery_rect.topLeft(), battery_rect.topRight())
-        gradient.setColorAt(0.0, QColor("#e74c3c"))
-        gradient.setColorAt(0.4, QColor("#f39c12"))
-        gradient.setColorAt(0.7, QColor("#2ecc71"))
-        
-        painter.setBrush(QBrush(gradient))
+        painter.setBrush(QBrush(self._battery_gradient))
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawRoundedRect(bar_rect, 2, 2)
         
@@ -94,6 +521,8 @@ class TopLeftInfoWidget(QWidget):
 
 
 class ArtificialHorizonWidget(QWidget):
+    PITCH_SCALE = 3  # Pixels por grau de arfagem
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
@@ -101,58 +530,57 @@ class ArtificialHorizonWidget(QWidget):
         self.roll = 0.0
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
+        # Céu/solo com a escala de arfagem (move com pitch/roll) e a moldura
+        # fixa desenhada por cima (escala de rolagem, símbolo do robô)
+        self._horizon_layer = StaticLayerCache(self._render_horizon)
+        self._overlay_layer = StaticLayerCache(self._render_overlay)
+
     @pyqtSlot(float, float)
     def set_angles(self, pitch, roll):
+        if (abs(pitch - self.pitch) < config.HUD_ANGLE_EPSILON_DEG and
+                abs(roll - self.roll) < config.HUD_ANGLE_EPSILON_DEG):
+            return
         self.pitch = pitch
         self.roll = roll
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        width = self.width()
-        height = self.height()
-        center = QPointF(width / 2, height / 2)
-        radius = min(width, height) / 2 - 5
+    def _radius(self, width, height):
+        return min(width, height) / 2 - 5
 
-        painter.save()
-        
-        clip_path = QPainterPath()
-        clip_path.addEllipse(center, radius, radius)
-        painter.setClipPath(clip_path)
+    def _render_horizon(self, painter, width, height):
+        """Renderiza céu, solo e escala de arfagem centrados no pixmap (3x o widget)."""
+        radius = self._radius(self.width(), self.height())
+        painter.translate(width / 2, height / 2)
+        w, h = width / 3, height / 3
 
-        painter.translate(center)
-        painter.rotate(-self.roll)
-        
-        pitch_offset = self.pitch * 3
-        painter.translate(0, pitch_offset)
-
-        sky_gradient = QLinearGradient(0, -height, 0, 0)
+        sky_gradient = QLinearGradient(0, -h, 0, 0)
         sky_gradient.setColorAt(0, QColor("#87CEEB"))
         sky_gradient.setColorAt(1, QColor("#4682B4"))
-        ground_gradient = QLinearGradient(0, 0, 0, height)
+        ground_gradient = QLinearGradient(0, 0, 0, h)
         ground_gradient.setColorAt(0, QColor("#8B4513"))
         ground_gradient.setColorAt(1, QColor("#A0522D"))
 
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(QBrush(sky_gradient))
-        painter.drawRect(int(-width * 1.5), int(-height * 1.5), int(width * 3), int(height * 1.5))
+        painter.drawRect(int(-w * 1.5), int(-h * 1.5), int(w * 3), int(h * 1.5))
         painter.setBrush(QBrush(ground_gradient))
-        painter.drawRect(int(-width * 1.5), 0, int(width * 3), int(height * 1.5))
+        painter.drawRect(int(-w * 1.5), 0, int(w * 3), int(h * 1.5))
 
         painter.setPen(QPen(Qt.GlobalColor.white, 2))
         painter.setFont(QFont('Segoe UI', 8))
         for angle in range(-90, 91, 10):
             if angle == 0: continue
-            y_pos = int(-angle * 3) 
+            y_pos = int(-angle * self.PITCH_SCALE)
             line_width = int(radius / 4)
             painter.drawLine(int(-line_width), y_pos, int(line_width), y_pos)
             painter.drawText(QRectF(int(line_width + 5), y_pos - 8, 30, 16), Qt.AlignmentFlag.AlignLeft, str(abs(angle)))
             painter.drawText(QRectF(int(-line_width - 35), y_pos - 8, 30, 16), Qt.AlignmentFlag.AlignRight, str(abs(angle)))
         
         painter.drawLine(int(-radius * 1.5), 0, int(radius * 1.5), 0)
-        
-        painter.restore()
+
+    def _render_overlay(self, painter, width, height):
+        center = QPointF(width / 2, height / 2)
+        radius = self._radius(width, height)
 
         painter.setPen(QPen(QColor(119, 141, 169, 150), 2))
         painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
@@ -181,7 +609,33 @@ class ArtificialHorizonWidget(QWidget):
         painter.drawLine(int(center.x() + 10), int(center.y()), int(center.x() + 50), int(center.y()))
         painter.drawEllipse(center, 3, 3)
 
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        width = self.width()
+        height = self.height()
+        center = QPointF(width / 2, height / 2)
+        radius = self._radius(width, height)
+
+        horizon = self._horizon_layer.pixmap(self, width * 3, height * 3)
+
+        painter.save()
+        clip_path = QPainterPath()
+        clip_path.addEllipse(center, radius, radius)
+        painter.setClipPath(clip_path)
+        painter.translate(center)
+        painter.rotate(-self.roll)
+        painter.translate(0, self.pitch * self.PITCH_SCALE)
+        painter.drawPixmap(QPointF(-width * 1.5, -height * 1.5), horizon)
+        painter.restore()
+
+        painter.drawPixmap(0, 0, self._overlay_layer.pixmap(self))
+
 class SpeedometerWidget(QWidget):
+    START_ANGLE_DEG = 210
+    END_ANGLE_DEG = -30
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(200, 200)
@@ -189,21 +643,24 @@ class SpeedometerWidget(QWidget):
         self.max_speed = config.SPEEDOMETER_MAX_RPM
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
+        self.font_value = QFont('Segoe UI', 18, QFont.Weight.Bold)
+        self._static_layer = StaticLayerCache(self._render_static)
+
     @pyqtSlot(float)
     def set_speed(self, speed):
-        self.speed = max(0, min(speed, self.max_speed))
+        speed = max(0, min(speed, self.max_speed))
+        if abs(speed - self.speed) < config.HUD_SPEED_EPSILON_RPM:
+            return
+        self.speed = speed
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        width = self.width(); height = self.height()
+    def _render_static(self, painter, width, height):
         center = QPointF(width / 2, height / 2)
         radius = min(width, height) / 2 - 10
         painter.setPen(QPen(QColor(119, 141, 169, 150), 2)); painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
         painter.drawEllipse(center, radius, radius)
         arc_rect = QRectF(center.x() - radius + 8, center.y() - radius + 8, (radius - 8)*2, (radius - 8)*2)
-        start_angle_deg = 210; total_span_deg = 240
+        start_angle_deg = self.START_ANGLE_DEG; total_span_deg = 240
         painter.setPen(QPen(QColor("#2ecc71"), 8))
         painter.drawArc(arc_rect, start_angle_deg * 16, int(-total_span_deg * 0.4) * 16)
         painter.setPen(QPen(QColor("#f39c12"), 8))
@@ -211,7 +668,7 @@ class SpeedometerWidget(QWidget):
         painter.setPen(QPen(QColor("#e74c3c"), 8))
         painter.drawArc(arc_rect, int(start_angle_deg - total_span_deg * 0.7) * 16, int(-total_span_deg * 0.3) * 16)
         painter.setPen(QPen(Qt.GlobalColor.white)); painter.setFont(QFont('Segoe UI', 10))
-        end_angle_deg = -30
+        end_angle_deg = self.END_ANGLE_DEG
         for i in range(int(self.max_speed / 10) + 1):
             angle = start_angle_deg - (i * (start_angle_deg - end_angle_deg) / (self.max_speed / 10))
             rad = math.radians(angle)
@@ -221,7 +678,17 @@ class SpeedometerWidget(QWidget):
             if i % 2 == 0:
                 tx = center.x() + (radius - 35) * math.cos(rad); ty = center.y() - (radius - 35) * math.sin(rad)
                 painter.drawText(QRectF(tx - 15, ty - 10, 30, 20), Qt.AlignmentFlag.AlignCenter, str(i * 10))
-        needle_angle_deg = start_angle_deg - (self.speed / self.max_speed) * (start_angle_deg - end_angle_deg)
+        painter.setFont(QFont('Segoe UI', 10)); painter.setPen(QPen(Qt.GlobalColor.white))
+        painter.drawText(QRectF(center.x() - 50, center.y() + 45, 100, 20), Qt.AlignmentFlag.AlignCenter, "RPM")
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer.pixmap(self))
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        width = self.width(); height = self.height()
+        center = QPointF(width / 2, height / 2)
+        radius = min(width, height) / 2 - 10
+        needle_angle_deg = self.START_ANGLE_DEG - (self.speed / self.max_speed) * (self.START_ANGLE_DEG - self.END_ANGLE_DEG)
         painter.save(); painter.translate(center); painter.rotate(90 - needle_angle_deg)
         painter.setPen(Qt.PenStyle.NoPen); painter.setBrush(QColor("#e0e1dd"))
         needle = QPolygonF([QPointF(0, -radius + 15), QPointF(-4, 0), QPointF(4, 0)])
@@ -229,83 +696,127 @@ class SpeedometerWidget(QWidget):
         painter.restore()
         painter.setBrush(QColor("#778da9")); painter.setPen(Qt.PenStyle.NoPen)
         painter.drawEllipse(center, 15, 15)
-        painter.setFont(QFont('Segoe UI', 18, QFont.Weight.Bold)); painter.setPen(QPen(Qt.GlobalColor.white))
+        painter.setFont(self.font_value); painter.setPen(QPen(Qt.GlobalColor.white))
         painter.drawText(QRectF(center.x() - 50, center.y() + 20, 100, 30), Qt.AlignmentFlag.AlignCenter, f"{self.speed:.1f}")
-        painter.setFont(QFont('Segoe UI', 10))
-        painter.drawText(QRectF(center.x() - 50, center.y() + 45, 100, 20), Qt.AlignmentFlag.AlignCenter, "RPM")
 
 
 class HorizontalCompassWidget(QWidget):
+    PIXELS_PER_DEGREE = 4
+    TAPE_MARGIN_DEG = 60       # Margem da fita além de 0..360 para cobrir a janela visível
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(400, 80)
         self.heading = 0.0
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
+        self.font_value = QFont('Segoe UI', 14, QFont.Weight.Bold)
+        self.tape_height = self.height() - 30
+        self._static_layer = StaticLayerCache(self._render_static)
+        # Fitas pré-renderizadas de -60° a 420°: a cada atualização só o deslocamento muda
+        self._ticks_layer = StaticLayerCache(self._render_ticks)
+        self._labels_layer = StaticLayerCache(self._render_labels)
+
     @pyqtSlot(float)
     def set_heading(self, heading):
+        if abs(heading - self.heading) < config.HUD_ANGLE_EPSILON_DEG:
+            return
         self.heading = heading
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def _tape_width(self):
+        return (360 + 2 * self.TAPE_MARGIN_DEG) * self.PIXELS_PER_DEGREE
 
-        width = self.width()
-        height = self.height()
-        center_x = width / 2
-        tape_height = height - 30 
+    def _tape_x(self, angle):
+        return (angle + self.TAPE_MARGIN_DEG) * self.PIXELS_PER_DEGREE
 
-        background_rect = QRectF(0, 0, width, tape_height)
+    def _render_static(self, painter, width, height):
+        tape_height = self.tape_height
+        center_x = width / 2
         painter.setBrush(QBrush(QColor(27, 38, 59, 180)))
         painter.setPen(QPen(QColor(119, 141, 169, 150)))
-        painter.drawRoundedRect(background_rect, 10, 10)
+        painter.drawRoundedRect(QRectF(0, 0, width, tape_height), 10, 10)
 
-        painter.save()
-        painter.setClipRect(background_rect.adjusted(5, 5, -5, -5))
+        text_rect = QRectF(center_x - 35, tape_height + 2, 70, 25)
+        painter.setBrush(QBrush(QColor(13, 27, 42, 200)))
+        painter.setPen(QPen(QColor(119, 141, 169, 150)))
+        painter.drawRoundedRect(text_rect, 5, 5)
 
-        painter.setFont(QFont('Segoe UI', 10))
+    def _render_ticks(self, painter, width, height):
+        tape_height = self.tape_height
         painter.setPen(QPen(Qt.GlobalColor.white))
-        pixels_per_degree = 4
-
-        for angle in range(int(self.heading) - 50, int(self.heading) + 51):
+        for angle in range(-self.TAPE_MARGIN_DEG, 360 + self.TAPE_MARGIN_DEG + 1):
             angle_norm = angle % 360
-            x_pos = center_x - (self.heading - angle) * pixels_per_degree
-
+            x_pos = self._tape_x(angle)
             if angle_norm % 10 == 0:
                 painter.drawLine(int(x_pos), int(tape_height * 0.5), int(x_pos), int(tape_height * 0.8))
-                if abs(x_pos - center_x) > 25:
-                    if angle_norm % 90 == 0:
-                        painter.setFont(QFont('Segoe UI', 11, QFont.Weight.Bold))
-                        cardinals = {0: "N", 90: "E", 180: "S", 270: "W"}
-                        painter.setPen(QColor("#e74c3c") if angle_norm == 0 else Qt.GlobalColor.white)
-                        painter.drawText(QRectF(x_pos - 15, 5, 30, 20), Qt.AlignmentFlag.AlignCenter, cardinals[angle_norm])
-                    else:
-                        painter.setFont(QFont('Segoe UI', 9, QFont.Weight.Normal))
-                        painter.setPen(Qt.GlobalColor.white)
-                        painter.drawText(QRectF(x_pos - 15, 8, 30, 15), Qt.AlignmentFlag.AlignCenter, str(angle_norm))
             elif angle_norm % 5 == 0:
                 painter.drawLine(int(x_pos), int(tape_height * 0.5), int(x_pos), int(tape_height * 0.65))
-        
+
+    def _render_labels(self, painter, width, height):
+        cardinals = {0: "N", 90: "E", 180: "S", 270: "W"}
+        for angle in range(-self.TAPE_MARGIN_DEG, 360 + self.TAPE_MARGIN_DEG + 1, 10):
+            angle_norm = angle % 360
+            x_pos = self._tape_x(angle)
+            if angle_norm % 90 == 0:
+                painter.setFont(QFont('Segoe UI', 11, QFont.Weight.Bold))
+                painter.setPen(QColor("#e74c3c") if angle_norm == 0 else Qt.GlobalColor.white)
+                painter.drawText(QRectF(x_pos - 15, 5, 30, 20), Qt.AlignmentFlag.AlignCenter, cardinals[angle_norm])
+            else:
+                painter.setFont(QFont('Segoe UI', 9, QFont.Weight.Normal))
+                painter.setPen(Qt.GlobalColor.white)
+                painter.drawText(QRectF(x_pos - 15, 8, 30, 15), Qt.AlignmentFlag.AlignCenter, str(angle_norm))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width = self.width()
+        tape_height = self.tape_height
+        center_x = width / 2
+        heading = self.heading % 360
+
+        painter.drawPixmap(0, 0, self._static_layer.pixmap(self))
+
+        tape_width = self._tape_width()
+        offset_x = center_x - self._tape_x(heading)
+        clip_rect = QRectF(0, 0, width, tape_height).adjusted(5, 5, -5, -5)
+
+        painter.save()
+        painter.setClipRect(clip_rect)
+        painter.drawPixmap(QPointF(offset_x, 0), self._ticks_layer.pixmap(self, tape_width, tape_height))
+
+        # Rótulos copiados um a um da fita, omitindo os próximos ao marcador central
+        labels = self._labels_layer.pixmap(self, tape_width, tape_height)
+        ratio = labels.devicePixelRatio()
+        first_angle = math.ceil((heading - 50) / 10) * 10
+        for angle in range(first_angle, int(heading) + 51, 10):
+            x_pos = center_x - (heading - angle) * self.PIXELS_PER_DEGREE
+            if abs(x_pos - center_x) > 25:
+                source_x = self._tape_x(angle) - 15
+                painter.drawPixmap(QRectF(x_pos - 15, 0, 30, tape_height), labels,
+                                   QRectF(source_x * ratio, 0, 30 * ratio, tape_height * ratio))
         painter.restore()
+
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.setPen(QPen(QColor("#f1c40f"), 2))
         painter.drawLine(QPointF(center_x, 5), QPointF(center_x, tape_height - 5))
         
         text_rect = QRectF(center_x - 35, tape_height + 2, 70, 25)
-        painter.setBrush(QBrush(QColor(13, 27, 42, 200)))
-        painter.setPen(QPen(QColor(119, 141, 169, 150)))
-        painter.drawRoundedRect(text_rect, 5, 5)
-
-        painter.setFont(QFont('Segoe UI', 14, QFont.Weight.Bold))
+        painter.setFont(self.font_value)
         painter.setPen(Qt.GlobalColor.white)
-        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, f"{self.heading % 360:.0f}°")
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, f"{heading:.0f}°")
 
 class MapWidget(QGraphicsView):
     reset_map_signal = pyqtSignal()
 
+    GRID_SIZE = 50
+    # Cena "infinita": evita que o centerOn seja limitado pelo retângulo dos itens
+    # e que a cena recalcule esse retângulo a cada ponto novo do rastro
+    SCENE_EXTENT = 1e6
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.scene = QGraphicsScene(self)
+        self.scene.setSceneRect(-self.SCENE_EXTENT, -self.SCENE_EXTENT, 2 * self.SCENE_EXTENT, 2 * self.SCENE_EXTENT)
         self.setScene(self.scene)
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
         self.setBackgroundBrush(QBrush(QColor(13, 27, 42, 200)))
@@ -314,11 +825,25 @@ class MapWidget(QGraphicsView):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
 
-        # Itens da cena (caminho e robô)
-        self.path = QPainterPath()
-        self.path_item = QGraphicsPathItem()
-        self.path_item.setPen(QPen(QColor("#1abc9c"), 2, Qt.PenStyle.DashLine))
-        self.scene.addItem(self.path_item)
+        # Criado só na segunda fase da inicialização (NumPy)
+        from map_trail import PathTrail
+        from coverage import CoverageGrid, CoverageLayerItem
+
+        # Itens da cena (rastro em trechos e robô)
+        self.trail = PathTrail(self.scene, QPen(QColor("#1abc9c"), 2, Qt.PenStyle.DashLine),
+                               chunk_size=config.MAP_TRAIL_CHUNK_SIZE,
+                               min_distance=config.MAP_TRAIL_MIN_DISTANCE,
+                               angle_tolerance_deg=config.MAP_TRAIL_ANGLE_TOLERANCE_DEG,
+                               simplify_tolerance=config.MAP_TRAIL_SIMPLIFY_TOLERANCE,
+                               max_points=config.MAP_TRAIL_MAX_POINTS)
+
+        # Camada de cobertura (em metros), abaixo do rastro
+        self.coverage_item = CoverageLayerItem(
+            CoverageGrid(config.COVERAGE_CELL_SIZE_M, config.COVERAGE_TILE_CELLS, config.COVERAGE_FOOTPRINT_RADIUS_M),
+            QColor(26, 188, 156, 60), lod_levels=config.COVERAGE_LOD_LEVELS, cache_size=config.COVERAGE_PIXMAP_CACHE_SIZE)
+        self.coverage_item.setTransform(QTransform.fromScale(config.MAP_PIXELS_PER_METER, -config.MAP_PIXELS_PER_METER))
+        self.coverage_item.setZValue(-2)
+        self.scene.addItem(self.coverage_item)
 
         robot_shape = QPolygonF([
             QPointF(12, 0), QPointF(-8, -8),
@@ -329,6 +854,10 @@ class MapWidget(QGraphicsView):
         self.robot_item.setPen(QPen(Qt.PenStyle.NoPen))
         self.scene.addItem(self.robot_item)
 
+        self.zoom = 1.0
+        self._camera_pose = None   # Última pose aplicada à câmara (x, y, ângulo)
+        self._grid_brush = self._build_grid_brush()
+
         self._reset_scene_data()
 
     def showEvent(self, event):
@@ -342,16 +871,34 @@ class MapWidget(QGraphicsView):
 
     def _reset_scene_data(self):
         """Função interna para resetar apenas os dados da cena."""
-        self.path = QPainterPath(QPointF(0, 0))
-        self.path_item.setPath(self.path)
+        self.trail.reset(0.0, 0.0)
+        self.coverage_item.clear()
         self.robot_item.setPos(0, 0)
         self.robot_item.setRotation(0)
 
     def _reset_view(self):
         """Função interna para resetar a transformação e centralização da câmara."""
-        self.resetTransform()
-        self.rotate(-90)
-        self.centerOn(self.robot_item)
+        self._apply_camera(0.0, 0.0, 0.0)
+
+    def _apply_camera(self, x, y, angle_deg):
+        """Monta a transformação da câmara (zoom + rotação) e aplica de uma só vez."""
+        self.setTransform(QTransform().rotate(angle_deg - 90).scale(self.zoom, self.zoom))
+        self.centerOn(x, -y)
+        self._camera_pose = (x, y, angle_deg)
+
+    def _camera_change_px(self, x, y, angle_deg):
+        """Maior deslocamento, em pixels de tela, que a nova pose causaria na vista."""
+        last_x, last_y, last_angle = self._camera_pose
+        translation = math.hypot(x - last_x, y - last_y) * self.zoom
+        # Na rotação, o canto da vista é o ponto que mais se desloca
+        radius = 0.5 * math.hypot(self.viewport().width(), self.viewport().height())
+        rotation = math.radians(abs(angle_deg - last_angle)) * radius
+        return max(translation, rotation)
+
+    def set_zoom(self, zoom):
+        self.zoom = zoom
+        if self._camera_pose is not None:
+            self._apply_camera(*self._camera_pose)
 
     @pyqtSlot()
     def reset_map(self):
@@ -362,34 +909,41 @@ class MapWidget(QGraphicsView):
         self._reset_scene_data()
         self._reset_view()
 
+    def _build_grid_brush(self):
+        """Ladrilho de uma célula da grade; o pincel repete-o em coordenadas da cena."""
+        tile = QPixmap(self.GRID_SIZE, self.GRID_SIZE)
+        tile.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(tile)
+        painter.setPen(QPen(QColor(27, 38, 59, 220), 1))
+        painter.drawLine(0, 0, self.GRID_SIZE - 1, 0)
+        painter.drawLine(0, 1, 0, self.GRID_SIZE - 1)
+        painter.end()
+        return QBrush(tile)
+
     def drawBackground(self, painter, rect):
         super().drawBackground(painter, rect)
-        grid_size = 50
-        left = int(rect.left()) - (int(rect.left()) % grid_size)
-        top = int(rect.top()) - (int(rect.top()) % grid_size)
-        lines = []
-        x = left
-        while x < rect.right():
-            lines.append(QLineF(x, rect.top(), x, rect.bottom())); x += grid_size
-        y = top
-        while y < rect.bottom():
-            lines.append(QLineF(rect.left(), y, rect.right(), y)); y += grid_size
-        painter.setPen(QPen(QColor(27, 38, 59, 220), 1))
-        painter.drawLines(lines)
+        # O padrão do pincel segue a transformação do painter, então a grade
+        # continua alinhada à origem da cena com rotação e zoom
+        painter.fillRect(rect, self._grid_brush)
 
     @pyqtSlot(float, float)
     def add_path_point(self, x, y):
-        self.path.lineTo(x, -y)
-        self.path_item.setPath(self.path)
+        self.trail.add_point(x, y)
+
+    def add_coverage(self, xs, ys):
+        """Marca a área percorrida (arrays em metros) na camada de cobertura."""
+        self.coverage_item.add_path(xs, ys)
+
+    def export_coverage(self, path):
+        self.coverage_item.grid.save(path)
 
     @pyqtSlot(float, float, float)
     def update_robot_pose(self, x, y, angle_deg):
+        if self._camera_pose is not None and self._camera_change_px(x, y, angle_deg) < config.MAP_POSE_EPSILON_PX:
+            return
         self.robot_item.setPos(x, -y)
         self.robot_item.setRotation(-angle_deg)
-        self.resetTransform()
-        self.centerOn(self.robot_item)
-        self.rotate(angle_deg - 90)
-        self.centerOn(self.robot_item)
+        self._apply_camera(x, y, angle_deg)
 
 class MapContainerWidget(QWidget):
     """Container para o mapa e o seu botão de reset."""
@@ -474,6 +1028,11 @@ class RawTelemetryWidget(QWidget):
         title_label = QLabel("MQTT Telemetry Data")
         title_label.setFont(QFont('Segoe UI', 9, QFont.Weight.Bold))
         title_label.setStyleSheet("color: '#e0e1dd';")
+
+        self.malformed_label = QLabel("")
+        self.malformed_label.setFont(QFont('Segoe UI', 8))
+        self.malformed_label.setStyleSheet("color: '#e74c3c';")
+        self.malformed_label.hide()
         
         self.text_display = QTextEdit()
         self.text_display.setReadOnly(True)
@@ -489,7 +1048,22 @@ class RawTelemetryWidget(QWidget):
         
         layout.addWidget(title_label, 0, 0)
         layout.addWidget(self.text_display, 1, 0)
+        layout.addWidget(self.malformed_label, 2, 0)
+
+        self._last_payload = None
+        self._malformed_count = 0
 
     @pyqtSlot(str)
     def update_telemetry(self, payload_str):
-        self.text_display.setText(payload_str)
\ No newline at end of file
+        if payload_str == self._last_payload:
+            return
+        self._last_payload = payload_str
+        self.text_display.setText(payload_str)
+
+    @pyqtSlot(int)
+    def set_malformed_count(self, count):
+        if count == self._malformed_count:
+            return
+        self._malformed_count = count
+        self.malformed_label.setText(f"Malformadas: {count}")
+        self.malformed_label.show()
\ No newline at end of file
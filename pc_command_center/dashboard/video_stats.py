@@ -0,0 +1,175 @@
+import os
+import csv
+import time
+import logging
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import config
+
+logger = logging.getLogger(__name__)
+
+class RollingCsvWriter:
+    """Arquivo CSV com rotação por tamanho (mantém `backup_count` arquivos antigos)."""
+    def __init__(self, path, fieldnames, max_bytes, backup_count=2):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._writer = None
+        self._open()
+
+    def _open(self):
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if not is_new and self._read_header() != self.fieldnames:
+            # Colunas mudaram entre versões: guarda o arquivo antigo em vez de misturar formatos
+            self._rotate_files()
+            is_new = True
+        self._file = open(self.path, 'a', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if is_new:
+            self._writer.writeheader()
+
+    def _read_header(self):
+        with open(self.path, newline='') as f:
+            return next(csv.reader(f), None)
+
+    def _rotate_files(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+        os.replace(self.path, f"{self.path}.1")
+
+    def _rotate(self):
+        self._file.close()
+        self._rotate_files()
+        self._open()
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class VideoStatsCollector(QObject):
+    """
+    Amostra periodicamente os contadores acumulados do VideoWorker e da
+    VideoSurfaceWidget, converte em taxas/médias por intervalo, aponta o
+    provável gargalo (rede, decodificação ou renderização) e grava cada
+    amostra em um CSV rotativo.
+
+    Duas latências: `frame_age_ms` (captura na Pi -> tela) depende do
+    header X-Timestamp-Us, que só o cliente nativo lê (e converte para o
+    relógio do PC, então exclui a latência do frame mais rápido); `local_latency_ms`
+    (fim da decodificação -> tela) existe nos dois backends e, com a coluna
+    `backend`, permite comparar execuções com VIDEO_BACKEND "native" e
+    "ffmpeg". O buffer interno do VideoCapture fica fora das duas.
+    """
+    stats_updated = pyqtSignal(dict)
+
+    CSV_FIELDS = ["time", "kbytes_per_s", "decoded_fps", "displayed_fps",
+                  "dropped_network_per_s", "dropped_display_per_s",
+                  "decode_ms", "convert_ms", "paint_ms", "frame_age_ms",
+                  "local_latency_ms", "cpu_percent", "backend", "bottleneck"]
+
+    def __init__(self, video_worker, video_surface, parent=None):
+        super().__init__(parent)
+        self.video_worker = video_worker
+        self.video_surface = video_surface
+
+        self._previous = self._read_counters()
+        self._csv = None
+        if config.VIDEO_STATS_CSV:
+            try:
+                self._csv = RollingCsvWriter(config.VIDEO_STATS_CSV, self.CSV_FIELDS,
+                                             config.VIDEO_STATS_CSV_MAX_BYTES)
+            except OSError as e:
+                logger.error(f"Nao foi possivel abrir o CSV de estatisticas de video: {e}")
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._sample)
+        self.timer.start(int(config.VIDEO_STATS_INTERVAL_S * 1000))
+
+    def _read_counters(self):
+        counters = self.video_worker.stats_snapshot()
+        surface = self.video_surface
+        counters.update({
+            "frames_painted": surface.frames_painted,
+            "paint_time_s": surface.paint_time_s,
+            "frame_age_total_ms": surface.frame_age_total_ms,
+            "frame_age_samples": surface.frame_age_samples,
+            "local_latency_total_ms": surface.local_latency_total_ms,
+            "local_latency_samples": surface.local_latency_samples,
+            "wall_s": time.perf_counter(),
+            "cpu_s": time.process_time(),
+        })
+        return counters
+
+    def _sample(self):
+        current = self._read_counters()
+        delta = {key: current[key] - self._previous[key] for key in current}
+        self._previous = current
+
+        elapsed = max(delta["wall_s"], 1e-6)
+        decoded = delta["frames_decoded"]
+        painted = delta["frames_painted"]
+        age_samples = delta["frame_age_samples"]
+        latency_samples = delta["local_latency_samples"]
+
+        stats = {
+            "time": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "kbytes_per_s": delta["bytes_received"] / 1024.0 / elapsed,
+            "decoded_fps": decoded / elapsed,
+            "displayed_fps": painted / elapsed,
+            "dropped_network_per_s": delta["dropped_network"] / elapsed,
+            "dropped_display_per_s": delta["dropped_display"] / elapsed,
+            "decode_ms": 1000.0 * delta["decode_time_s"] / decoded if decoded else 0.0,
+            "convert_ms": 1000.0 * delta["convert_time_s"] / decoded if decoded else 0.0,
+            "paint_ms": 1000.0 * delta["paint_time_s"] / painted if painted else 0.0,
+            "frame_age_ms": delta["frame_age_total_ms"] / age_samples if age_samples else None,
+            "local_latency_ms": delta["local_latency_total_ms"] / latency_samples if latency_samples else None,
+            "cpu_percent": 100.0 * delta["cpu_s"] / elapsed,
+            "backend": config.VIDEO_BACKEND,
+        }
+        stats["bottleneck"] = self._diagnose(stats)
+
+        self.stats_updated.emit(stats)
+        if self._csv:
+            row = {key: (f"{value:.2f}" if isinstance(value, float) else value) for key, value in stats.items()}
+            try:
+                self._csv.write(row)
+            except OSError as e:
+                logger.error(f"Falha ao gravar estatisticas de video: {e}")
+                self._csv = None
+
+    @staticmethod
+    def _diagnose(stats):
+        """
+        Frames descartados antes da decodificação indicam que o decodificador
+        não acompanha a rede; descartados antes da tela indicam que a GUI não
+        acompanha o decodificador. Sem descartes, fps baixo ou frames velhos
+        apontam para a rede.
+        """
+        if stats["decoded_fps"] == 0:
+            return "rede (sem frames)"
+        if stats["dropped_network_per_s"] >= 1:
+            return "decodificação"
+        if stats["dropped_display_per_s"] >= 1:
+            return "renderização"
+        age = stats["frame_age_ms"]
+        if stats["decoded_fps"] < config.VIDEO_STATS_MIN_FPS or (age is not None and age > config.VIDEO_STATS_MAX_AGE_MS):
+            return "rede"
+        return ""
+
+    def stop(self):
+        self.timer.stop()
+        if self._csv:
+            self._csv.close()
@@ -0,0 +1,49 @@
+"""
+Mede o tempo médio de paintEvent dos indicadores do HUD.
+
+Uso (a partir de pc_command_center/):
+    python test/bench_gauges.py [repeticoes]
+
+Cada widget é redesenhado em um QImage fora da tela, alternando o valor
+exibido a cada repetição para simular telemetria chegando.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage
+
+from ui_widgets import (ArtificialHorizonWidget, SpeedometerWidget,
+                        HorizontalCompassWidget, TopLeftInfoWidget)
+
+def bench(widget, update_value, repetitions):
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    # Primeira renderização fora da medição (constrói caches, carrega fontes)
+    update_value(0)
+    widget.render(image)
+    start = time.perf_counter()
+    for i in range(repetitions):
+        update_value(i + 1)
+        widget.render(image)
+    return 1000.0 * (time.perf_counter() - start) / repetitions
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    app = QApplication(sys.argv)
+
+    horizon = ArtificialHorizonWidget(); horizon.resize(200, 200)
+    speedometer = SpeedometerWidget(); speedometer.resize(200, 200)
+    compass = HorizontalCompassWidget()
+    info = TopLeftInfoWidget()
+
+    cases = [
+        ("ArtificialHorizonWidget", horizon, lambda i: horizon.set_angles((i % 40) - 20.0, (i % 60) - 30.0)),
+        ("SpeedometerWidget", speedometer, lambda i: speedometer.set_speed(float(i % 150))),
+        ("HorizontalCompassWidget", compass, lambda i: compass.set_heading(float(i % 360))),
+        ("TopLeftInfoWidget", info, lambda i: info.set_battery_value(6.0 + (i % 60) * 0.1, i % 100)),
+    ]
+    for name, widget, update_value in cases:
+        print(f"{name:<26} {bench(widget, update_value, repetitions):6.3f} ms/paint")
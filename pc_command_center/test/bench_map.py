@@ -0,0 +1,50 @@
+"""
+Mede o custo de atualizar a pose do robô no mapa e redesenhá-lo.
+
+Uso (a partir de pc_command_center/):
+    python test/bench_map.py [repeticoes]
+
+O robô percorre uma curva suave; a cada repetição a pose é atualizada e o
+mapa é renderizado em um QImage fora da tela, em alguns níveis de zoom.
+"""
+import os
+import sys
+import math
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage
+
+from ui_widgets import MapWidget
+
+def bench(map_widget, zoom, repetitions):
+    image = QImage(map_widget.viewport().size(), QImage.Format.Format_ARGB32_Premultiplied)
+    map_widget.reset_map()
+    map_widget.set_zoom(zoom)
+    x = y = heading = 0.0
+    update_s = render_s = 0.0
+    for i in range(repetitions):
+        heading += 0.5
+        x += 2.0 * math.cos(math.radians(heading))
+        y += 2.0 * math.sin(math.radians(heading))
+        start = time.perf_counter()
+        map_widget.add_path_point(x, y)
+        map_widget.update_robot_pose(x, y, heading)
+        middle = time.perf_counter()
+        map_widget.viewport().render(image)
+        render_s += time.perf_counter() - middle
+        update_s += middle - start
+    return 1000.0 * update_s / repetitions, 1000.0 * render_s / repetitions
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    app = QApplication(sys.argv)
+
+    map_widget = MapWidget()
+    map_widget.resize(400, 400)
+    map_widget.show()
+    for zoom in (0.25, 1.0, 4.0):
+        update_ms, render_ms = bench(map_widget, zoom, repetitions)
+        print(f"zoom {zoom:<5} pose {update_ms:6.3f} ms   render {render_ms:6.3f} ms")
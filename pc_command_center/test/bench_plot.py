@@ -0,0 +1,63 @@
+"""
+Mede o tempo de paintEvent dos gráficos de telemetria (F4) em tempo real.
+
+Uso (a partir de pc_command_center/):
+    python test/bench_plot.py [segundos]
+
+Os canais padrão (config.PLOT_DEFAULT_CHANNELS) começam com a janela cheia
+e recebem amostras a PLOT_MAX_RATE_HZ; o widget é renderizado em um QImage
+fora da tela a PLOT_REFRESH_HZ, como no dashboard, para que as faixas
+rolem e reescalem de verdade. Imprime a média, a mediana, o p99 e o máximo.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage
+
+import config
+from timeseries import TimeSeriesStore, TimeSeriesBuffer
+from ui_widgets import TimeSeriesPlotWidget
+
+def signal(channel_index, t):
+    """Senoide lenta com ruído e degraus ocasionais (forçam reescalas)."""
+    steps = np.floor(t / 17.0 + channel_index) % 3
+    return np.sin(t / (3.0 + channel_index)) + 0.2 * np.random.rand(len(t)) + steps
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    app = QApplication(sys.argv)
+
+    store = TimeSeriesStore(config.PLOT_HISTORY_S * config.PLOT_MAX_RATE_HZ)
+    now = time.monotonic()
+    history = np.arange(now - config.PLOT_WINDOW_S, now, 1.0 / config.PLOT_MAX_RATE_HZ)
+    for i, channel in enumerate(config.PLOT_DEFAULT_CHANNELS):
+        store.buffers[channel] = TimeSeriesBuffer(store.capacity)
+        store.buffers[channel].extend(history, signal(i, history))
+
+    widget = TimeSeriesPlotWidget(store)
+    widget.refresh_timer.stop()
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    widget.render(image)   # Primeira renderização fora da medição (monta as faixas)
+
+    last = time.monotonic()
+    paints = []
+    end = last + seconds
+    while time.monotonic() < end:
+        time.sleep(1.0 / config.PLOT_REFRESH_HZ)
+        now = time.monotonic()
+        t = np.arange(last, now, 1.0 / config.PLOT_MAX_RATE_HZ)
+        for i, channel in enumerate(config.PLOT_DEFAULT_CHANNELS):
+            store.buffers[channel].extend(t, signal(i, t))
+        last = now if len(t) == 0 else t[-1] + 1.0 / config.PLOT_MAX_RATE_HZ
+        widget.render(image)
+        paints.append(widget.last_paint_ms)
+
+    paints = np.array(paints)
+    print(f"{len(paints)} pinturas: média {paints.mean():.3f} ms, mediana {np.median(paints):.3f} ms, "
+          f"p99 {np.percentile(paints, 99):.3f} ms, máx {paints.max():.3f} ms")
@@ -0,0 +1,284 @@
+"""
+Mede velocidade e acurácia do detector de templates (vision/) fora do robô.
+
+Uso (a partir de pc_command_center/):
+    python test/bench_vision.py --source video.avi --truth gabarito.csv [opções]
+    python test/bench_vision.py --source pasta_de_imagens/ --truth gabarito.csv
+    python test/bench_vision.py --synthetic 200             # sequência gerada a partir dos templates
+    python test/bench_vision.py --compare a.json b.json     # compara execuções salvas
+
+Gabarito (CSV com cabeçalho), uma linha por objeto visível:
+    frame,template_id,x_min,y_min,x_max,y_max
+`frame` é o índice do frame no vídeo ou o nome do arquivo na pasta.
+Frames sem linhas não têm nenhum template (contam só para falsos positivos).
+As caixas são anotadas sobre os frames como estão na fonte; com --flip, elas
+são giradas junto com os frames.
+
+Cada detecção vira a caixa alinhada aos eixos dos seus cantos. É um acerto
+quando o template é o mesmo e o IoU com a caixa do gabarito atinge
+--iou. O resultado (configuração, tempos por etapa, fps, precisão,
+revocação e IoU médio) é salvo em JSON para comparar configurações.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+VISION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'vision')
+sys.path.insert(0, VISION_DIR)
+
+from detector import TemplateLibrary, SiftTemplateDetector
+from tracker import DetectThenTrack
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+STAGES = ("decode", "detect", "match", "homography", "track")
+
+# --- FONTES DE FRAMES ---
+def read_video(path):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Erro: não foi possível abrir o vídeo '{path}'.")
+    index = 0
+    while True:
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        decode_s = time.perf_counter() - start
+        if not ret:
+            break
+        yield str(index), frame, decode_s
+        index += 1
+    cap.release()
+
+
+def read_folder(path):
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        start = time.perf_counter()
+        frame = cv2.imread(os.path.join(path, name), cv2.IMREAD_COLOR)
+        decode_s = time.perf_counter() - start
+        if frame is not None:
+            yield name, frame, decode_s
+
+
+def synthetic_sequence(library_dir, frames, seed=0, size=(640, 480)):
+    """
+    Cola os templates (reduzidos, girados e em movimento) sobre um fundo de
+    ruído; metade dos frames de cada template não o contém. Retorna os
+    frames já decodificados e o gabarito exato.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width), dtype=np.uint8), (7, 7), 0)
+    templates = []
+    for name in sorted(os.listdir(library_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            image = cv2.imread(os.path.join(library_dir, name), cv2.IMREAD_GRAYSCALE)
+            scale = 160 / max(image.shape)
+            templates.append((os.path.splitext(name)[0], cv2.resize(image, None, fx=scale, fy=scale)))
+
+    sequence, truth = [], {}
+    for i in range(frames):
+        frame = background.copy()
+        template_id, image = templates[(i // 20) % len(templates)]
+        if (i // 10) % 2 == 0:
+            h, w = image.shape
+            cx = width / 2 + (width / 2 - w) * np.sin(i / 30)
+            cy = height / 2 + (height / 2 - h) * np.cos(i / 40)
+            M = cv2.getRotationMatrix2D((w / 2, h / 2), 15 * np.sin(i / 25), 1.0)
+            M[:, 2] += [cx - w / 2, cy - h / 2]
+            warped = cv2.warpAffine(image, M, size)
+            mask = cv2.warpAffine(np.full_like(image, 255), M, size) > 0
+            frame[mask] = warped[mask]
+            corners = np.float32([[0, 0], [0, h - 1], [w - 1, h - 1], [w - 1, 0]]) @ M[:, :2].T + M[:, 2]
+            truth[str(i)] = [(template_id, *corners.min(axis=0), *corners.max(axis=0))]
+        sequence.append((str(i), cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR), 0.0))
+    return sequence, truth
+
+
+def load_truth(path):
+    truth = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            box = tuple(float(row[k]) for k in ('x_min', 'y_min', 'x_max', 'y_max'))
+            truth.setdefault(row['frame'], []).append((row['template_id'], *box))
+    return truth
+
+
+def flip_truth(objects, width, height):
+    """Caixas do gabarito no frame girado 180° (cv2.flip(frame, -1)): mínimos e máximos trocam de lugar."""
+    return [(template_id, width - x_max, height - y_max, width - x_min, height - y_min)
+            for template_id, x_min, y_min, x_max, y_max in objects]
+
+# --- MÉTRICAS ---
+def iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def score_frame(predictions, expected, iou_threshold):
+    """Associa gulosamente cada predição ao objeto do gabarito de maior IoU. Retorna (tp, fp, fn, ious)."""
+    remaining = list(expected)
+    tp, fp, ious = 0, 0, []
+    for template_id, *box in predictions:
+        candidates = [(iou(box, g[1:]), g) for g in remaining if g[0] == template_id]
+        best_iou, best = max(candidates, default=(0.0, None), key=lambda c: c[0])
+        if best is not None and best_iou >= iou_threshold:
+            tp += 1
+            ious.append(best_iou)
+            remaining.remove(best)
+        else:
+            fp += 1
+    return tp, fp, len(remaining), ious
+
+
+def summarize(values_s):
+    values = np.array(values_s) * 1000.0
+    if len(values) == 0:
+        return None
+    return {"mean": round(float(values.mean()), 3), "p50": round(float(np.percentile(values, 50)), 3),
+            "p95": round(float(np.percentile(values, 95)), 3), "n": int(len(values))}
+
+# --- EXECUÇÃO ---
+def run(frames, truth, detector, args):
+    tracker = DetectThenTrack(detector, detect_interval=args.detect_interval) if args.mode == "track" else None
+    timings = {stage: [] for stage in STAGES}
+    totals = {"tp": 0, "fp": 0, "fn": 0}
+    ious = []
+    processed = 0
+    start = time.perf_counter()
+
+    for key, frame, decode_s in frames:
+        expected = truth.get(key, [])
+        if args.flip:
+            frame = cv2.flip(frame, -1)
+            expected = flip_truth(expected, frame.shape[1], frame.shape[0])
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        timings["decode"].append(decode_s)
+
+        if tracker is None:
+            detections = [(d.template_id, d.corners) for d in detector.detect_all(gray)]
+            detected = True
+        else:
+            detections_before = detector.frames
+            track_start = time.perf_counter()
+            result = tracker.process(gray)
+            detected = detector.frames != detections_before
+            if not detected:
+                timings["track"].append(time.perf_counter() - track_start)
+            detections = [(result.template_id, result.corners)] if result.found else []
+
+        if detected:
+            stage_s = detector.last_timings
+            timings["detect"].append(stage_s["sift"])
+            timings["match"].append(stage_s["knn"] + stage_s["filtro"])
+            timings["homography"].append(stage_s["homografia"])
+
+        predictions = [(template_id, *corners.min(axis=0), *corners.max(axis=0)) for template_id, corners in detections]
+        tp, fp, fn, frame_ious = score_frame(predictions, expected, args.iou)
+        totals["tp"] += tp
+        totals["fp"] += fp
+        totals["fn"] += fn
+        ious.extend(frame_ious)
+        processed += 1
+
+    elapsed = time.perf_counter() - start
+    tp, fp, fn = totals["tp"], totals["fp"], totals["fn"]
+    return {
+        "frames": processed,
+        "fps": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "timings_ms": {stage: summarize(values) for stage, values in timings.items() if values},
+        "tp": tp, "fp": fp, "fn": fn,
+        "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+    }
+
+
+def compare(paths):
+    runs = []
+    for path in paths:
+        with open(path) as f:
+            runs.append(json.load(f))
+    rows = [("", [os.path.basename(p) for p in paths])]
+    for key in ("ratio", "min_match_count", "checks", "max_keypoints", "mode"):
+        rows.append((key, [str(r["config"].get(key)) for r in runs]))
+    for key in ("fps", "precision", "recall", "mean_iou"):
+        rows.append((key, [str(r["results"][key]) for r in runs]))
+    for stage in STAGES:
+        rows.append((f"{stage} ms", [str((r["results"]["timings_ms"].get(stage) or {}).get("mean", "-")) for r in runs]))
+    width = max(12, *(len(c) for _, cells in rows for c in cells))
+    for label, cells in rows:
+        print(f"{label:<16}" + "".join(f"{c:>{width + 2}}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark e acurácia do detector de templates")
+    parser.add_argument("--source", help="vídeo gravado ou pasta de imagens")
+    parser.add_argument("--truth", help="gabarito CSV (frame,template_id,x_min,y_min,x_max,y_max)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="gera N frames sintéticos com gabarito exato")
+    parser.add_argument("--templates", default=os.path.join(VISION_DIR, "templates"), help="pasta de templates")
+    parser.add_argument("--flip", action="store_true", help="gira os frames 180° (como o stream do robô), com as caixas do gabarito")
+    parser.add_argument("--mode", choices=("detect", "track"), default="detect",
+                        help="detect: SIFT em todo frame; track: detecção a cada N frames e rastreamento")
+    parser.add_argument("--detect-interval", type=int, default=10)
+    parser.add_argument("--ratio", type=float, default=0.75)
+    parser.add_argument("--min-matches", type=int, default=15)
+    parser.add_argument("--checks", type=int, default=50)
+    parser.add_argument("--knn", type=int, default=4)
+    parser.add_argument("--ransac", type=float, default=4.0)
+    parser.add_argument("--max-keypoints", type=int, default=0)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU mínimo para contar um acerto")
+    parser.add_argument("--output", help="arquivo JSON do resultado (padrão: vision_bench_<data>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="compara resultados salvos e sai")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    if args.synthetic:
+        frames, truth = synthetic_sequence(args.templates, args.synthetic)
+        source = f"synthetic:{args.synthetic}"
+    elif args.source:
+        frames = read_folder(args.source) if os.path.isdir(args.source) else read_video(args.source)
+        truth = load_truth(args.truth) if args.truth else {}
+        source = args.source
+    else:
+        parser.error("informe --source, --synthetic ou --compare")
+
+    library = TemplateLibrary(args.templates)
+    detector = SiftTemplateDetector(library, ratio=args.ratio, min_match_count=args.min_matches,
+                                    ransac_threshold=args.ransac, knn=args.knn, checks=args.checks,
+                                    max_keypoints=args.max_keypoints)
+    config = {
+        "templates": [t.template_id for t in library.templates], "mode": args.mode,
+        "detect_interval": args.detect_interval if args.mode == "track" else None,
+        "ratio": args.ratio, "min_match_count": args.min_matches, "checks": args.checks, "knn": args.knn,
+        "ransac_threshold": args.ransac, "max_keypoints": args.max_keypoints, "iou_threshold": args.iou,
+        "flip": args.flip,
+    }
+
+    results = run(frames, truth, detector, args)
+    report = {"source": source, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "opencv": cv2.__version__,
+              "config": config, "results": results}
+    output = args.output or time.strftime("vision_bench_%Y%m%d_%H%M%S.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{results['frames']} frames, {results['fps']} fps")
+    for stage, stats in results["timings_ms"].items():
+        print(f"  {stage:<12} média {stats['mean']:8.2f} ms   p95 {stats['p95']:8.2f} ms")
+    print(f"  precisão {results['precision']}   revocação {results['recall']}   IoU médio {results['mean_iou']}")
+    print(f"Resultado salvo em {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Verifica que o pipeline de visão multiprocesso (vision/pipeline.py) não trava
+quando um worker de detecção morre no meio de um vídeo.
+
+Uso (a partir de pc_command_center/):
+    python test/test_vision_pipeline.py
+    python -m pytest test/test_vision_pipeline.py
+
+Gera um vídeo sintético a partir dos templates, processa-o com 2 workers
+(live=False, sem descartes na captura) e mata um deles no meio do vídeo ou
+ainda ocioso, à espera da primeira tarefa. O pipeline deve pular as tarefas
+que estavam com ele, recuperar os slots do anel e entregar todos os outros
+frames até o fim.
+"""
+import os
+import sys
+import time
+import tempfile
+
+import cv2
+import numpy as np
+
+VISION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'vision')
+sys.path.insert(0, VISION_DIR)
+
+from pipeline import VisionPipeline
+
+TEMPLATE_DIR = os.path.join(VISION_DIR, 'templates')
+FRAMES = 120
+KILL_AFTER = 5
+TIMEOUT_S = 120.0
+
+
+def write_synthetic_video(path, frames=FRAMES, size=(320, 240)):
+    """Vídeo com o primeiro template deslizando sobre um fundo de ruído fixo."""
+    names = sorted(n for n in os.listdir(TEMPLATE_DIR) if n.lower().endswith(('.png', '.jpg', '.jpeg')))
+    template = cv2.imread(os.path.join(TEMPLATE_DIR, names[0]))
+    template = cv2.resize(template, (size[0] // 3, size[1] // 3))
+    background = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, size)
+    h, w = template.shape[:2]
+    for i in range(frames):
+        frame = background.copy()
+        x = (i * 2) % (size[0] - w)
+        frame[40:40 + h, x:x + w] = template
+        writer.write(frame)
+    writer.release()
+
+
+def run_and_kill(kill_after):
+    """Processa o vídeo sintético e mata o worker 0 depois de `kill_after` resultados."""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'synthetic.avi')
+        write_synthetic_video(source)
+
+        pipeline = VisionPipeline(source, TEMPLATE_DIR, workers=2, flip=False, live=False,
+                                  max_frame_age_s=TIMEOUT_S)
+        pipeline.start()
+        if kill_after == 0:
+            pipeline._workers[0].kill()
+        delivered = []
+        started = time.monotonic()
+        try:
+            for result, _frame in pipeline.results():
+                delivered.append(result.seq)
+                pipeline.release(result)
+                if len(delivered) == kill_after:
+                    pipeline._workers[0].kill()
+                assert time.monotonic() - started < TIMEOUT_S, "pipeline travado"
+        finally:
+            pipeline.stop()
+
+    assert delivered == sorted(delivered)
+    # As tarefas na fila do worker morto são contadas como perdidas; todo o resto chega
+    assert pipeline.lost_results <= pipeline.slots
+    assert len(delivered) + pipeline.lost_results + pipeline.stale_results == FRAMES
+    return delivered, pipeline
+
+
+def test_worker_killed_while_busy():
+    run_and_kill(KILL_AFTER)
+
+
+def test_worker_killed_while_waiting_for_tasks():
+    # Morto bloqueado na leitura da fila: com uma fila compartilhada, a trava dela ficaria presa
+    run_and_kill(0)
+
+
+if __name__ == '__main__':
+    for kill_after in (KILL_AFTER, 0):
+        delivered, pipeline = run_and_kill(kill_after)
+        print(f"OK (worker morto após {kill_after} resultados): {len(delivered)} entregues, "
+              f"{pipeline.lost_results} perdido(s) com o worker.")
@@ -0,0 +1,231 @@
+import os
+import time
+import hashlib
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+CACHE_VERSION = b"sift-v1"   # Mudar ao alterar os parâmetros do SIFT invalida o cache
+
+class Detection:
+    """Resultado de uma detecção: cantos do template no frame e qualidade do ajuste."""
+    __slots__ = ('template_id', 'corners', 'homography', 'matches', 'inliers')
+
+    def __init__(self, template_id, corners, homography, matches, inliers):
+        self.template_id = template_id
+        self.corners = corners          # array (4, 2) float32, coordenadas do frame
+        self.homography = homography
+        self.matches = matches          # Correspondências aprovadas no ratio test
+        self.inliers = inliers          # Inliers do RANSAC
+
+    @property
+    def center(self):
+        cx, cy = self.corners.mean(axis=0)
+        return int(cx), int(cy)
+
+
+class Template:
+    __slots__ = ('template_id', 'digest', 'points', 'descriptors', 'corners')
+
+    def __init__(self, template_id, digest, shape, points, descriptors):
+        self.template_id = template_id  # Nome do arquivo sem extensão
+        self.digest = digest
+        self.points = points            # array (N, 2) float32 com as posições dos keypoints
+        self.descriptors = descriptors  # array (N, 128) float32
+        h, w = shape
+        self.corners = np.float32([[0, 0], [0, h - 1], [w - 1, h - 1], [w - 1, 0]]).reshape(-1, 1, 2)
+
+
+class TemplateLibrary:
+    """
+    Biblioteca de templates: todas as imagens de um diretório.
+
+    Os descritores SIFT de cada imagem são calculados uma única vez e
+    guardados em `<diretório>/.cache/<sha1>.npz`, chaveados pelo conteúdo
+    do arquivo. O índice FLANN conjunto (um KD-tree sobre os descritores
+    de todos os templates) também é salvo, chaveado pelo conjunto de
+    templates, e só é reconstruído quando a biblioteca muda.
+    """
+    FLANN_INDEX_KDTREE = 1
+
+    def __init__(self, directory, cache_dir=None, trees=5):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(directory, ".cache")
+        self.trees = trees
+        self.templates = []
+        self.computed = 0               # Templates cujos descritores foram calculados nesta carga
+        self.cached = 0                 # Templates lidos do cache
+
+        sift = None
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if sift is None:
+                sift = cv2.SIFT_create()
+            self.templates.append(self._load_template(os.path.join(directory, name), sift))
+        if not self.templates:
+            raise ValueError(f"Nenhum template encontrado em '{directory}'.")
+
+        # Descritores concatenados; `labels[i]` diz a qual template pertence a linha i
+        self.descriptors = np.concatenate([t.descriptors for t in self.templates])
+        self.points = np.concatenate([t.points for t in self.templates])
+        counts = [len(t.descriptors) for t in self.templates]
+        self.labels = np.repeat(np.arange(len(self.templates)), counts)
+
+    def __len__(self):
+        return len(self.templates)
+
+    def _load_template(self, path, sift):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(CACHE_VERSION + data).hexdigest()
+        template_id = os.path.splitext(os.path.basename(path))[0]
+        cache_path = os.path.join(self.cache_dir, digest + ".npz")
+
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                self.cached += 1
+                return Template(template_id, digest, tuple(cached['shape']), cached['points'], cached['descriptors'])
+
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Não foi possível carregar a imagem de template em '{path}'.")
+        keypoints, descriptors = sift.detectAndCompute(image, None)
+        if descriptors is None:
+            raise ValueError(f"Não foram encontrados pontos de característica suficientes no template '{path}'.")
+        points = cv2.KeyPoint_convert(keypoints)
+
+        # Grava em arquivo temporário e renomeia: outro processo pode estar lendo o cache
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(cache_path + ".tmp", 'wb') as f:
+            np.savez(f, shape=np.int32(image.shape), points=points, descriptors=descriptors)
+        os.replace(cache_path + ".tmp", cache_path)
+        self.computed += 1
+        return Template(template_id, digest, image.shape, points, descriptors)
+
+    def build_index(self):
+        """Retorna o índice FLANN de todos os descritores, lendo-o do cache quando possível."""
+        key = hashlib.sha1(("%d:" % self.trees + ",".join(t.digest for t in self.templates)).encode()).hexdigest()
+        index_path = os.path.join(self.cache_dir, f"index_{key}.flann")
+        index = cv2.flann_Index()
+        if os.path.exists(index_path) and index.load(self.descriptors, index_path):
+            return index
+
+        index = cv2.flann_Index(self.descriptors, dict(algorithm=self.FLANN_INDEX_KDTREE, trees=self.trees))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index.save(index_path + ".tmp")
+        os.replace(index_path + ".tmp", index_path)
+        return index
+
+
+class SiftTemplateDetector:
+    """
+    Localiza os templates de uma biblioteca no frame com SIFT, uma única
+    consulta k-NN ao índice FLANN conjunto, ratio test de Lowe por template
+    e homografia RANSAC por template.
+
+    O ratio test compara o vizinho mais próximo de cada descritor do frame
+    com o segundo vizinho *do mesmo template*. Entre os `knn` vizinhos
+    retornados, se o template aparece só uma vez, a distância do último
+    vizinho serve de limite inferior para o segundo (teste conservador).
+
+    Todo o pós-processamento é vetorizado sobre as matrizes (Q, knn) da
+    consulta. `max_keypoints` limita os keypoints por frame (os de maior
+    resposta) e `last_timings` guarda o tempo de cada etapa do último frame.
+    """
+    STAGES = ("sift", "knn", "filtro", "homografia")
+
+    def __init__(self, library, ratio=0.75, min_match_count=15, ransac_threshold=4.0, knn=4, checks=50,
+                 max_keypoints=0):
+        self.library = library
+        self.ratio = ratio
+        self.min_match_count = min_match_count
+        self.ransac_threshold = ransac_threshold
+        self.knn = min(knn, len(library.descriptors))
+        self.search_params = dict(checks=checks)
+
+        # nfeatures=0 mantém todos os keypoints; os do template não são limitados
+        self.sift = cv2.SIFT_create(nfeatures=max_keypoints)
+        self.index = library.build_index()
+
+        # Pares (j, m) com m > j, para achar o próximo vizinho do mesmo template
+        self._later = np.triu(np.ones((self.knn, self.knn), dtype=bool), k=1)
+        self._earlier = self._later.T
+
+        self.last_timings = dict.fromkeys(self.STAGES, 0.0)
+        self.total_timings = dict.fromkeys(self.STAGES, 0.0)
+        self.frames = 0
+
+    def detect_all(self, gray_frame):
+        """Retorna a lista de Detection de todos os templates encontrados no frame."""
+        timings = dict.fromkeys(self.STAGES, 0.0)
+        try:
+            return self._detect_all(gray_frame, timings)
+        finally:
+            self.last_timings = timings
+            for stage, seconds in timings.items():
+                self.total_timings[stage] += seconds
+            self.frames += 1
+
+    def _detect_all(self, gray_frame, timings):
+        t0 = time.perf_counter()
+        kp_frame, des_frame = self.sift.detectAndCompute(gray_frame, None)
+        t1 = time.perf_counter()
+        timings["sift"] = t1 - t0
+        if des_frame is None or len(des_frame) <= 2:
+            return []
+
+        # Uma consulta para todos os templates; o FLANN retorna distâncias ao quadrado
+        indices, distances = self.index.knnSearch(des_frame, self.knn, params=self.search_params)
+        t2 = time.perf_counter()
+        timings["knn"] = t2 - t1
+
+        # --- Ratio test por template, como máscara (Q, knn) ---
+        labels = self.library.labels[indices]
+        same = labels[:, :, None] == labels[:, None, :]                 # (Q, knn, knn)
+        first = ~(same & self._earlier).any(axis=2)                     # Primeira ocorrência do template na linha
+        later = same & self._later
+        has_second = later.any(axis=2)
+        second_col = np.where(has_second, later.argmax(axis=2), self.knn - 1)
+        second = np.take_along_axis(distances, second_col, axis=1)
+        passes = first & (distances < (self.ratio * self.ratio) * second)
+
+        query_idx, col = np.nonzero(passes)
+        train_idx = indices[query_idx, col]
+        match_labels = labels[query_idx, col]
+        counts = np.bincount(match_labels, minlength=len(self.library))
+        candidates = np.flatnonzero(counts > self.min_match_count)
+        t3 = time.perf_counter()
+        timings["filtro"] = t3 - t2
+        if len(candidates) == 0:
+            return []
+
+        # --- Homografia por template, com os pontos reunidos por indexação ---
+        frame_points = cv2.KeyPoint_convert(kp_frame)                   # (N, 2) float32
+        detections = []
+        for label in candidates:
+            selected = match_labels == label
+            src_pts = self.library.points[train_idx[selected]].reshape(-1, 1, 2)
+            dst_pts = frame_points[query_idx[selected]].reshape(-1, 1, 2)
+            M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, self.ransac_threshold)
+            if M is None:
+                continue
+            template = self.library.templates[label]
+            corners = cv2.perspectiveTransform(template.corners, M).reshape(4, 2)
+            detections.append(Detection(template.template_id, corners, M, int(counts[label]),
+                                        int(mask.sum()) if mask is not None else 0))
+        timings["homografia"] = time.perf_counter() - t3
+
+        detections.sort(key=lambda d: d.inliers, reverse=True)
+        return detections
+
+    def detect(self, gray_frame):
+        """Retorna a melhor Detection (mais inliers) ou None se nenhum template foi encontrado."""
+        detections = self.detect_all(gray_frame)
+        return detections[0] if detections else None
+
+    def timing_summary(self):
+        """Tempo médio por frame de cada etapa, em ms."""
+        frames = max(self.frames, 1)
+        return " ".join(f"{stage}={1000 * self.total_timings[stage] / frames:.1f}" for stage in self.STAGES)
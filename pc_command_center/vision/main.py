@@ -1,114 +1,169 @@
+import os
+import time
+import argparse
+
 import cv2
 import numpy as np
 
-# --- 1. Carregar a Imagem de Referência (Template) ---
-TEMPLATE_PATH = "bomba_mario.png" 
-
-template = cv2.imread(TEMPLATE_PATH, cv2.IMREAD_GRAYSCALE)
-if template is None:
-    print(f"Erro: Não foi possível carregar a imagem de template em '{TEMPLATE_PATH}'.")
-    print("Verifique o caminho e o nome do arquivo.")
-    exit()
-
-# --- 2. Inicializar o Detector de Características (SIFT) ---
-try:
-    sift = cv2.SIFT_create()
-except cv2.error as e:
-    print("Erro ao inicializar o SIFT. Você instalou o 'opencv-contrib-python'?")
-    print("Execute: pip uninstall opencv-python")
-    print("Depois:   pip install opencv-contrib-python")
-    exit()
-
-
-# Encontra os pontos chave (keypoints) e descritores do template
-kp_template, des_template = sift.detectAndCompute(template, None)
-
-if des_template is None:
-    print("Não foram encontrados pontos de característica suficientes no template.")
-    print("Tente uma imagem de template com mais detalhes.")
-    exit()
-
-# --- 3. Configurar o Matcher (FLANN) ---
-FLANN_INDEX_KDTREE = 1
-index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=5)
-search_params = dict(checks=50) 
-
-flann = cv2.FlannBasedMatcher(index_params, search_params)
-
-# --- 4. Configura a Captura de Vídeo do MJPEG ---
-stream_url = "http://pizero.local:8000/stream.mjpg" 
-cap = cv2.VideoCapture(stream_url)
-if not cap.isOpened():
-    print("Erro: Não foi possível abrir a câmera.")
-    exit()
-
-print(f"\nProcurando a imagem '{TEMPLATE_PATH}' (usando SIFT). Pressione 'q' para sair.")
-
-# --- 5. Loop Principal de Processamento ---
-while True:
-    ret, frame = cap.read()
-    frame = cv2.flip(frame, -1)
-    if not ret:
-        print("Erro: Não foi possível ler o frame.")
-        break
-
-    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-    # Encontra os keypoints e descritores do frame atual
-    kp_frame, des_frame = sift.detectAndCompute(gray_frame, None)
-
-    img_center_x = None
-    img_center_y = None
-
-    if des_frame is not None and len(des_frame) > 2:
-        # Usa knnMatch (k=2) para encontrar os 2 vizinhos mais próximos
-        matches = flann.knnMatch(des_template, des_frame, k=2)
-
-        # --- 6. Filtragem (Lowe's Ratio Test) ---
-        good_matches = []
-        for m, n in matches:
-            if m.distance < 0.75 * n.distance:
-                good_matches.append(m)
-
-        # --- 7. Localização (Homografia) ---
-        MIN_MATCH_COUNT = 15
-
-        if len(good_matches) > MIN_MATCH_COUNT:
-            src_pts = np.float32([kp_template[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-            dst_pts = np.float32([kp_frame[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-
-            M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 4.0)
-
-            if M is not None:
-                h, w = template.shape
-                pts = np.float32([[0, 0], [0, h - 1], [w - 1, h - 1], [w - 1, 0]]).reshape(-1, 1, 2)
-                dst = cv2.perspectiveTransform(pts, M)
-
-                frame = cv2.polylines(frame, [np.int32(dst)], True, (0, 255, 0), 3, cv2.LINE_AA)
-                
-                x_coords = [p[0][0] for p in dst]
-                y_coords = [p[0][1] for p in dst]
-                img_center_x = int(np.mean(x_coords))
-                img_center_y = int(np.mean(y_coords))
-                
-                cv2.circle(frame, (img_center_x, img_center_y), 5, (0, 0, 255), -1)
-
-    # --- 8. Lógica de Alerta ---
-    if img_center_x is not None:
-        comando = "ALERTA: BOMBA DETECTADA!"
-        cv2.putText(frame, comando, (10, 30), 
+from detector import TemplateLibrary, SiftTemplateDetector
+from tracker import DetectThenTrack
+from pipeline import VisionPipeline
+
+# --- 1. Configuração ---
+TEMPLATE_DIR = "templates"   # Uma imagem por tipo de ameaça; descritores em cache em templates/.cache
+STREAM_URL = "http://pizero.local:8000/stream.mjpg"
+
+MAX_KEYPOINTS = 1000         # Keypoints por frame (os de maior resposta); 0 = sem limite
+
+# Modo de processo único: detecção completa (SIFT) a cada N frames; entre elas, fluxo óptico em escala reduzida
+DETECT_INTERVAL = 10
+TRACK_SCALE = 0.5
+MIN_TRACK_CONFIDENCE = 0.5   # Abaixo disso, força uma nova detecção
+
+# Modo multiprocesso: captura, N workers de detecção e exibição em processos separados
+MAX_FRAME_AGE_S = 0.5        # Frames mais velhos que isso ao chegar no worker são descartados
+
+WINDOW_NAME = "Frame com Deteccao (SIFT)"
+
+
+def format_timings(timings):
+    return " ".join(f"{stage}={1000 * seconds:.0f}" for stage, seconds in timings.items()) + " ms"
+
+
+def draw_overlay(frame, detections, status_text, timings_text=""):
+    """
+    Desenha a caixa, o centro e o nome de cada template detectado e o alerta;
+    retorna False quando 'q' é pressionado.
+    """
+    for template_id, corners in detections:
+        cv2.polylines(frame, [np.int32(corners)], True, (0, 255, 0), 3, cv2.LINE_AA)
+        img_center_x, img_center_y = np.int32(corners.mean(axis=0))
+        cv2.circle(frame, (int(img_center_x), int(img_center_y)), 5, (0, 0, 255), -1)
+        label_x, label_y = np.int32(corners.min(axis=0))
+        cv2.putText(frame, template_id, (int(label_x), int(label_y) - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+    if detections:
+        comando = "ALERTA: " + ", ".join(template_id for template_id, _ in detections).upper() + " DETECTADO!"
+        cv2.putText(frame, comando, (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
     else:
-        cv2.putText(frame, "Procurando...", (10, 30), 
+        cv2.putText(frame, "Procurando...", (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 100, 0), 2)
 
-    # --- 9. Exibição ---
-    cv2.imshow("Frame com Deteccao (SIFT)", frame)
+    cv2.putText(frame, status_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    if timings_text:
+        cv2.putText(frame, timings_text, (10, 85), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.imshow(WINDOW_NAME, frame)
+    return not (cv2.waitKey(1) & 0xFF == ord('q'))
+
+
+class FpsMeter:
+    def __init__(self):
+        self.fps = 0.0
+        self.last = time.perf_counter()
+
+    def tick(self):
+        now = time.perf_counter()
+        self.fps = 0.9 * self.fps + 0.1 / max(now - self.last, 1e-6)
+        self.last = now
+        return self.fps
+
+
+def run_single_process(detector, source):
+    # --- 2. Inicializar o Rastreador sobre o Detector ---
+    pipeline = DetectThenTrack(detector, detect_interval=DETECT_INTERVAL, track_scale=TRACK_SCALE,
+                               min_confidence=MIN_TRACK_CONFIDENCE)
+
+    # --- 3. Configura a Captura de Vídeo do MJPEG ---
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print("Erro: Não foi possível abrir a câmera.")
+        return
+
+    print(f"\nProcurando {len(detector.library)} templates (SIFT + rastreamento). Pressione 'q' para sair.")
+    meter = FpsMeter()
+
+    # --- 4. Loop Principal: captura, detecção ou rastreamento, exibição ---
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("Erro: Não foi possível ler o frame.")
+            break
+        frame = cv2.flip(frame, -1)
+
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        result = pipeline.process(gray_frame)
+
+        status = f"{result.mode} conf={result.confidence:.2f} {meter.tick():.1f} fps"
+        detections = [(result.template_id, result.corners)] if result.found else []
+        timings = format_timings(detector.last_timings) if result.mode != "track" else ""
+        if not draw_overlay(frame, detections, status, timings):
+            break
+
+    cap.release()
+    print(f"Detecção, média por frame detectado (ms): {detector.timing_summary()}")
+
+
+def run_multi_process(source, workers):
+    # --- 2. Inicia captura e workers; os frames trafegam por memória compartilhada ---
+    # Arquivos de vídeo são processados por inteiro; no stream ao vivo, frames atrasados são descartados
+    pipeline = VisionPipeline(source, TEMPLATE_DIR, workers=workers, live=not os.path.isfile(source),
+                              max_frame_age_s=MAX_FRAME_AGE_S, detector_kwargs=dict(max_keypoints=MAX_KEYPOINTS))
+    try:
+        pipeline.start()
+    except RuntimeError as e:
+        print(f"Erro: {e}")
+        return
+
+    print(f"\nProcurando os templates de '{TEMPLATE_DIR}' (SIFT em {pipeline.workers} processos). Pressione 'q' para sair.")
+    meter = FpsMeter()
+
+    # --- 3. Estágio de Resultados: chegam em ordem de captura ---
+    try:
+        for result, frame in pipeline.results():
+            latency_ms = 1000 * (time.time() - result.captured_at)
+            status = (f"{pipeline.workers} workers {meter.tick():.1f} fps "
+                      f"lat={latency_ms:.0f} ms descartados={pipeline.dropped}")
+            keep_running = draw_overlay(frame, result.detections, status, format_timings(result.timings))
+            pipeline.release(result)
+            if not keep_running:
+                break
+    finally:
+        pipeline.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detecção da imagem de referência no vídeo do robô")
+    parser.add_argument("--source", default=STREAM_URL, help="URL do stream MJPEG ou arquivo de vídeo")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processos de detecção (0 = processo único com rastreamento)")
+    args = parser.parse_args()
+
+    # Valida o SIFT e os templates (e preenche o cache) antes de iniciar qualquer processo
+    try:
+        library = TemplateLibrary(TEMPLATE_DIR)
+        detector = SiftTemplateDetector(library, max_keypoints=MAX_KEYPOINTS)
+    except cv2.error as e:
+        print("Erro ao inicializar o SIFT. Você instalou o 'opencv-contrib-python'?")
+        print("Execute: pip uninstall opencv-python")
+        print("Depois:   pip install opencv-contrib-python")
+        return
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}")
+        print("Verifique o diretório de templates; use imagens com mais detalhes.")
+        return
+    print(f"{len(library)} templates ({library.cached} do cache, {library.computed} calculados).")
+
+    if args.workers > 0:
+        run_multi_process(args.source, args.workers)
+    else:
+        run_single_process(detector, args.source)
+
+    # --- 5. Limpeza ---
+    print("Encerrando...")
+    cv2.destroyAllWindows()
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
 
-# --- 10. Limpeza ---
-print("Encerrando...")
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import heapq
+import queue
+import time
+import multiprocessing as mp
+from multiprocessing import connection as mp_connection
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from detector import TemplateLibrary, SiftTemplateDetector
+
+class FrameRing:
+    """
+    Anel de frames BGR em memória compartilhada. Os processos trocam apenas o
+    índice do slot pelas filas; o frame em si nunca é serializado.
+
+    Cada slot tem um único dono por vez: a captura pega um slot livre, o
+    worker o lê e o estágio de resultados o devolve à fila de livres depois
+    de desenhar. Assim nenhum slot é sobrescrito enquanto está em uso.
+    """
+    def __init__(self, shape, slots, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape)) * slots
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ReorderBuffer:
+    """
+    Reordena resultados pela sequência do frame. Cada frame capturado gera
+    exatamente um resultado (mesmo os descartados), então lacunas só ocorrem
+    se um worker morrer com tarefas em mãos. O dono do pipeline, ao notar a
+    morte, marca essas sequências com `drop`; elas são puladas na vez delas
+    e entram em `skipped`, para que o recurso associado (o slot do anel)
+    seja liberado.
+    """
+    def __init__(self):
+        self.next_seq = 0
+        self.skipped = set()
+        self._heap = []
+        self._queued = set()            # Sequências com resultado no heap
+        self._dropped = set()           # Sequências que nunca terão resultado
+
+    def has(self, seq):
+        """Verdadeiro se o resultado de `seq` já chegou (entregue ou à espera)."""
+        return seq < self.next_seq or seq in self._queued
+
+    def push(self, seq, item):
+        if seq < self.next_seq or seq in self._dropped:
+            return   # Chegou depois de ter sido pulado
+        heapq.heappush(self._heap, (seq, item))
+        self._queued.add(seq)
+
+    def drop(self, seq):
+        if not self.has(seq):
+            self._dropped.add(seq)
+
+    def pop_ready(self):
+        ready = []
+        while True:
+            if self.next_seq in self._dropped:
+                self._dropped.discard(self.next_seq)
+                self.skipped.add(self.next_seq)
+            elif self._heap and self._heap[0][0] == self.next_seq:
+                _, item = heapq.heappop(self._heap)
+                self._queued.discard(self.next_seq)
+                ready.append(item)
+            else:
+                break
+            self.next_seq += 1
+        return ready
+
+
+class VisionResult:
+    __slots__ = ('seq', 'slot', 'captured_at', 'detections', 'status', 'timings')
+
+    def __init__(self, seq, slot, captured_at, detections, status, timings=None):
+        self.seq = seq
+        self.slot = slot
+        self.captured_at = captured_at
+        self.detections = detections    # Lista de (template_id, cantos (4, 2)), da mais confiável
+        self.status = status            # "detect", "lost" ou "stale"
+        self.timings = timings or {}    # Tempo de cada etapa da detecção no worker, em segundos
+
+    @property
+    def found(self):
+        return bool(self.detections)
+
+
+# --- PROCESSOS (funções de módulo, para funcionar com o 'spawn' do Windows) ---
+# Cada worker tem a própria fila de tarefas e o próprio pipe de resultados: um
+# worker morto no meio de um get/put de uma fila compartilhada deixaria a trava
+# interna dela presa e pararia os outros workers junto.
+
+def _capture_process(source, flip, live, slots, info_queue, ring_ready, free_slots, tasks, alive, assigned,
+                     stop_event, counters):
+    cap = cv2.VideoCapture(source)
+    ret, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ret:
+        info_queue.put(None)
+        return
+
+    # O processo principal cria o anel com o tamanho do primeiro frame e é o dono dele
+    info_queue.put(frame.shape)
+    ring = FrameRing(frame.shape, slots, name=ring_ready.get())
+    seq = 0
+    worker = -1
+    try:
+        while not stop_event.is_set():
+            if flip:
+                frame = cv2.flip(frame, -1)
+            try:
+                # Ao vivo, não espera: sem slot livre os workers estão atrasados e o frame é descartado
+                slot = free_slots.get_nowait() if live else free_slots.get(timeout=1.0)
+            except queue.Empty:
+                if live:
+                    with counters.get_lock():
+                        counters[1] += 1
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                continue
+
+            # Rodízio entre os workers vivos (o processo principal zera `alive` dos que morrem)
+            candidates = [(worker + i) % len(tasks) for i in range(1, len(tasks) + 1)]
+            worker = next((w for w in candidates if alive[w]), None)
+            if worker is None:
+                break
+
+            if frame.shape == ring.shape:
+                ring.frames[slot] = frame
+            else:
+                ring.frames[slot] = cv2.resize(frame, (ring.shape[1], ring.shape[0]))
+            # O processo principal guarda o slot e o worker de cada sequência para liberá-lo se o worker morrer
+            assigned.put((seq, slot, worker))
+            tasks[worker].put((seq, slot, time.time()))
+            seq += 1
+            with counters.get_lock():
+                counters[0] += 1
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+    finally:
+        cap.release()
+        for worker_tasks in tasks:
+            worker_tasks.put(None)   # Fim do fluxo
+        ring.close()
+
+
+def _detection_worker(template_dir, detector_kwargs, ring_name, shape, slots, tasks, results, ready, max_frame_age_s):
+    # Descritores e índice vêm do cache em disco, montado pelo processo principal
+    detector = SiftTemplateDetector(TemplateLibrary(template_dir), **detector_kwargs)
+    ring = FrameRing(shape, slots, name=ring_name)
+    ready.put(True)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, captured_at = task
+            if time.time() - captured_at > max_frame_age_s:
+                results.send((seq, slot, captured_at, [], "stale"))
+                continue
+
+            # Lê direto da memória compartilhada: o slot é exclusivo até ser liberado
+            gray = cv2.cvtColor(ring.frames[slot], cv2.COLOR_BGR2GRAY)
+            detections = [(d.template_id, d.corners) for d in detector.detect_all(gray)]
+            results.send((seq, slot, captured_at, detections, "detect" if detections else "lost",
+                          detector.last_timings))
+    finally:
+        results.close()
+        ring.close()
+
+
+class VisionPipeline:
+    """
+    Captura -> N workers de detecção -> estágio de resultados (no processo
+    principal, onde fica a janela do OpenCV).
+
+    Se um worker morre, o fim do seu pipe de resultados avisa o processo
+    principal, que tira o worker do rodízio da captura, pula as sequências
+    que estavam com ele e devolve os slots delas ao anel; os outros workers
+    seguem normalmente.
+
+    Uso:
+        pipeline.start()
+        for result, frame in pipeline.results():
+            ...                      # desenhar/exibir `frame` (view do anel)
+            pipeline.release(result) # devolve o slot à captura
+    """
+    def __init__(self, source, template_dir, workers=None, flip=True, live=True, slots=None,
+                 max_frame_age_s=0.5, detector_kwargs=None):
+        self.source = source
+        self.template_dir = template_dir
+        self.workers = workers or max(1, (mp.cpu_count() or 2) - 1)
+        self.flip = flip
+        self.live = live                # Falso para arquivos: a captura espera em vez de descartar
+        self.slots = slots or 2 * self.workers + 2
+        self.max_frame_age_s = max_frame_age_s
+        self.detector_kwargs = detector_kwargs or {}
+
+        self.ring = None
+        self.reorder = ReorderBuffer()
+        self.stale_results = 0
+        self.lost_results = 0           # Sequências perdidas com um worker morto: o slot é recuperado
+        self._pending = {}              # seq -> (slot, worker), ainda sem resultado
+        self._processes = []
+        self._workers = []
+        self._readers = {}              # Pipe de resultados -> índice do worker
+
+    def start(self, timeout_s=10.0):
+        self._free_slots = mp.Queue()
+        self._tasks = [mp.Queue() for _ in range(self.workers)]
+        self._alive = mp.Array('b', [1] * self.workers)
+        self._assigned = mp.Queue()
+        self._stop_event = mp.Event()
+        self._counters = mp.Array('l', 2)   # [capturados, descartados na captura]
+        info_queue = mp.Queue()
+        ring_ready = mp.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+
+        capture = mp.Process(target=_capture_process, daemon=True,
+                             args=(self.source, self.flip, self.live, self.slots, info_queue, ring_ready,
+                                   self._free_slots, self._tasks, self._alive, self._assigned, self._stop_event,
+                                   self._counters))
+        capture.start()
+        self._processes.append(capture)
+
+        try:
+            shape = info_queue.get(timeout=timeout_s)
+        except queue.Empty:
+            shape = None
+        if shape is None:
+            self.stop()
+            raise RuntimeError(f"Não foi possível abrir o vídeo em '{self.source}'.")
+        self.ring = FrameRing(shape, self.slots)
+
+        workers_ready = mp.Queue()
+        for index in range(self.workers):
+            reader, writer = mp.Pipe(duplex=False)
+            worker = mp.Process(target=_detection_worker, daemon=True,
+                                args=(self.template_dir, self.detector_kwargs, self.ring.name, shape, self.slots,
+                                      self._tasks[index], writer, workers_ready, self.max_frame_age_s))
+            worker.start()
+            # Só o worker fica com a ponta de escrita: quando ele termina, o pipe chega ao fim (EOF)
+            writer.close()
+            self._processes.append(worker)
+            self._workers.append(worker)
+            self._readers[reader] = index
+
+        # Só libera a captura com os workers prontos; senão os primeiros frames envelhecem na fila
+        try:
+            for _ in range(self.workers):
+                workers_ready.get(timeout=timeout_s)
+        except queue.Empty:
+            self.stop()
+            raise RuntimeError("Os workers de detecção não iniciaram a tempo.")
+        ring_ready.put(self.ring.name)
+
+    def results(self, poll_s=0.1):
+        """Gera (VisionResult, frame) em ordem de captura; frames atrasados são liberados e omitidos."""
+        while self._readers:
+            for reader in mp_connection.wait(list(self._readers), timeout=poll_s):
+                try:
+                    raw = reader.recv()
+                except EOFError:
+                    self._worker_finished(reader)
+                    continue
+                result = VisionResult(*raw)
+                self._pending.pop(result.seq, None)
+                self.reorder.push(result.seq, result)
+            self._collect_assigned()
+
+            ready_results = self.reorder.pop_ready()
+            self._reclaim_skipped_slots()
+            for ready in ready_results:
+                if ready.status == "stale":
+                    self.stale_results += 1
+                    self.release(ready)
+                    continue
+                yield ready, self.ring.frames[ready.slot]
+
+    def _collect_assigned(self):
+        """Registra o slot e o worker de cada sequência despachada pela captura."""
+        while True:
+            try:
+                seq, slot, worker = self._assigned.get_nowait()
+            except queue.Empty:
+                break
+            if self.reorder.has(seq):
+                continue     # O resultado chegou antes do registro (filas diferentes)
+            self._pending[seq] = (slot, worker)
+            if not self._alive[worker]:
+                self.reorder.drop(seq)
+
+    def _worker_finished(self, reader):
+        index = self._readers.pop(reader)
+        reader.close()
+        worker = self._workers[index]
+        worker.join(timeout=1.0)
+        if worker.exitcode == 0:
+            return   # Fim normal do fluxo
+        self._alive[index] = 0
+        print(f"Aviso: worker de detecção {index} terminou com código {worker.exitcode}; "
+              f"suas tarefas serão puladas.")
+        self._collect_assigned()
+        for seq, (_slot, owner) in self._pending.items():
+            if owner == index:
+                self.reorder.drop(seq)
+
+    def _reclaim_skipped_slots(self):
+        """Devolve à captura os slots das sequências puladas; sem isso, cada worker morto encolhe o anel."""
+        for seq in self.reorder.skipped:
+            slot, _worker = self._pending.pop(seq)
+            self.lost_results += 1
+            self._free_slots.put(slot)
+        self.reorder.skipped.clear()
+
+    def release(self, result):
+        self._free_slots.put(result.slot)
+
+    @property
+    def captured(self):
+        return self._counters[0]
+
+    @property
+    def dropped(self):
+        """Frames descartados: na captura (sem slot livre), nos workers (velhos demais) ou perdidos com um worker."""
+        return self._counters[1] + self.stale_results + self.lost_results
+
+    def stop(self):
+        if self._processes:
+            self._stop_event.set()
+            for process in self._processes:
+                process.join(timeout=2.0)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+        for reader in self._readers:
+            reader.close()
+        self._readers = {}
+        if self.ring is not None:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
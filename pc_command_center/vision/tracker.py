@@ -0,0 +1,126 @@
+import cv2
+import numpy as np
+
+class TrackResult:
+    __slots__ = ('template_id', 'corners', 'mode', 'confidence')
+
+    def __init__(self, template_id, corners, mode, confidence):
+        self.template_id = template_id
+        self.corners = corners          # array (4, 2) float32 ou None
+        self.mode = mode                # "detect", "track" ou "lost"
+        self.confidence = confidence    # 0..1
+
+    @property
+    def found(self):
+        return self.corners is not None
+
+    @property
+    def center(self):
+        cx, cy = self.corners.mean(axis=0)
+        return int(cx), int(cy)
+
+
+class DetectThenTrack:
+    """
+    Pipeline híbrido para um alvo (o template detectado com mais inliers):
+    detecção completa (SIFT) a cada `detect_interval` frames,
+    ou antes se a confiança do rastreamento cair; nos frames intermediários,
+    rastreia pontos do interior da última caixa com fluxo óptico piramidal
+    (Lucas-Kanade) em escala de cinza reduzida e move os cantos pela
+    homografia estimada entre os pontos.
+
+    A confiança é a fração dos pontos iniciais que continuam válidos
+    (verificação ida-e-volta do fluxo e inliers do RANSAC).
+    """
+    def __init__(self, detector, detect_interval=10, track_scale=0.5, min_confidence=0.5,
+                 max_track_points=100, max_fb_error=1.0):
+        self.detector = detector
+        self.detect_interval = detect_interval
+        self.track_scale = track_scale
+        self.min_confidence = min_confidence
+        self.max_track_points = max_track_points
+        self.max_fb_error = max_fb_error
+        self.lk_params = dict(winSize=(21, 21), maxLevel=3,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.reset()
+
+    def reset(self):
+        self.template_id = None
+        self.corners = None             # Cantos atuais (coordenadas do frame completo)
+        self._prev_small = None
+        self._points = None             # Pontos rastreados (coordenadas reduzidas)
+        self._initial_points = 0
+        self._frames_since_detect = 0
+        self.detections = 0
+        self.tracked_frames = 0
+
+    def process(self, gray_frame):
+        small = self._downscale(gray_frame)
+        needs_detection = (self.corners is None or self._points is None
+                           or self._frames_since_detect >= self.detect_interval)
+
+        if not needs_detection:
+            confidence = self._track(small)
+            if confidence >= self.min_confidence:
+                self._prev_small = small
+                self._frames_since_detect += 1
+                self.tracked_frames += 1
+                return TrackResult(self.template_id, self.corners, "track", confidence)
+
+        return self._detect(gray_frame, small)
+
+    def _detect(self, gray_frame, small):
+        self.detections += 1
+        self._frames_since_detect = 0
+        detection = self.detector.detect(gray_frame)
+        if detection is None:
+            self.template_id = None
+            self.corners = None
+            self._points = None
+            return TrackResult(None, None, "lost", 0.0)
+
+        self.template_id = detection.template_id
+        self.corners = detection.corners.astype(np.float32)
+        self._prev_small = small
+        self._points = self._select_points(small, self.corners * self.track_scale)
+        self._initial_points = 0 if self._points is None else len(self._points)
+        confidence = detection.inliers / max(detection.matches, 1)
+        return TrackResult(self.template_id, self.corners, "detect", confidence)
+
+    def _select_points(self, small, corners_small):
+        """Cantos de Shi-Tomasi dentro do quadrilátero detectado."""
+        mask = np.zeros(small.shape[:2], dtype=np.uint8)
+        cv2.fillConvexPoly(mask, np.int32(np.round(corners_small)), 255)
+        points = cv2.goodFeaturesToTrack(small, maxCorners=self.max_track_points, qualityLevel=0.01,
+                                         minDistance=5, mask=mask)
+        if points is None or len(points) < 4:
+            return None
+        return points.astype(np.float32)
+
+    def _track(self, small):
+        prev_points = self._points
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_small, small, prev_points, None, **self.lk_params)
+        if next_points is None:
+            return 0.0
+        # Verificação ida-e-volta: descarta pontos cujo fluxo reverso não retorna à origem
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(small, self._prev_small, next_points, None, **self.lk_params)
+        fb_error = np.linalg.norm((prev_points - back_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+        if np.count_nonzero(good) < 4:
+            return 0.0
+
+        old, new = prev_points[good], next_points[good]
+        H, inliers = cv2.findHomography(old, new, cv2.RANSAC, 2.0)
+        if H is None:
+            return 0.0
+        inliers = inliers.ravel().astype(bool)
+
+        corners_small = cv2.perspectiveTransform((self.corners * self.track_scale).reshape(-1, 1, 2), H)
+        self.corners = corners_small.reshape(4, 2) / self.track_scale
+        self._points = new[inliers].reshape(-1, 1, 2)
+        return np.count_nonzero(inliers) / max(self._initial_points, 1)
+
+    def _downscale(self, gray_frame):
+        if self.track_scale == 1.0:
+            return gray_frame
+        return cv2.resize(gray_frame, None, fx=self.track_scale, fy=self.track_scale, interpolation=cv2.INTER_AREA)
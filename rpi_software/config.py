@@ -9,4 +9,4 @@ MQTT_PORT = 1883
 # Porta Serial para comunicacao com o ESP32
 # No RPi Zero 2W é '/dev/ttyS0'
 SERIAL_PORT = '/dev/ttyS0'
-SERIAL_BAUD_RATE = 115200
+SERIAL_BAUD_RATE = 460800
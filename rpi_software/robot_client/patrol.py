@@ -0,0 +1,307 @@
+import re
+import math
+import time
+import json
+import logging
+import threading
+
+logger = logging.getLogger("RobotClient.Patrol")
+
+# --- ROTEIRO ---
+# Um passo por linha ou separados por vírgula; '#' inicia um comentário:
+#   forward 1 m, turn 90°, forward 50 cm
+#   left 90          (giro no lugar, anti-horário)
+#   right 45 deg     (giro no lugar, horário)
+#   backward 0.3
+#   wait 2 s
+# "turn" usa a convenção da odometria: ângulo positivo é anti-horário.
+
+_STEP_RE = re.compile(r'^(forward|backward|turn|left|right|wait)\s+(-?\d+(?:\.\d+)?)\s*(m|cm|mm|°|deg|s)?$')
+_UNIT_SCALE = {'cm': 0.01, 'mm': 0.001}
+
+class PatrolStep:
+    __slots__ = ('kind', 'amount')
+
+    def __init__(self, kind, amount):
+        self.kind = kind        # "drive" (metros, negativo = ré), "turn" (graus, positivo = anti-horário) ou "wait" (s)
+        self.amount = amount
+
+    def __str__(self):
+        if self.kind == "drive":
+            return f"{'forward' if self.amount >= 0 else 'backward'} {abs(self.amount):.2f} m"
+        if self.kind == "turn":
+            return f"turn {self.amount:.0f}°"
+        return f"wait {self.amount:.1f} s"
+
+
+def parse_route(text):
+    """Converte o texto do roteiro em uma lista de PatrolStep; lança ValueError na primeira linha inválida."""
+    steps = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.split('#', 1)[0]
+        for item in line.split(','):
+            item = item.strip().lower()
+            if not item:
+                continue
+            match = _STEP_RE.match(item)
+            if not match:
+                raise ValueError(f"Passo invalido na linha {line_number}: '{item}'")
+            word, value, unit = match.group(1), float(match.group(2)), match.group(3)
+            if word in ("forward", "backward"):
+                meters = value * _UNIT_SCALE.get(unit, 1.0)
+                steps.append(PatrolStep("drive", -meters if word == "backward" else meters))
+            elif word == "wait":
+                steps.append(PatrolStep("wait", value))
+            else:
+                steps.append(PatrolStep("turn", -value if word == "right" else value))
+    if not steps:
+        raise ValueError("Roteiro vazio")
+    return steps
+
+
+# --- EXECUTOR ---
+class PatrolExecutor:
+    """
+    Executa um roteiro no próprio robô, fechando o laço com a telemetria que
+    chega pela UART (encoders e giroscópio), pacote a pacote. Só o comando
+    de partida e o progresso passam pelo MQTT, então a precisão de cada
+    passo e a taxa do laço não dependem da latência da rede.
+
+    O firmware aceita apenas frente, ré e giro no lugar com uma velocidade
+    comum às duas rodas, então cada passo é uma reta ou um giro. Os encoders
+    não medem o sentido: a distância de cada roda vem da contagem e o sinal
+    do comando em andamento. O giro é medido pelo giroscópio ou, com
+    `heading_source="encoders"`, pela soma dos arcos das rodas dividida pela
+    bitola.
+
+    A contagem precisa das amostras brutas de cada 5 ms do protocolo v2
+    (telemetry_protocol.py): no v1, os encoders chegavam como média móvel
+    truncada, com metade das amostras perdidas, e as distâncias somadas
+    ficavam muito abaixo das reais. O robot_client só repassa ao executor
+    amostras v2, e `start` recusa o roteiro se não houver amostras recentes.
+
+    Segurança: se a telemetria parar por mais de `telemetry_timeout_s`
+    (verificado por `check`, na thread do deadman), o relógio do ESP32 voltar
+    ou um passo passar de `step_timeout_s`, o roteiro é abortado e o robô
+    parado. Qualquer comando manual do dashboard também o aborta.
+    """
+    def __init__(self, drive, publish_status, meters_per_count, wheel_base_m, heading_source="encoders",
+                 gyro_scale=1.0, speed=70, turn_speed=70, approach_speed=45, approach_zone_m=0.15,
+                 approach_zone_deg=20.0, stop_lead_m=0.02, stop_lead_deg=5.0, settle_s=0.5,
+                 telemetry_timeout_s=0.3, step_timeout_s=15.0, status_interval_s=0.2):
+        self.drive = drive                      # drive(left, right): envia o comando às rodas
+        self.publish_status = publish_status    # publish_status(payload_json)
+        self.meters_per_count = meters_per_count
+        self.wheel_base_m = wheel_base_m
+        self.heading_source = heading_source
+        self.gyro_scale = gyro_scale
+        self.speed = speed
+        self.turn_speed = turn_speed
+        self.approach_speed = approach_speed
+        self.approach_zone_m = approach_zone_m
+        self.approach_zone_deg = approach_zone_deg
+        self.stop_lead_m = stop_lead_m          # Distância percorrida na rampa de parada do firmware
+        self.stop_lead_deg = stop_lead_deg
+        self.settle_s = settle_s
+        self.telemetry_timeout_s = telemetry_timeout_s
+        self.step_timeout_s = step_timeout_s
+        self.status_interval_s = status_interval_s
+
+        self._lock = threading.Lock()
+        self.state = "idle"                     # "idle", "running", "done", "aborted" ou "rejected"
+        self.route_name = None
+        self.steps = []
+        self.index = 0
+        self.reason = None
+        self.packets = 0
+        self._last_sample_at = None             # Última amostra da UART, mesmo sem patrulha em andamento
+
+    @property
+    def running(self):
+        return self.state == "running"
+
+    def start(self, steps, route_name="route"):
+        with self._lock:
+            last = self._last_sample_at
+            if last is None or time.monotonic() - last > self.telemetry_timeout_s:
+                # Sem amostras v2 o laço ficaria aberto: os passos só acabariam no step_timeout_s
+                self.route_name = route_name
+                self.state = "rejected"
+                self.reason = "sem telemetria v2 da UART (firmware desatualizado ou ESP32 desconectado)"
+                logger.error(f"Patrulha '{route_name}' recusada: {self.reason}.")
+                self.publish_status(json.dumps({"state": self.state, "route": route_name, "reason": self.reason}))
+                return False
+            self.steps = steps
+            self.route_name = route_name
+            self.index = 0
+            self.reason = None
+            self.packets = 0
+            self.state = "running"
+            self._last_packet_at = time.monotonic()
+            self._last_ts_us = None
+            self._last_status_at = float('-inf')
+            self._started_at = time.monotonic()
+            # Inércia medida na parada de cada tipo de passo (aprendida ao longo do roteiro)
+            self._stop_lead = {"drive": self.stop_lead_m, "turn": self.stop_lead_deg}
+            self._turn_carry = 0.0              # Erro de direção acumulado (graus), descontado no próximo giro
+            self._begin_step(None)
+            logger.info(f"Patrulha '{route_name}' iniciada: {len(steps)} passos.")
+            self._publish(force=True)
+            return True
+
+    def abort(self, reason):
+        with self._lock:
+            self._finish("aborted", reason)
+
+    def on_telemetry(self, timestamp_us, gyro_z, enc_l, enc_r):
+        """Chamado a cada amostra válida da UART."""
+        with self._lock:
+            now = time.monotonic()
+            self._last_sample_at = now
+            if not self.running:
+                return
+            self._last_packet_at = now
+            if self._last_ts_us is not None and timestamp_us <= self._last_ts_us:
+                self._finish("aborted", "relogio do ESP32 voltou (reinicio?)")
+                return
+            dt = 0.0 if self._last_ts_us is None else (timestamp_us - self._last_ts_us) * 1e-6
+            self._last_ts_us = timestamp_us
+            self.packets += 1
+
+            # Tempos dos passos no relógio do ESP32: não sofrem com o escalonamento da Pi
+            robot_s = timestamp_us * 1e-6
+            if self._step_started_at is None:
+                self._step_started_at = robot_s
+            step = self.steps[self.index]
+            # Continua medindo durante a parada: a rampa do firmware ainda move o robô
+            self._accumulate(step, dt, gyro_z, enc_l, enc_r)
+            self._advance(step, robot_s)
+            self._publish()
+
+    def check(self):
+        """Chamado periodicamente (thread do deadman): aborta se a telemetria parou."""
+        with self._lock:
+            if self.running:
+                silent_s = time.monotonic() - self._last_packet_at
+                if silent_s > self.telemetry_timeout_s:
+                    self._finish("aborted", f"sem telemetria da UART ha {silent_s:.2f}s")
+
+    # --- Internos (com o lock) ---
+    def _begin_step(self, now):
+        self._done = 0.0                        # Metros ou graus percorridos no passo
+        self._done_at_stop = None
+        self._settling_until = None
+        self._step_started_at = now
+        if self.index >= len(self.steps):
+            return
+        step = self.steps[self.index]
+        self._target = abs(step.amount)
+        if step.kind == "turn":
+            # Sobras de giros anteriores entram neste: a direção final do roteiro não acumula erro
+            sign = 1 if step.amount >= 0 else -1
+            self._target = max(0.0, self._target - sign * self._turn_carry)
+
+    def _accumulate(self, step, dt, gyro_z, enc_l, enc_r):
+        if step.kind == "drive":
+            self._done += 0.5 * (enc_l + enc_r) * self.meters_per_count
+        elif step.kind == "turn":
+            if self.heading_source == "gyro":
+                self._done += abs(math.degrees(gyro_z * self.gyro_scale * dt))
+            else:
+                # Giro no lugar: cada roda percorre um arco de (ângulo × bitola / 2)
+                arc = (enc_l + enc_r) * self.meters_per_count
+                self._done += math.degrees(arc / self.wheel_base_m)
+
+    def _advance(self, step, now):
+        if self._settling_until is not None:
+            # Parado entre passos: mantém o comando de parada enquanto a rampa termina
+            self._send(0, 0)
+            if now >= self._settling_until:
+                self._end_step(step, now)
+                self.index += 1
+                if self.index >= len(self.steps):
+                    self._finish("done")
+                    return
+                self._begin_step(now)
+            return
+
+        if now - self._step_started_at > self.step_timeout_s and step.kind != "wait":
+            self._finish("aborted", f"passo {self.index + 1} ({step}) excedeu {self.step_timeout_s:.0f}s")
+            return
+
+        if step.kind == "wait":
+            remaining = self._target - (now - self._step_started_at)
+            if remaining <= 0:
+                self._settle(now, 0.0)
+            else:
+                self._send(0, 0)
+            return
+
+        zone = self.approach_zone_m if step.kind == "drive" else self.approach_zone_deg
+        remaining = self._target - self._done
+        if remaining <= self._stop_lead[step.kind]:
+            self._settle(now, self.settle_s)
+            return
+
+        speed = self.approach_speed if remaining < zone else (self.speed if step.kind == "drive" else self.turn_speed)
+        if step.kind == "drive":
+            sign = 1 if step.amount >= 0 else -1
+            self._send(sign * speed, sign * speed)
+        else:
+            # Anti-horário (positivo): roda esquerda para trás, direita para frente
+            sign = 1 if step.amount >= 0 else -1
+            self._send(-sign * speed, sign * speed)
+
+    def _settle(self, now, seconds):
+        self._send(0, 0)
+        self._settling_until = now + seconds
+        self._done_at_stop = self._done
+
+    def _end_step(self, step, now):
+        if step.kind == "wait":
+            return
+        coast = self._done - self._done_at_stop
+        self._stop_lead[step.kind] = coast
+        if step.kind == "turn":
+            sign = 1 if step.amount >= 0 else -1
+            self._turn_carry += sign * self._done - step.amount
+        unit = "m" if step.kind == "drive" else "°"
+        logger.info(f"Passo {self.index + 1}/{len(self.steps)} ({step}) concluido: {self._done:.2f}{unit} "
+                    f"(inercia {coast:.2f}{unit}) em {now - self._step_started_at:.1f}s.")
+
+    def _send(self, left, right):
+        # Repetido a cada pacote: também alimenta o deadman, que para o robô se a UART calar
+        self.drive(left, right)
+
+    def _finish(self, state, reason=None):
+        if not self.running:
+            return
+        self.state = state
+        self.reason = reason
+        self.drive(0, 0)
+        elapsed = time.monotonic() - self._started_at
+        rate = self.packets / elapsed if elapsed > 0 else 0.0
+        if state == "done":
+            logger.info(f"Patrulha '{self.route_name}' concluida em {elapsed:.1f}s (laco a {rate:.0f} Hz).")
+        else:
+            logger.warning(f"Patrulha '{self.route_name}' abortada no passo {self.index + 1}: {reason}.")
+        self._publish(force=True)
+
+    def _publish(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_status_at < self.status_interval_s:
+            return
+        self._last_status_at = now
+        step = self.steps[self.index] if self.index < len(self.steps) else None
+        target = self._target if step is not None and step.kind != "wait" else 0.0
+        payload = {
+            "state": self.state,
+            "route": self.route_name,
+            "step": min(self.index + 1, len(self.steps)),
+            "steps": len(self.steps),
+            "action": str(step) if step is not None else None,
+            "progress": round(min(self._done / target, 1.0), 3) if target else None,
+        }
+        if self.reason:
+            payload["reason"] = self.reason
+        self.publish_status(json.dumps(payload))
@@ -1,13 +1,17 @@
+import os
+import math
 import serial
-import struct
 import json
 import time
 import logging
 import sys
-from functools import reduce
+import threading
 from logging.handlers import RotatingFileHandler
 import paho.mqtt.client as mqtt
 
+from patrol import PatrolExecutor, parse_route
+from telemetry_protocol import TelemetryDecoder
+
 # --- 1. CONFIGURAÇÃO DO LOGGER ---
 log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
 logger = logging.getLogger("RobotClient")
@@ -28,18 +32,42 @@ TOPIC_TELEMETRY_IMU = "robot/tele/imu"
 TOPIC_TELEMETRY_BATTERY = "robot/tele/battery"
 TOPIC_TELEMETRY_ENCODERS = "robot/tele/encoders"
 TOPIC_COMMAND_DRIVE = "robot/cmnd/drive"
+TOPIC_COMMAND_HEARTBEAT = "robot/cmnd/heartbeat"
+TOPIC_COMMAND_PATROL = "robot/cmnd/patrol"
+TOPIC_TELEMETRY_PATROL = "robot/tele/patrol"
+TOPIC_TELEMETRY_LINK = "robot/tele/link"
+
+# TELEMETRIA (a UART traz ~200 amostras/s; o MQTT leva só o necessário ao dashboard)
+TELEMETRY_IMU_INTERVAL_S = 0.02        # IMU publicado a ~50 Hz (última amostra do intervalo)
+TELEMETRY_ENCODER_INTERVAL_S = 0.1     # Amostras de encoder/giroscópio publicadas em lote a cada janela
+TELEMETRY_BATTERY_INTERVAL_S = 1.0     # Bateria (já filtrada no ESP32)
+LINK_STATS_INTERVAL_S = 5.0            # Taxa, perdas e erros de CRC da UART: log e TOPIC_TELEMETRY_LINK
+
+# SEGURANÇA
+DEADMAN_TIMEOUT_S = 0.5    # Sem comandos de direção por este tempo em movimento -> DRIVE:0,0
+LINK_TIMEOUT_S = 3.0       # Sem comandos nem heartbeat por este tempo -> aviso de enlace perdido
 
 # SERIAL
 SERIAL_PORT = '/dev/ttyS0' 
-BAUD_RATE = 115200 
-SOP = b'\xAA\x55' # Start of Packet
-STRUCT_FORMAT = '<qffhiihB'
-STRUCT_SIZE = struct.calcsize(STRUCT_FORMAT)
+BAUD_RATE = 460800          # Mesmo RPI_BAUD_RATE do firmware
+
+# PATRULHA (roteiros executados no próprio robô)
+PATROL_ROUTES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routes")
+WHEEL_DIAMETER_M = 0.065   # Mesma geometria do config.py do dashboard
+WHEEL_BASE_M = 0.15
+ENCODER_PPR = 20
+PATROL_METERS_PER_COUNT = math.pi * WHEEL_DIAMETER_M / ENCODER_PPR  # Calibrar com uma reta de 1 m
+PATROL_HEADING_SOURCE = "encoders"   # "encoders" ou "gyro" (gyro_z × PATROL_GYRO_SCALE em rad/s)
+PATROL_GYRO_SCALE = 1.0
+PATROL_TELEMETRY_TIMEOUT_S = 0.3     # Sem amostras da UART por este tempo -> patrulha abortada
 
 # --- 3. CLASSE PARA GERENCIAR A COMUNICAÇÃO SERIAL ---
 class SerialHandler:
     def __init__(self, port, baudrate):
         self.ser = None
+        # Comandos saem da thread MQTT e da thread do deadman
+        self._write_lock = threading.Lock()
+        self.decoder = TelemetryDecoder()
         try:
             self.ser = serial.Serial(port, baudrate, timeout=1)
             logger.info(f"Porta serial {port} aberta com sucesso.")
@@ -47,63 +75,223 @@ class SerialHandler:
             logger.error(f"Falha ao abrir a porta serial {port}: {e}")
             sys.exit(1)
 
-    def read_telemetry_packet(self):
-        # Procura pelo marcador de início de pacote
-        byte1 = self.ser.read(1)
-        if not byte1 or byte1 != SOP[0:1]: return None
-        byte2 = self.ser.read(1)
-        if not byte2 or byte2 != SOP[1:2]: return None
-        
-        # Lê o pacote de dados
-        packet_buffer = self.ser.read(STRUCT_SIZE)
-        
-        if len(packet_buffer) == STRUCT_SIZE:
-            # Valida o checksum
-            data_bytes = packet_buffer[:-1]
-            received_checksum = packet_buffer[-1]
-            calculated_checksum = reduce(lambda x, y: x ^ y, data_bytes)
-
-            if received_checksum == calculated_checksum:
-                # Desempacota e retorna os dados
-                return struct.unpack(STRUCT_FORMAT, packet_buffer)
-            else:
-                logger.warning(f"Checksum inválido! Recebido: {received_checksum}, Calculado: {calculated_checksum}")
-                return None
-        return None
+    def read_samples(self):
+        """Lê tudo o que está no buffer da serial (bloqueia até 1 byte) e retorna as amostras completas."""
+        data = self.ser.read(max(1, self.ser.in_waiting))
+        return self.decoder.feed(data) if data else []
 
     def send_drive_command(self, left_speed, right_speed):
         command = f"DRIVE:{int(left_speed)},{int(right_speed)}\n"
-        self.ser.write(command.encode('utf-8'))
+        with self._write_lock:
+            self.ser.write(command.encode('utf-8'))
         logger.info(f"Comando enviado para o ESP32: {command.strip()}")
         
     def close(self):
         if self.ser and self.ser.is_open:
-            self.ser.write(b"DRIVE:0,0\n") # Comando de segurança ao fechar
-            self.ser.close()
+            with self._write_lock:
+                self.ser.write(b"DRIVE:0,0\n") # Comando de segurança ao fechar
+                self.ser.close()
             logger.info("Porta serial fechada.")
 
-# --- 4. CALLBACKS MQTT ---
+# --- 4. PUBLICAÇÃO DA TELEMETRIA NO MQTT ---
+class TelemetryPublisher:
+    """
+    Leva as ~200 amostras/s da UART ao dashboard sem uma mensagem MQTT por
+    amostra. A odometria recebe todas: a cada TELEMETRY_ENCODER_INTERVAL_S,
+    o tópico dos encoders leva em arrays o `seq`, o `timestamp_us`, os
+    pulsos e o gyro_z de cada amostra da janela, mais `window_us`, a duração
+    coberta pelos pulsos (desde a última amostra da janela anterior). As
+    janelas usam o relógio do ESP32, então o atraso da Pi não distorce a
+    velocidade. O IMU (para exibição) e a bateria são amostrados a cada
+    intervalo.
+    """
+    def __init__(self, publish, decoder):
+        self.publish = publish                  # publish(topic, payload_json)
+        self.decoder = decoder
+        self._next_imu_us = self._next_battery_us = 0
+        self._window_start_us = None
+        self._window = {"seq": [], "timestamp_us": [], "left": [], "right": [], "gyro_z": []}
+        self._stats_at = time.monotonic()
+        self._stats_samples = self._stats_lost = self._stats_crc = 0
+
+    def on_sample(self, sample):
+        ts = sample.timestamp_us
+        if self._window_start_us is None or ts < self._window_start_us:
+            # Primeira amostra ou reinício do ESP32
+            self._window_start_us = ts
+            self._next_imu_us = self._next_battery_us = ts
+            for values in self._window.values():
+                values.clear()
+        else:
+            # Os pulsos de cada amostra são os dos ~5 ms anteriores a ela
+            window = self._window
+            window["seq"].append(sample.seq)
+            window["timestamp_us"].append(ts)
+            window["left"].append(sample.left)
+            window["right"].append(sample.right)
+            window["gyro_z"].append(round(sample.gyro_z, 4))
+        if ts - self._window_start_us >= TELEMETRY_ENCODER_INTERVAL_S * 1e6:
+            payload = dict(self._window, window_us=ts - self._window_start_us)
+            self.publish(TOPIC_TELEMETRY_ENCODERS, json.dumps(payload))
+            self._window_start_us = ts
+            for values in self._window.values():
+                values.clear()
+
+        if ts >= self._next_imu_us:
+            self._next_imu_us = ts + TELEMETRY_IMU_INTERVAL_S * 1e6
+            self.publish(TOPIC_TELEMETRY_IMU, json.dumps({"pitch": round(sample.pitch, 2), "roll": round(sample.roll, 2),
+                                                          "gyro_z": round(sample.gyro_z, 4)}))
+        if ts >= self._next_battery_us:
+            self._next_battery_us = ts + TELEMETRY_BATTERY_INTERVAL_S * 1e6
+            self.publish(TOPIC_TELEMETRY_BATTERY, json.dumps({"voltage_mv": sample.battery_mv}))
+            logger.debug(f"Telemetria: Bat:{sample.battery_mv}mV, Pitch:{sample.pitch:.1f}, Roll:{sample.roll:.1f}")
+
+    def report_link(self):
+        """Chamado a cada leitura: a cada LINK_STATS_INTERVAL_S, loga e publica o estado da UART."""
+        now = time.monotonic()
+        elapsed = now - self._stats_at
+        if elapsed < LINK_STATS_INTERVAL_S:
+            return
+        d = self.decoder
+        samples, lost, crc = d.samples - self._stats_samples, d.lost - self._stats_lost, d.crc_errors - self._stats_crc
+        loss = lost / (samples + lost) if samples + lost else 0.0
+        stats = {"rate_hz": round(samples / elapsed, 1), "loss_pct": round(100 * loss, 2), "crc_errors": crc,
+                 "lost_total": d.lost, "crc_errors_total": d.crc_errors, "restarts_total": d.restarts}
+        log = logger.warning if lost or crc else logger.info
+        log(f"UART: {stats['rate_hz']} amostras/s, {lost} perdidas ({stats['loss_pct']}%), {crc} erros de CRC.")
+        self.publish(TOPIC_TELEMETRY_LINK, json.dumps(stats))
+        self._stats_at = now
+        self._stats_samples, self._stats_lost, self._stats_crc = d.samples, d.lost, d.crc_errors
+
+# --- 5. SEGURANÇA DOS COMANDOS (DEADMAN) ---
+class DriveSafety:
+    """
+    Repassa os comandos de direção ao ESP32 e garante a parada quando eles
+    deixam de chegar. O dashboard republica o setpoint em taxa fixa enquanto
+    o robô se move; se nenhum comando chegar em DEADMAN_TIMEOUT_S, os motores
+    são parados. Comandos repetidos não são reenviados pela serial.
+    """
+    def __init__(self, serial_handler, timeout_s=DEADMAN_TIMEOUT_S, link_timeout_s=LINK_TIMEOUT_S):
+        self.serial_handler = serial_handler
+        self.timeout_s = timeout_s
+        self.link_timeout_s = link_timeout_s
+        self._lock = threading.Lock()
+        self.current = (0, 0)
+        now = time.monotonic()
+        self.last_command_at = now
+        self.last_message_at = now
+        self.link_ok = True
+
+    def on_drive(self, left, right):
+        with self._lock:
+            now = time.monotonic()
+            self.last_command_at = self.last_message_at = now
+            self._apply(left, right)
+
+    def on_local_drive(self, left, right):
+        """Comando gerado no próprio robô (patrulha): alimenta o deadman, não o monitor do enlace."""
+        with self._lock:
+            self.last_command_at = time.monotonic()
+            self._apply(left, right)
+
+    def _apply(self, left, right):
+        if (left, right) != self.current:
+            self.serial_handler.send_drive_command(left, right)
+            self.current = (left, right)
+
+    def on_heartbeat(self):
+        with self._lock:
+            self.last_message_at = time.monotonic()
+
+    def stop_now(self, reason):
+        with self._lock:
+            if self.current != (0, 0):
+                logger.warning(f"Parando os motores: {reason}.")
+                self.serial_handler.send_drive_command(0, 0)
+                self.current = (0, 0)
+
+    def check(self):
+        """Chamado periodicamente pela thread do deadman."""
+        now = time.monotonic()
+        if now - self.last_command_at > self.timeout_s:
+            self.stop_now(f"nenhum comando de direção há {now - self.last_command_at:.2f}s (deadman)")
+
+        silent_s = now - self.last_message_at
+        if self.link_ok and silent_s > self.link_timeout_s:
+            self.link_ok = False
+            logger.warning(f"Sem comandos nem heartbeat do dashboard há {silent_s:.1f}s.")
+        elif not self.link_ok and silent_s <= self.link_timeout_s:
+            self.link_ok = True
+            logger.info("Comunicação com o dashboard restabelecida.")
+
+def deadman_loop(safety, patrol, stop_event, period_s=0.05):
+    while not stop_event.wait(period_s):
+        patrol.check()
+        safety.check()
+
+# --- 6. PATRULHA ---
+def handle_patrol_command(patrol, payload):
+    """
+    {"action": "start", "route": "<nome em routes/>"} ou {"action": "start", "steps": "<roteiro>"};
+    {"action": "stop"} aborta a patrulha em andamento.
+    """
+    action = payload.get('action')
+    if action == "stop":
+        patrol.abort("interrompida pelo dashboard")
+        return
+    if action != "start":
+        logger.error(f"Acao de patrulha desconhecida: {action}")
+        return
+    try:
+        if 'steps' in payload:
+            name, text = "inline", payload['steps']
+        else:
+            name = os.path.basename(str(payload['route']))
+            with open(os.path.join(PATROL_ROUTES_DIR, name if name.endswith('.txt') else name + '.txt')) as f:
+                text = f.read()
+        steps = parse_route(text)
+    except (KeyError, OSError, ValueError) as e:
+        logger.error(f"Roteiro de patrulha invalido: {e}")
+        return
+    patrol.start(steps, name)
+
+# --- 7. CALLBACKS MQTT ---
 def on_connect(client, userdata, flags, reason_code, properties):
     if reason_code.is_failure:
         logger.warning(f"Falha ao conectar ao broker: {reason_code}")
     else:
         logger.info("Conectado com sucesso ao Broker MQTT.")
-        logger.info(f"Inscrevendo-se no tópico de comandos: {TOPIC_COMMAND_DRIVE}")
-        client.subscribe(TOPIC_COMMAND_DRIVE)
+        logger.info(f"Inscrevendo-se nos tópicos de comandos: {TOPIC_COMMAND_DRIVE}, {TOPIC_COMMAND_HEARTBEAT}, "
+                    f"{TOPIC_COMMAND_PATROL}")
+        client.subscribe([(TOPIC_COMMAND_DRIVE, 0), (TOPIC_COMMAND_HEARTBEAT, 0), (TOPIC_COMMAND_PATROL, 1)])
 
 def on_message(client, userdata, msg):
     """Callback para quando um comando é recebido via MQTT."""
-    serial_handler = userdata['serial_handler']
+    safety = userdata['safety']
+    patrol = userdata['patrol']
     
     try:
+        if msg.topic == TOPIC_COMMAND_HEARTBEAT:
+            # O heartbeat só alimenta o monitor do enlace; nunca vai para a serial
+            safety.on_heartbeat()
+            return
+
         payload = msg.payload.decode()
-        logger.info(f"Comando MQTT recebido | Tópico: '{msg.topic}' | Payload: {payload}")
+        # O dashboard republica o setpoint em taxa fixa: log detalhado só em debug
+        logger.debug(f"Comando MQTT recebido | Tópico: '{msg.topic}' | Payload: {payload}")
         
         data = json.loads(payload)
-        left = data.get('left', 0)
-        right = data.get('right', 0)
-        
-        serial_handler.send_drive_command(left, right)
+        if msg.topic == TOPIC_COMMAND_PATROL:
+            handle_patrol_command(patrol, data)
+            return
+
+        left = int(data.get('left', 0))
+        right = int(data.get('right', 0))
+
+        # O comando manual sempre tem prioridade sobre a patrulha
+        if patrol.running:
+            patrol.abort("comando manual do dashboard")
+        safety.on_drive(left, right)
         
     except json.JSONDecodeError:
         logger.error(f"Erro ao decodificar JSON do payload: {msg.payload}")
@@ -112,17 +300,34 @@ def on_message(client, userdata, msg):
 
 def on_disconnect(client, userdata, flags, reason_code, properties):
     logger.warning(f"Desconectado do broker! Motivo: {reason_code}")
+    # A patrulha não depende do broker: segue com a telemetria local
+    if not userdata['patrol'].running:
+        userdata['safety'].stop_now("desconectado do broker")
 
-# --- 5. LÓGICA PRINCIPAL ---
+# --- 8. LÓGICA PRINCIPAL ---
 if __name__ == "__main__":
     logger.info("Iniciando cliente do robô (ponte Serial-MQTT)...")
 
     # Inicializa o handler da serial
     serial_handler = SerialHandler(SERIAL_PORT, BAUD_RATE)
     
-    # Inicializa o cliente MQTT e passa o handler da serial para os callbacks
-    user_data = {'serial_handler': serial_handler}
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, userdata=user_data)
+    # Deadman: para os motores se os comandos de direção deixarem de chegar
+    safety = DriveSafety(serial_handler)
+
+    # Patrulha: fecha o laço com a telemetria da UART e só publica o progresso
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    patrol = PatrolExecutor(safety.on_local_drive, lambda payload: client.publish(TOPIC_TELEMETRY_PATROL, payload),
+                            PATROL_METERS_PER_COUNT, WHEEL_BASE_M, heading_source=PATROL_HEADING_SOURCE,
+                            gyro_scale=PATROL_GYRO_SCALE, telemetry_timeout_s=PATROL_TELEMETRY_TIMEOUT_S)
+
+    # Telemetria: cada amostra vai para a patrulha; o MQTT recebe uma versão reduzida
+    publisher = TelemetryPublisher(client.publish, serial_handler.decoder)
+
+    stop_event = threading.Event()
+    threading.Thread(target=deadman_loop, args=(safety, patrol, stop_event), daemon=True).start()
+
+    # Passa o handler da serial, o deadman e a patrulha para os callbacks
+    client.user_data_set({'serial_handler': serial_handler, 'safety': safety, 'patrol': patrol})
     client.on_connect = on_connect
     client.on_message = on_message
     client.on_disconnect = on_disconnect
@@ -132,26 +337,12 @@ if __name__ == "__main__":
         client.loop_start() # Inicia o loop MQTT em uma thread separada
 
         while True:
-            # O loop principal agora lê da serial e publica no MQTT
-            telemetry_data = serial_handler.read_telemetry_packet()
-            
-            if telemetry_data:
-                # Desempacota os dados com nomes claros
-                (timestamp, pitch, roll, gyro_z, 
-                 enc_l, enc_r, battery_mv, checksum) = telemetry_data
-
-                # Cria e publica os payloads JSON
-                imu_payload = json.dumps({"pitch": round(pitch, 2), "roll": round(roll, 2), "gyro_z": gyro_z})
-                battery_payload = json.dumps({"voltage_mv": battery_mv})
-                encoders_payload = json.dumps({"left": enc_l, "right": enc_r, "timestamp_us": timestamp})
-                
-                client.publish(TOPIC_TELEMETRY_IMU, imu_payload)
-                client.publish(TOPIC_TELEMETRY_BATTERY, battery_payload)
-                client.publish(TOPIC_TELEMETRY_ENCODERS, encoders_payload)
-                
-                logger.debug(f"Telemetria publicada: Bat:{battery_mv}mV, Pitch:{pitch:.1f}, Roll:{roll:.1f}")
-            
-            time.sleep(0.005)
+            # O loop principal lê da serial e publica no MQTT
+            for sample in serial_handler.read_samples():
+                # A patrulha usa cada amostra assim que chega, antes da publicação
+                patrol.on_telemetry(sample.timestamp_us, sample.gyro_z, sample.left, sample.right)
+                publisher.on_sample(sample)
+            publisher.report_link()
 
     except KeyboardInterrupt:
         logger.info("Sinal de interrupção recebido. Desligando...")
@@ -159,6 +350,7 @@ if __name__ == "__main__":
         logger.critical(f"Erro fatal na thread principal: {e}")
     finally:
         logger.info("Encerrando conexões...")
+        stop_event.set()
         client.loop_stop()
         client.disconnect()
         serial_handler.close()
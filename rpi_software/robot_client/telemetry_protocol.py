@@ -0,0 +1,114 @@
+import struct
+import binascii
+from collections import namedtuple
+
+# --- PROTOCOLO DE TELEMETRIA v2 (ESP32 -> RPi) ---
+# Quadro: SOP (0xAA 0x55) | versão (u8) | n amostras (u8) | n × amostra | CRC-16 (u16, little-endian)
+# O CRC-16/CCITT-FALSE (polinômio 0x1021, início 0xFFFF) cobre da versão ao fim das amostras.
+# A amostra espelha a struct TelemetrySample de esp32_firmware/include/globals.h.
+
+SOP = b'\xAA\x55'
+VERSION = 2
+MAX_BATCH = 16
+HEADER_SIZE = 4
+CRC_SIZE = 2
+SAMPLE_FORMAT = '<HqfffhhH'
+SAMPLE_SIZE = struct.calcsize(SAMPLE_FORMAT)   # 28 bytes
+
+TelemetrySample = namedtuple('TelemetrySample',
+                             ['seq', 'timestamp_us', 'pitch', 'roll', 'gyro_z', 'left', 'right', 'battery_mv'])
+
+
+def crc16_ccitt(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(samples):
+    """Monta um quadro v2 (usado para testar o decodificador sem o ESP32)."""
+    body = bytes([VERSION, len(samples)]) + b''.join(struct.pack(SAMPLE_FORMAT, *s) for s in samples)
+    return SOP + body + struct.pack('<H', crc16_ccitt(body))
+
+
+class TelemetryDecoder:
+    """
+    Decodifica o fluxo de bytes da UART em amostras, em pedaços de qualquer
+    tamanho (o que estiver no buffer da serial).
+
+    Bytes fora de um quadro válido são descartados até o próximo SOP; um
+    quadro com versão, tamanho ou CRC inválidos descarta só o SOP, para
+    ressincronizar mesmo que o SOP tenha aparecido por acaso no meio dos
+    dados. As lacunas em `seq` (contador de 16 bits do firmware) contam as
+    amostras perdidas: na UART ou na fila cheia do ESP32. Um `timestamp_us`
+    que não avança indica reinício do ESP32: a contagem recomeça sem somar
+    perda, por maior ou menor que seja o salto em `seq`.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._last_seq = None
+        self._last_ts_us = None
+        self.restarts = 0
+        self.samples = 0
+        self.lost = 0
+        self.crc_errors = 0
+        self.bad_frames = 0                     # Versão ou número de amostras inválidos
+        self.discarded_bytes = 0
+
+    def feed(self, data):
+        """Acrescenta os bytes recebidos e retorna a lista de amostras completas."""
+        buffer = self._buffer
+        buffer.extend(data)
+        samples = []
+        while True:
+            start = buffer.find(SOP)
+            if start < 0:
+                # Guarda o último byte: pode ser a primeira metade do próximo SOP
+                keep = 1 if buffer[-1:] == SOP[:1] else 0
+                self.discarded_bytes += len(buffer) - keep
+                del buffer[:len(buffer) - keep]
+                break
+            if start:
+                self.discarded_bytes += start
+                del buffer[:start]
+            if len(buffer) < HEADER_SIZE:
+                break
+
+            version, count = buffer[2], buffer[3]
+            if version != VERSION or not 1 <= count <= MAX_BATCH:
+                self._resync()
+                self.bad_frames += 1
+                continue
+            frame_size = HEADER_SIZE + count * SAMPLE_SIZE + CRC_SIZE
+            if len(buffer) < frame_size:
+                break
+
+            body = bytes(buffer[2:frame_size - CRC_SIZE])
+            received_crc = buffer[frame_size - 2] | (buffer[frame_size - 1] << 8)
+            if crc16_ccitt(body) != received_crc:
+                self._resync()
+                self.crc_errors += 1
+                continue
+
+            for offset in range(2, len(body), SAMPLE_SIZE):
+                samples.append(self._track(TelemetrySample._make(struct.unpack_from(SAMPLE_FORMAT, body, offset))))
+            del buffer[:frame_size]
+        return samples
+
+    @property
+    def loss_ratio(self):
+        expected = self.samples + self.lost
+        return self.lost / expected if expected else 0.0
+
+    def _resync(self):
+        self.discarded_bytes += len(SOP)
+        del self._buffer[:len(SOP)]
+
+    def _track(self, sample):
+        if self._last_seq is not None:
+            if sample.timestamp_us <= self._last_ts_us:
+                self.restarts += 1
+            else:
+                self.lost += (sample.seq - self._last_seq - 1) & 0xFFFF
+        self._last_seq = sample.seq
+        self._last_ts_us = sample.timestamp_us
+        self.samples += 1
+        return sample
@@ -1,11 +1,16 @@
+import os
+import sys
 import serial
-import struct
 import time
 import threading
 
+# Decodificador do protocolo de telemetria v2 (o mesmo do robot_client.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "robot_client"))
+from telemetry_protocol import TelemetryDecoder
+
 # Tenta abrir a porta serial. No RPi Zero 2W é '/dev/ttyS0'.
 SERIAL_PORT = "/dev/ttyS0"
-BAUD_RATE = 115200
+BAUD_RATE = 460800
 
 ser = None
 try:
@@ -16,36 +21,22 @@ except serial.SerialException as e:
     print("Verifique as conexões, permissões (sudo) e configurações do RPi (raspi-config).")
     exit()
 
-# --- FORMATO DA STRUCT SEM O CHECKSUM ---
-# Formato original: '<B q f f h i i H B'
-TELEMETRY_FORMAT = '<B q f f h i i H'
-TELEMETRY_SIZE = struct.calcsize(TELEMETRY_FORMAT)
-
 # --- Função para Receber e Decodificar Telemetria (em uma thread separada) ---
 def read_telemetry():
-    """Lê e decodifica os pacotes binários de telemetria do ESP32."""
+    """Lê e decodifica os quadros binários de telemetria do ESP32."""
     print("Thread de telemetria iniciada. Aguardando dados...")
+    decoder = TelemetryDecoder()
     while True:
         if not ser or not ser.is_open:
             break
 
         try:
-            start_byte = ser.read(1)
-            if start_byte == b'\xaa':
-                packet_data = ser.read(TELEMETRY_SIZE - 1)
-                
-                if len(packet_data) == TELEMETRY_SIZE - 1:
-                    full_packet = start_byte + packet_data
-                    
-                    try:
- 
-                        unpacked_data = struct.unpack(TELEMETRY_FORMAT, full_packet)
-                        start, ts, pitch, roll, gz, enc_l, enc_r, batt = unpacked_data
-                        
-                        print(f"\r\033[KTelemetria: Pitch={pitch:6.2f}, Roll={roll:6.2f}, EncL={enc_l:6d}, EncR={enc_r:6d}, Batt={batt/1000.0:.2f}V | Digite o comando: ", end="")
-
-                    except struct.error:
-                        print("\r\033[KErro ao desempacotar os dados.", end="")
+            samples = decoder.feed(ser.read(max(1, ser.in_waiting)))
+            if samples:
+                s = samples[-1]
+                print(f"\r\033[KTelemetria: Seq={s.seq:5d}, Pitch={s.pitch:6.2f}, Roll={s.roll:6.2f}, GyroZ={s.gyro_z:6.3f}, "
+                      f"EncL={s.left:3d}, EncR={s.right:3d}, Batt={s.battery_mv/1000.0:.2f}V | "
+                      f"Perdas={100 * decoder.loss_ratio:.2f}%, CRC={decoder.crc_errors} | Digite o comando: ", end="")
         
         except serial.SerialException:
             print("\nErro na porta serial. Encerrando thread de telemetria.")
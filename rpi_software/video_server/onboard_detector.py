@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- TEMPLATE PRÉ-CALCULADO ---
+class OrbTemplate:
+    """
+    Keypoints e descritores ORB de uma imagem de referência.
+
+    Calculados uma vez a partir da imagem e guardados em um `.npz` ao lado
+    dela, chaveado pelo conteúdo do arquivo; nas próximas execuções o
+    servidor só lê o `.npz`. Também aceita um `.npz` gerado em outra máquina
+    (veja `--build` no fim deste arquivo).
+    """
+    def __init__(self, template_id, shape, points, descriptors):
+        self.template_id = template_id
+        self.shape = tuple(int(v) for v in shape)
+        self.points = points            # array (N, 2) float32
+        self.descriptors = descriptors  # array (N, 32) uint8
+        h, w = shape
+        self.corners = np.float32([[0, 0], [0, h - 1], [w - 1, h - 1], [w - 1, 0]]).reshape(-1, 1, 2)
+
+    @classmethod
+    def load(cls, path, nfeatures=500):
+        template_id = os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(".npz"):
+            return cls._from_npz(template_id, path)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(b"orb-%d:" % nfeatures + data).hexdigest()[:16]
+        cache_path = os.path.splitext(path)[0] + f".orb-{digest}.npz"
+        if os.path.exists(cache_path):
+            return cls._from_npz(template_id, cache_path)
+
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Nao foi possivel carregar o template '{path}'")
+        template = cls.compute(template_id, image, nfeatures)
+        template.save(cache_path)
+        return template
+
+    @classmethod
+    def compute(cls, template_id, image, nfeatures=500):
+        orb = cv2.ORB_create(nfeatures=nfeatures)
+        keypoints, descriptors = orb.detectAndCompute(image, None)
+        if descriptors is None or len(keypoints) < 4:
+            raise ValueError(f"Template '{template_id}' sem pontos de caracteristica suficientes")
+        return cls(template_id, image.shape, cv2.KeyPoint_convert(keypoints), descriptors)
+
+    @classmethod
+    def _from_npz(cls, template_id, path):
+        with np.load(path) as data:
+            return cls(template_id, tuple(data['shape']), data['points'], data['descriptors'])
+
+    def save(self, path):
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(f, shape=np.int32(self.shape), points=self.points, descriptors=self.descriptors)
+        os.replace(path + ".tmp", path)
+
+
+# --- DETECTOR ---
+class OrbDetector:
+    """
+    Detector barato para a Pi: ORB no frame de baixa resolução, matching
+    por força bruta (Hamming) com ratio test e homografia RANSAC.
+    """
+    def __init__(self, template, nfeatures=300, ratio=0.8, min_matches=10, ransac_threshold=3.0):
+        self.template = template
+        self.orb = cv2.ORB_create(nfeatures=nfeatures)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        self.ratio = ratio
+        self.min_matches = min_matches
+        self.ransac_threshold = ransac_threshold
+
+    def detect(self, gray):
+        """Retorna (cantos (4, 2), inliers, matches) ou None."""
+        keypoints, descriptors = self.orb.detectAndCompute(gray, None)
+        if descriptors is None or len(keypoints) < self.min_matches:
+            return None
+
+        pairs = self.matcher.knnMatch(self.template.descriptors, descriptors, k=2)
+        good = [m for m, n in (p for p in pairs if len(p) == 2) if m.distance < self.ratio * n.distance]
+        if len(good) < self.min_matches:
+            return None
+
+        src_pts = self.template.points[[m.queryIdx for m in good]].reshape(-1, 1, 2)
+        dst_pts = cv2.KeyPoint_convert(keypoints)[[m.trainIdx for m in good]].reshape(-1, 1, 2)
+        M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, self.ransac_threshold)
+        if M is None:
+            return None
+        inliers = int(mask.sum())
+        corners = cv2.perspectiveTransform(self.template.corners, M).reshape(4, 2)
+        # Homografias degeneradas (quadrilátero torcido) são falsos positivos típicos do ORB
+        if inliers < self.min_matches or not cv2.isContourConvex(corners.astype(np.float32)):
+            return None
+        return corners, inliers, len(good)
+
+
+# --- THREAD DE DETECÇÃO ---
+class DetectionThread(threading.Thread):
+    """
+    Lê o stream de baixa resolução da câmera em até `max_hz` frames por
+    segundo, roda o OrbDetector e publica só as detecções, no máximo uma a
+    cada `publish_interval_s`.
+
+    `grab_gray` é uma função que bloqueia até o próximo frame e retorna
+    (imagem em tons de cinza, timestamp_us, seq): o início da exposição no
+    relógio de parede e a sequência do frame na câmera, publicados com a
+    detecção para casá-la com o frame do stream MJPEG. A cada `stats_interval_s`, o
+    fps, o tempo médio por frame e o uso de CPU do processo vão para o log,
+    para medir o orçamento de CPU no próprio hardware.
+    """
+    def __init__(self, grab_gray, detector, publish, max_hz=5.0, publish_interval_s=0.5, stats_interval_s=30.0):
+        super().__init__(daemon=True, name="DetectionThread")
+        self.grab_gray = grab_gray
+        self.detector = detector
+        self.publish = publish
+        self.period_s = 1.0 / max_hz
+        self.publish_interval_s = publish_interval_s
+        self.stats_interval_s = stats_interval_s
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        logger.info("Deteccao embarcada iniciada.")
+        last_publish = 0.0
+        stats_start = time.monotonic()
+        cpu_start = sum(os.times()[:2])
+        frames, busy_s = 0, 0.0
+
+        while not self._stop_event.is_set():
+            cycle_start = time.monotonic()
+            try:
+                gray, timestamp_us, seq = self.grab_gray()
+                result = self.detector.detect(gray)
+            except Exception as e:
+                logger.error(f"Erro na deteccao embarcada: {e}")
+                self._stop_event.wait(1.0)
+                continue
+            frames += 1
+            now = time.monotonic()
+            busy_s += now - cycle_start
+
+            if result is not None and now - last_publish >= self.publish_interval_s:
+                last_publish = now
+                self.publish(self._message(result, gray.shape, timestamp_us, seq))
+
+            if now - stats_start >= self.stats_interval_s:
+                cpu_s = sum(os.times()[:2]) - cpu_start
+                elapsed = now - stats_start
+                logger.info(f"Deteccao embarcada: {frames / elapsed:.1f} fps, {1000 * busy_s / max(frames, 1):.1f} ms/frame, "
+                            f"CPU do processo {100 * cpu_s / elapsed:.0f}% (inclui o servidor de video).")
+                stats_start, cpu_start = now, sum(os.times()[:2])
+                frames, busy_s = 0, 0.0
+
+            # Limita a taxa: o restante do período fica livre para o encoder e o streaming
+            self._stop_event.wait(max(0.0, self.period_s - (time.monotonic() - cycle_start)))
+
+    def _message(self, result, shape, timestamp_us, seq):
+        corners, inliers, matches = result
+        h, w = shape[:2]
+        # Coordenadas normalizadas (0..1) na orientação do sensor, independentes da resolução
+        norm = corners / np.float32([w, h])
+        x_min, y_min = norm.min(axis=0).clip(0, 1)
+        x_max, y_max = norm.max(axis=0).clip(0, 1)
+        return json.dumps({
+            "seq": seq,
+            "timestamp_us": timestamp_us,
+            "template": self.detector.template.template_id,
+            "box": [round(float(v), 4) for v in (x_min, y_min, x_max, y_max)],
+            "corners": [[round(float(x), 4), round(float(y), 4)] for x, y in norm],
+            "score": round(inliers / matches, 3),
+            "inliers": inliers,
+        }, separators=(',', ':'))
+
+
+if __name__ == "__main__":
+    # Pré-calcula o template fora da Pi:
+    #   python onboard_detector.py --build <imagem> <saida.npz>
+    if len(sys.argv) == 4 and sys.argv[1] == "--build":
+        image = cv2.imread(sys.argv[2], cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            sys.exit(f"Nao foi possivel carregar '{sys.argv[2]}'")
+        template = OrbTemplate.compute(os.path.splitext(os.path.basename(sys.argv[2]))[0], image)
+        template.save(sys.argv[3])
+        print(f"{len(template.points)} keypoints salvos em {sys.argv[3]}")
+    else:
+        print("Uso: python onboard_detector.py --build <imagem> <saida.npz>")
@@ -0,0 +1,269 @@
+import os
+import queue
+import struct
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- FORMATO DO ÍNDICE ---
+# Cada frame gravado ocupa uma entrada fixa no arquivo .idx:
+#   timestamp_us (uint64) | offset no .mjpeg (uint32) | tamanho em bytes (uint32)
+INDEX_FORMAT = '<QII'
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_FORMAT)
+
+SEGMENT_PREFIX = "seg_"
+SEGMENT_DATA_EXT = ".mjpeg"
+SEGMENT_INDEX_EXT = ".idx"
+
+
+class Segment:
+    """Metadados de um segmento gravado em disco (dados + índice)."""
+    def __init__(self, directory, start_us):
+        self.start_us = start_us
+        base = os.path.join(directory, f"{SEGMENT_PREFIX}{start_us}")
+        self.data_path = base + SEGMENT_DATA_EXT
+        self.index_path = base + SEGMENT_INDEX_EXT
+
+    def size_bytes(self):
+        total = 0
+        for path in (self.data_path, self.index_path):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def read_index(self):
+        """Retorna a lista de entradas (timestamp_us, offset, length) do segmento."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return []
+        # Descarta uma eventual entrada incompleta (gravação interrompida)
+        usable = len(raw) - (len(raw) % INDEX_ENTRY_SIZE)
+        return list(struct.iter_unpack(INDEX_FORMAT, raw[:usable]))
+
+    def delete(self):
+        for path in (self.data_path, self.index_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class SegmentRecorder:
+    """
+    Grava o stream MJPEG já codificado em segmentos limitados por tempo.
+
+    O método `write` é chamado pela thread do encoder e apenas enfileira a
+    referência ao buffer produzido pelo encoder (sem cópia nem recodificação).
+    Uma thread dedicada escreve os buffers em disco, mantém o índice compacto
+    de offsets/timestamps e rotaciona os segmentos respeitando a cota de disco.
+    Se o disco não acompanhar, frames de gravação são descartados em vez de
+    bloquear o encoder, preservando a taxa de quadros do stream ao vivo.
+
+    Dados e índice são descarregados a cada frame, para que `list_segments`
+    e `iter_frames` enxerguem o segmento ativo até o último frame (o trecho
+    que mais interessa após uma queda do Wi-Fi). Depois de um erro de
+    escrita (disco cheio, cartão removido), a gravação pausa por
+    `error_backoff_s`, dobrando a cada falha seguida até `max_backoff_s`.
+    """
+    def __init__(self, directory, segment_seconds=60, quota_bytes=512 * 1024 * 1024, max_pending=30,
+                 error_backoff_s=2.0, max_backoff_s=60.0):
+        self.directory = directory
+        self.segment_us = int(segment_seconds * 1_000_000)
+        self.quota_bytes = quota_bytes
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._segments = []
+        self._current = None
+        self._data_file = None
+        self._index_file = None
+        self._offset = 0
+        self._is_running = False
+        self._thread = None
+        self.error_backoff_s = error_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._backoff_s = error_backoff_s
+        self._paused_until = None               # time.monotonic() até quando a gravação fica pausada
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_existing_segments()
+
+    # --- API usada pelo encoder ---
+
+    def write(self, buf, timestamp_us=None):
+        """Enfileira o buffer do encoder para gravação. Nunca bloqueia."""
+        if not self._is_running:
+            return
+        if timestamp_us is None:
+            timestamp_us = time.time_ns() // 1000
+        try:
+            self._queue.put_nowait((timestamp_us, buf))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def start(self):
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="SegmentRecorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Gravação local iniciada em '{self.directory}' "
+                    f"(segmentos de {self.segment_us // 1_000_000}s, cota de {self.quota_bytes // (1024 * 1024)} MB).")
+
+    def stop(self):
+        self._is_running = False
+        # Sinal de fim sem bloquear: com a fila cheia, descarta o frame mais antigo para abrir espaço
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+        if self._thread:
+            # Os arquivos são fechados pela própria thread de gravação, ao receber o sinal
+            self._thread.join(timeout=2)
+            if self._thread.is_alive():
+                logger.warning("A thread de gravação não terminou a tempo; o segmento atual pode ficar incompleto.")
+        logger.info(f"Gravação local encerrada ({self.frames_written} frames gravados, "
+                    f"{self.frames_dropped} descartados).")
+
+    # --- Consulta de trechos gravados ---
+
+    def list_segments(self):
+        """Retorna um resumo (início, fim, frames, bytes) de cada segmento."""
+        with self._lock:
+            segments = list(self._segments)
+        summary = []
+        for segment in segments:
+            index = segment.read_index()
+            if not index:
+                continue
+            summary.append({
+                "start_us": index[0][0],
+                "end_us": index[-1][0],
+                "frames": len(index),
+                "bytes": segment.size_bytes(),
+            })
+        return summary
+
+    def iter_frames(self, start_us, end_us):
+        """Gera (timestamp_us, jpeg_bytes) de todos os frames gravados no intervalo."""
+        with self._lock:
+            segments = list(self._segments)
+        for i, segment in enumerate(segments):
+            # O segmento termina, no máximo, onde o próximo começa
+            next_start = segments[i + 1].start_us if i + 1 < len(segments) else None
+            if segment.start_us > end_us or (next_start is not None and next_start < start_us):
+                continue
+            entries = [e for e in segment.read_index() if start_us <= e[0] <= end_us]
+            if not entries:
+                continue
+            try:
+                with open(segment.data_path, 'rb') as f:
+                    for timestamp_us, offset, length in entries:
+                        f.seek(offset)
+                        frame = f.read(length)
+                        if len(frame) == length:
+                            yield timestamp_us, frame
+            except OSError as e:
+                # O segmento pode ter sido removido pela cota durante a leitura
+                logger.warning(f"Falha ao ler o segmento {segment.data_path}: {e}")
+
+    # --- Lógica interna (thread de gravação) ---
+
+    def _load_existing_segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_DATA_EXT):
+                try:
+                    start_us = int(name[len(SEGMENT_PREFIX):-len(SEGMENT_DATA_EXT)])
+                except ValueError:
+                    continue
+                segments.append(Segment(self.directory, start_us))
+        segments.sort(key=lambda s: s.start_us)
+        self._segments = segments
+        self._enforce_quota()
+
+    def _run(self):
+        # Sai só pelo sinal de fim: os frames já enfileirados antes dele ainda são gravados
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            timestamp_us, buf = item
+            if self._paused_until is not None:
+                if time.monotonic() < self._paused_until:
+                    self.frames_dropped += 1
+                    continue
+                self._paused_until = None
+                logger.info("Retomando a gravação local após a pausa por erro de escrita.")
+            try:
+                self._write_frame(timestamp_us, buf)
+                self._backoff_s = self.error_backoff_s
+            except OSError as e:
+                # Sem a pausa, cada frame seguinte abriria um novo par de arquivos e falharia de novo
+                logger.error(f"Erro ao gravar frame em disco: {e}. Gravação pausada por {self._backoff_s:.1f}s.")
+                self.frames_dropped += 1
+                self._close_current()
+                self._paused_until = time.monotonic() + self._backoff_s
+                self._backoff_s = min(2 * self._backoff_s, self.max_backoff_s)
+        self._close_current()
+
+    def _write_frame(self, timestamp_us, buf):
+        if self._current is None or timestamp_us - self._current.start_us >= self.segment_us:
+            self._rotate(timestamp_us)
+
+        length = len(buf)
+        self._data_file.write(buf)
+        # Dados antes do índice: uma entrada visível sempre aponta para bytes já no arquivo
+        self._data_file.flush()
+        self._index_file.write(struct.pack(INDEX_FORMAT, timestamp_us, self._offset, length))
+        self._index_file.flush()
+        self._offset += length
+        self.frames_written += 1
+
+    def _rotate(self, start_us):
+        self._close_current()
+        segment = Segment(self.directory, start_us)
+        self._data_file = open(segment.data_path, 'wb')
+        self._index_file = open(segment.index_path, 'wb')
+        self._offset = 0
+        with self._lock:
+            self._segments.append(segment)
+            self._current = segment
+        self._enforce_quota()
+
+    def _close_current(self):
+        for f in (self._data_file, self._index_file):
+            if f:
+                try:
+                    f.close()
+                except OSError:
+                    pass   # O flush do fechamento falha com o disco cheio; o frame já foi contado como erro
+        self._data_file = None
+        self._index_file = None
+        self._current = None
+
+    def _enforce_quota(self):
+        """Remove os segmentos mais antigos até o total caber na cota."""
+        with self._lock:
+            total = sum(s.size_bytes() for s in self._segments)
+            while total > self.quota_bytes and len(self._segments) > 1:
+                oldest = self._segments[0]
+                if oldest is self._current:
+                    break
+                total -= oldest.size_bytes()
+                oldest.delete()
+                self._segments.pop(0)
+                logger.info(f"Cota de gravação atingida. Segmento removido: {oldest.data_path}")
@@ -1,12 +1,38 @@
-import io
+import json
 import logging
+import os
 import socketserver
+import time
 from http import server
 from threading import Condition
+from urllib.parse import urlparse, parse_qs
 
 from picamera2 import Picamera2
 from picamera2.encoders import JpegEncoder
-from picamera2.outputs import FileOutput
+from picamera2.outputs import Output
+
+from recorder import SegmentRecorder
+
+# --- Configuração da Gravação Local ---
+# Quando habilitada, o stream codificado também é gravado no cartão SD em
+# segmentos, permitindo recuperar trechos perdidos durante quedas do Wi-Fi.
+RECORDING_ENABLED = os.environ.get("TATU_RECORDING", "0") == "1"
+RECORDING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+RECORDING_SEGMENT_SECONDS = 60                 # Duração máxima de cada segmento
+RECORDING_QUOTA_MB = 1024                      # Espaço máximo ocupado pelas gravações
+
+# --- Configuração da Detecção Embarcada ---
+# Quando habilitada, um detector ORB leve roda no próprio robô sobre um stream
+# de baixa resolução da câmera e publica só as detecções via MQTT, sem que o
+# PC precise receber e decodificar o vídeo.
+DETECTION_ENABLED = os.environ.get("TATU_DETECTION", "0") == "1"
+DETECTION_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "bomba_mario.png")
+DETECTION_LORES_SIZE = (320, 180)              # Mesma proporção do stream principal (16:9)
+DETECTION_MAX_HZ = 5                           # Limite de frames analisados por segundo
+DETECTION_PUBLISH_INTERVAL_S = 0.5             # Intervalo mínimo entre publicações
+DETECTION_BROKER_ADDRESS = "littlegreycell.local"
+DETECTION_BROKER_PORT = 1883
+DETECTION_TOPIC = "robot/vision/detection"
 
 # --- Configuração da Página HTML Simples ---
 PAGE = """
@@ -21,23 +47,54 @@ PAGE = """
 </html>
 """
 
+def sensor_wall_time_us(sensor_ns):
+    """SensorTimestamp do libcamera (ns em CLOCK_BOOTTIME) -> relógio de parede da Pi, em µs desde a epoch."""
+    return (sensor_ns + time.time_ns() - time.clock_gettime_ns(time.CLOCK_BOOTTIME)) // 1000
+
 # --- Classe para Lidar com o Streaming ---
 # Esta classe gerencia o envio dos frames da câmera para os clientes conectados
-class StreamingOutput(io.BufferedIOBase):
-    def __init__(self):
+class StreamingOutput(Output):
+    """
+    Recebe cada frame JPEG do encoder com o início da sua exposição no
+    sensor (`timestamp_us`, no relógio de parede da Pi). O encoder entrega
+    o SensorTimestamp relativo ao primeiro frame e guarda a base em
+    `encoder.firsttimestamp` (µs, CLOCK_BOOTTIME); sem esses dados (outras
+    versões do picamera2), usa o horário da entrega pelo encoder.
+    """
+    def __init__(self, recorder=None):
+        super().__init__()
         self.frame = None
+        self.timestamp_us = 0
         self.condition = Condition()
+        self.recorder = recorder
+        self.encoder = None
 
-    def write(self, buf):
+    def outputframe(self, frame, keyframe=True, timestamp=None, *args, **kwargs):
+        timestamp_us = self._capture_time_us(timestamp)
         with self.condition:
-            self.frame = buf
+            self.frame = frame
+            self.timestamp_us = timestamp_us
             self.condition.notify_all()
+        # O mesmo buffer do encoder é repassado ao gravador (sem cópia)
+        if self.recorder:
+            self.recorder.write(frame, timestamp_us)
+
+    def _capture_time_us(self, timestamp):
+        first_us = getattr(self.encoder, "firsttimestamp", None)
+        if timestamp is None or first_us is None:
+            return time.time_ns() // 1000
+        return sensor_wall_time_us((first_us + timestamp) * 1000)
 
 # --- Classe para Lidar com as Requisições HTTP ---
 # Define o que o servidor faz quando alguém acessa ele
 class StreamingHandler(server.BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == '/':
+        url = urlparse(self.path)
+        if url.path == '/recordings':
+            self.send_recordings_list()
+        elif url.path == '/recording.mjpg':
+            self.send_recording(parse_qs(url.query))
+        elif self.path == '/':
             self.send_response(301)
             self.send_header('Location', '/index.html')
             self.end_headers()
@@ -60,9 +117,12 @@ class StreamingHandler(server.BaseHTTPRequestHandler):
                     with output.condition:
                         output.condition.wait()
                         frame = output.frame
+                        timestamp_us = output.timestamp_us
                     self.wfile.write(b'--FRAME\r\n')
                     self.send_header('Content-Type', 'image/jpeg')
                     self.send_header('Content-Length', len(frame))
+                    # Início da exposição no sensor (relógio da Pi), usado pelo dashboard para medir a idade do frame
+                    self.send_header('X-Timestamp-Us', timestamp_us)
                     self.end_headers()
                     self.wfile.write(frame)
                     self.wfile.write(b'\r\n')
@@ -74,18 +134,115 @@ class StreamingHandler(server.BaseHTTPRequestHandler):
             self.send_error(404)
             self.end_headers()
 
+    def send_recordings_list(self):
+        """Lista os segmentos gravados localmente (JSON)."""
+        if not recorder:
+            self.send_error(404, 'Gravacao local desabilitada')
+            return
+        content = json.dumps(recorder.list_segments()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_recording(self, query):
+        """
+        Envia os frames gravados entre 'start' e 'end' (segundos desde a epoch)
+        no mesmo formato multipart do stream ao vivo, sem ritmo de reprodução.
+        """
+        if not recorder:
+            self.send_error(404, 'Gravacao local desabilitada')
+            return
+        try:
+            start_us = int(float(query['start'][0]) * 1_000_000)
+            end_us = int(float(query['end'][0]) * 1_000_000)
+        except (KeyError, ValueError):
+            self.send_error(400, 'Use ?start=<epoch_s>&end=<epoch_s>')
+            return
+
+        self.send_response(200)
+        self.send_header('Cache-Control', 'no-cache, private')
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
+        self.end_headers()
+        try:
+            for timestamp_us, frame in recorder.iter_frames(start_us, end_us):
+                self.wfile.write(b'--FRAME\r\n')
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', len(frame))
+                self.send_header('X-Timestamp-Us', timestamp_us)
+                self.end_headers()
+                self.wfile.write(frame)
+                self.wfile.write(b'\r\n')
+        except Exception as e:
+            logging.warning(
+                'Removed recording client %s: %s',
+                self.client_address, str(e))
+
 # --- Classe para o Servidor ---
 class StreamingServer(socketserver.ThreadingMixIn, server.HTTPServer):
     allow_reuse_address = True
     daemon_threads = True
 
+# --- Detecção Embarcada ---
+def start_detection():
+    """
+    Inicia a thread de detecção sobre o stream 'lores'. Retorna (thread,
+    cliente MQTT) ou (None, None) se algo falhar: o streaming continua.
+    """
+    try:
+        # Importados só aqui: sem a detecção, o servidor não depende do OpenCV
+        import cv2
+        import paho.mqtt.client as mqtt
+        from onboard_detector import OrbTemplate, OrbDetector, DetectionThread
+
+        cv2.setNumThreads(1)   # Deixa os outros núcleos para o encoder e o robot_client
+        detector = OrbDetector(OrbTemplate.load(DETECTION_TEMPLATE))
+    except Exception as e:
+        logging.error(f"Deteccao embarcada desabilitada: {e}")
+        return None, None
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="video_server_detection")
+    client.connect_async(DETECTION_BROKER_ADDRESS, DETECTION_BROKER_PORT, 60)
+    client.loop_start()
+
+    def grab_gray():
+        # O plano Y do YUV420 já é a imagem em tons de cinza; as linhas podem ter padding
+        request = picam2.capture_request()
+        try:
+            yuv = request.make_array("lores")
+            sensor_ns = request.get_metadata()["SensorTimestamp"]
+            # Sequência do frame no sensor (a mesma nos dois streams da requisição)
+            seq = request.request.buffers[picam2.stream_map["lores"]].metadata.sequence
+        finally:
+            request.release()
+        width, height = DETECTION_LORES_SIZE
+        return yuv[:height, :width], sensor_wall_time_us(sensor_ns), seq
+
+    def publish(message):
+        client.publish(DETECTION_TOPIC, message, qos=0)
+
+    thread = DetectionThread(grab_gray, detector, publish,
+                             max_hz=DETECTION_MAX_HZ, publish_interval_s=DETECTION_PUBLISH_INTERVAL_S)
+    thread.start()
+    return thread, client
+
 # --- Execução Principal ---
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
 picam2 = Picamera2()
 # Configura a resolução do vídeo. Use resoluções menores para melhor performance no Pi Zero
-picam2.configure(picam2.create_video_configuration(main={"size": (1280, 720)}))
-output = StreamingOutput()
+lores = {"size": DETECTION_LORES_SIZE, "format": "YUV420"} if DETECTION_ENABLED else None
+picam2.configure(picam2.create_video_configuration(main={"size": (1280, 720)}, lores=lores))
+recorder = None
+if RECORDING_ENABLED:
+    recorder = SegmentRecorder(RECORDING_DIR, RECORDING_SEGMENT_SECONDS, RECORDING_QUOTA_MB * 1024 * 1024)
+    recorder.start()
+output = StreamingOutput(recorder)
 # Inicia o encoder para MJPEG e associa com a saída de streaming
-picam2.start_recording(JpegEncoder(), FileOutput(output))
+encoder = JpegEncoder()
+output.encoder = encoder
+picam2.start_recording(encoder, output)
+detection_thread, detection_client = start_detection() if DETECTION_ENABLED else (None, None)
 
 try:
     address = ('', 8000) # Deixa em branco para aceitar conexões de qualquer IP, na porta 8000
@@ -93,4 +250,11 @@ try:
     print("Servidor iniciado! Acesse http://<IP_DO_SEU_PI>:8000")
     server.serve_forever()
 finally:
+    if detection_thread:
+        detection_thread.stop()
+        detection_thread.join(timeout=2.0)
+        detection_client.loop_stop()
+        detection_client.disconnect()
     picam2.stop_recording()
+    if recorder:
+        recorder.stop()